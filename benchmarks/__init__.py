@@ -0,0 +1 @@
+"""Benchmarks, run each with `scripts/benchmark <name>`."""
@@ -0,0 +1,346 @@
+"""
+Compare endpoint latency & query plans between two revisions of the app.
+
+Each revision is checked out into a temporary git worktree, or run from
+this directory if given as `.`, & given a database of its own, created
+with its own `manage.py sync` & seeded with the same data by its own
+`manage.py generate`. It's then served while the same workload from the
+load benchmark is run against it. Revisions take turns, in alternating
+order each round, so neither always gets the warmer database.
+
+Afterwards, each revision is run again briefly with every statement logged
+& explained, & the plans Postgres chose for each query are compared by
+their shape: nodes, relations, & indexes, without costs or timings. Only
+revisions with the `/admin/slow-queries` route have their plans compared.
+
+Results are printed as JSON. Exits non-zero if any route's p95 latency in
+the head revision is slower than in the base by more than `--threshold`
+percent.
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+from benchmarks.load import (
+    drive,
+    start_server,
+    wait_for_server,
+    PASSWORD,
+    Results,
+)
+from manage import (
+    _drop_db,
+    _replace_db,
+    _server_cursor,
+    Config as ManageConfig,
+    PRJ_DIR,
+)
+
+ADMIN_KEY = "compare_admin_key"
+# costs, timings, & row counts, which differ from run to run
+_PLAN_NUMBERS = re.compile(r"\s*\((?:cost|actual|never)[^)]*\)")
+
+# plan shapes, by the label of the statements they're for
+Plans = Dict[str, Set[str]]
+
+
+@dataclass
+class Revision:
+    """A revision of the app, checked out & given a database of its own."""
+
+    name: str
+    commit: str
+    directory: str
+    database: ManageConfig
+    # worktree to remove when done, if one was added
+    worktree: Optional[str] = None
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], cwd=PRJ_DIR, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def _drop_if_exists(cursor: Any, name: str) -> None:
+    cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (name,))
+    if cursor.fetchone():
+        _drop_db(cursor, name)
+
+
+def _manage(directory: str, database: ManageConfig, *args: str) -> None:
+    """Run a revision's own `manage.py` task against its database."""
+    subprocess.run(
+        [sys.executable, "manage.py", *args],
+        cwd=directory,
+        env={**os.environ,
+             "PYTHONPATH": directory,
+             "DB_USER": database.user,
+             "DB_PASS": database.password,
+             "DB_HOST": database.host,
+             "DB_PORT": str(database.port),
+             "DB_NAME": database.name},
+        check=True)
+
+
+def checkout(
+    name: str,
+    index: int,
+    args: argparse.Namespace,
+    workdir: str,
+) -> Revision:
+    """
+    Check out a revision & give it a database of its own, seeded.
+
+    The database is created empty & synced to the revision's schema by the
+    revision's own `manage.py`, so changed tables, indexes, & views are
+    compared too, then seeded by its `generate`, which gives the same data
+    for the same options. Syncing an already seeded copy instead could drop
+    tables the revision defines differently, e.g. with or without
+    partitions, leaving it with no rows in them.
+    """
+    if name == ".":
+        directory = PRJ_DIR
+        commit = f"{_git('rev-parse', 'HEAD')} with uncommitted changes"
+        worktree = None
+    else:
+        commit = _git("rev-parse", name)
+        directory = worktree = os.path.join(workdir, f"revision_{index}")
+        _git("worktree", "add", "--detach", worktree, commit)
+
+    database = ManageConfig(name=f"{args.database}_{index}")
+
+    with _server_cursor(database) as cursor:
+        _replace_db(cursor, database.name)
+
+    _manage(directory, database, "sync", "noprompt", "silent")
+    _manage(directory, database, "generate", "noprompt", "silent",
+            f"users={args.seed_users}",
+            f"transactions={args.transactions}",
+            "prefix=load_",
+            f"password={PASSWORD}")
+
+    return Revision(name, commit, directory, database, worktree)
+
+
+def remove(revision: Revision) -> None:
+    """Drop a revision's database & worktree."""
+    with _server_cursor(revision.database) as cursor:
+        _drop_if_exists(cursor, revision.database.name)
+
+    if revision.worktree is not None:
+        _git("worktree", "remove", "--force", revision.worktree)
+
+
+def measure(
+    revision: Revision,
+    args: argparse.Namespace,
+    results: Results,
+) -> None:
+    """Serve a revision & run the workload, adding to its results."""
+    server = start_server(revision.database, args.port, args.workers,
+                          revision.directory, SLOW_QUERY_MS="")
+    url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        asyncio.run(wait_for_server(url))
+        # same journeys for every revision
+        random.seed(args.seed)
+        run = asyncio.run(drive(url, args.users, args.seed_users,
+                                args.warmup, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+    for route, route_results in run.routes.items():
+        merged = results.routes.setdefault(route, type(route_results)())
+        merged.seconds.extend(route_results.seconds)
+        merged.errors += route_results.errors
+
+
+def plan_shape(plan: str) -> str:
+    """Reduce a plan to its nodes, without costs, timings, or details."""
+    nodes = []
+
+    for line in plan.splitlines():
+        # the root node, then only lines starting another node
+        if nodes and "->" not in line:
+            continue
+
+        nodes.append(_PLAN_NUMBERS.sub("", line).rstrip())
+
+    return "\n".join(nodes)
+
+
+def capture_plans(
+    revision: Revision,
+    args: argparse.Namespace,
+) -> Optional[Plans]:
+    """
+    Capture the plans chosen for a revision's statements, if it can.
+
+    A single User runs journeys while every statement is logged & read
+    statements are explained, one at a time, so most get explained.
+    """
+    server = start_server(revision.database, args.port, 1,
+                          revision.directory,
+                          SLOW_QUERY_MS="0",
+                          SLOW_QUERY_EXPLAIN_RATE="1",
+                          SLOW_QUERY_LOG_SIZE="10000",
+                          ADMIN_KEY=ADMIN_KEY)
+    url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        asyncio.run(wait_for_server(url))
+        random.seed(args.seed)
+        asyncio.run(drive(url, 1, args.seed_users, 0, args.plan_duration))
+        response = httpx.get(f"{url}/admin/slow-queries",
+                             headers={"X-Admin-Key": ADMIN_KEY})
+    finally:
+        server.terminate()
+        server.wait()
+
+    if response.status_code != 200:
+        return None
+
+    plans: Plans = {}
+
+    for statement in response.json():
+        if statement.get("plan"):
+            plans.setdefault(statement["label"], set()).add(
+                plan_shape(statement["plan"]))
+
+    return plans
+
+
+def compare_latency(
+    base: Dict[str, Any],
+    head: Dict[str, Any],
+    threshold: float,
+    min_requests: int,
+) -> Dict[str, Dict[str, Any]]:
+    """Compare p95 latency of every route measured for both revisions."""
+    routes = {}
+
+    for route in sorted(set(base) & set(head)):
+        before, after = base[route], head[route]
+
+        if min(before["requests"], after["requests"]) < min_requests:
+            continue
+
+        change = (after["p95_ms"] / before["p95_ms"] - 1) * 100
+        routes[route] = {
+            "base_p50_ms": before["p50_ms"],
+            "head_p50_ms": after["p50_ms"],
+            "base_p95_ms": before["p95_ms"],
+            "head_p95_ms": after["p95_ms"],
+            "base_p99_ms": before["p99_ms"],
+            "head_p99_ms": after["p99_ms"],
+            "p95_change_percent": round(change, 1),
+            "regressed": change > threshold,
+        }
+
+    return routes
+
+
+def compare_plans(
+    base: Optional[Plans],
+    head: Optional[Plans],
+) -> Optional[Dict[str, Dict[str, List[str]]]]:
+    """Give the plans of every label explained for both, where they differ."""
+    if base is None or head is None:
+        return None
+
+    return {label: {"base": sorted(base[label]),
+                    "head": sorted(head[label])}
+            for label in sorted(set(base) & set(head))
+            if base[label] != head[label]}
+
+
+def main() -> None:
+    """Seed & measure both revisions, & report the differences as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base", default="HEAD",
+                        help="Revision compared against.")
+    parser.add_argument("--head", default=".",
+                        help="Revision checked for regressions, `.` for "
+                             "this directory, with uncommitted changes.")
+    parser.add_argument("--threshold", type=float, default=10,
+                        help="Percent slower p95 latency that fails.")
+    parser.add_argument("--min-requests", type=int, default=50,
+                        help="Requests a route needs to be compared.")
+    parser.add_argument("--rounds", type=int, default=2,
+                        help="Workload runs for each revision.")
+    parser.add_argument("--database", default="compare_benchmark",
+                        help="Prefix of each revision's database.")
+    parser.add_argument("--seed-users", type=int, default=50)
+    parser.add_argument("--transactions", type=int, default=300_000)
+    parser.add_argument("--users", type=int, default=20,
+                        help="Users making requests at once.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=20,
+                        help="Seconds counted in each run.")
+    parser.add_argument("--plan-duration", type=float, default=10,
+                        help="Seconds spent capturing plans per revision.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the journeys Users take.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    revisions: List[Revision] = []
+
+    try:
+        for index, name in enumerate((args.base, args.head)):
+            revisions.append(checkout(name, index, args, workdir))
+
+        results = [Results(), Results()]
+
+        for round_number in range(args.rounds):
+            order = [0, 1] if round_number % 2 == 0 else [1, 0]
+
+            for index in order:
+                measure(revisions[index], args, results[index])
+
+        plans = [capture_plans(revision, args) for revision in revisions]
+    finally:
+        for revision in revisions:
+            remove(revision)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    duration = args.duration * args.rounds
+    base, head = [result.summary(duration) for result in results]
+    routes = compare_latency(base["routes"], head["routes"],
+                             args.threshold, args.min_requests)
+    regressed = [route for route, result in routes.items()
+                 if result["regressed"]]
+
+    print(json.dumps({
+        "base": {"revision": args.base, "commit": revisions[0].commit,
+                 "total": base["total"]},
+        "head": {"revision": args.head, "commit": revisions[1].commit,
+                 "total": head["total"]},
+        "threshold_percent": args.threshold,
+        "regressed": regressed,
+        "routes": routes,
+        "changed_plans": compare_plans(*plans),
+    }, indent=2))
+
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
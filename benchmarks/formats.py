@@ -0,0 +1,87 @@
+"""
+Compare size & CPU time of a Transaction export in each format.
+
+Rows are encoded as the export route sends them: in batches, each encoded
+as soon as it's read. JSON is the baseline every client gets today.
+"""
+
+import argparse
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from benchmarks.responses import LOOP, make_rows
+from src.formats import rows_stream, ARROW, JSON, MSGPACK
+from src.models import TransactionOut, TransactionRow
+
+COLUMNS = list(TransactionOut.__fields__)
+
+
+Row = Tuple[Any, ...]
+
+
+async def in_batches(
+    rows: List[Row],
+    size: int,
+) -> AsyncIterator[List[Row]]:
+    """Give rows in batches of the given size."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def _read(media_type: str, rows: List[Any], batch_size: int) -> bytes:
+    response = rows_stream(
+        in_batches(rows, batch_size), TransactionRow, media_type)
+
+    return b"".join([chunk async for chunk
+                     in response.body_iterator])  # type: ignore
+
+
+def measure(
+    media_type: str,
+    rows: List[Row],
+    batch_size: int,
+    repeat: int,
+) -> Dict[str, float]:
+    """Get bytes sent & mean CPU milliseconds to encode an export."""
+    body = LOOP.run_until_complete(_read(media_type, rows, batch_size))
+    start = time.process_time()
+
+    for _ in range(repeat):
+        LOOP.run_until_complete(_read(media_type, rows, batch_size))
+
+    return {
+        "bytes": len(body),
+        "cpu_ms": round((time.process_time() - start) / repeat * 1000, 3),
+    }
+
+
+def main() -> None:
+    """Run benchmark & print results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000,
+                        help="Transactions exported.")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Transactions read per query.")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Exports encoded in each format.")
+    args = parser.parse_args()
+
+    # as the export reader gives them
+    rows = [tuple(row.get(column) for column in COLUMNS)
+            for row in make_rows(args.rows)]
+    results = {media_type: measure(media_type, rows,
+                                   args.batch_size, args.repeat)
+               for media_type in (JSON, MSGPACK, ARROW)}
+
+    for result in results.values():
+        result["bytes_vs_json"] = round(
+            result["bytes"] / results[JSON]["bytes"], 3)
+        result["cpu_vs_json"] = round(
+            result["cpu_ms"] / results[JSON]["cpu_ms"], 3)
+
+    print(json.dumps({"rows": args.rows, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Drive the app over HTTP with concurrent users & report latency per route.
+
+A database of its own is created & seeded with Users, each with a few
+Accounts, Envelopes, & a few years of Transactions, then the app is
+started against it with uvicorn, unless `--url` points at a server already
+running against a seeded database. Each simulated User logs in, then runs
+scripted journeys until time's up: opening the dashboard, paging through
+Transactions, posting a Transaction, & funding an Envelope.
+
+Requests during warm up aren't counted. Results are printed as JSON, or
+written to `--output`, to be compared between commits.
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import httpx
+from manage import (
+    _replace_db,
+    _server_cursor,
+    generate,
+    sync,
+    Config as ManageConfig,
+)
+
+PASSWORD = "load test password"
+PAYEES = 200
+
+
+@dataclass
+class RouteResults:
+    """Latencies & statuses of every request counted for a route."""
+
+    seconds: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        """Summarise throughput & latency percentiles in milliseconds."""
+        milliseconds = sorted(seconds * 1000 for seconds in self.seconds)
+        count = len(milliseconds)
+        summary: Dict[str, Any] = {
+            "requests": count,
+            "errors": self.errors,
+            "throughput_rps": round(count / duration, 2),
+        }
+
+        if count == 1:
+            summary.update(p50_ms=round(milliseconds[0], 2),
+                           p95_ms=round(milliseconds[0], 2),
+                           p99_ms=round(milliseconds[0], 2))
+        elif count > 1:
+            percentiles = statistics.quantiles(
+                milliseconds, n=100, method="inclusive")
+            summary.update(p50_ms=round(percentiles[49], 2),
+                           p95_ms=round(percentiles[94], 2),
+                           p99_ms=round(percentiles[98], 2),
+                           mean_ms=round(statistics.fmean(milliseconds), 2))
+
+        return summary
+
+
+class Results:
+    """Requests made by every simulated User, by route."""
+
+    def __init__(self) -> None:
+        self.routes: Dict[str, RouteResults] = {}
+        # requests are only counted once warm up is done
+        self.counting = False
+
+    def record(self, route: str, seconds: float, status: int) -> None:
+        """Record a request to a route, if counting."""
+        if not self.counting:
+            return
+
+        results = self.routes.setdefault(route, RouteResults())
+        results.seconds.append(seconds)
+
+        if status >= 400:
+            results.errors += 1
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        """Summarise every route & all of them together."""
+        total = RouteResults()
+
+        for results in self.routes.values():
+            total.seconds.extend(results.seconds)
+            total.errors += results.errors
+
+        return {
+            "total": total.summary(duration),
+            "routes": {route: self.routes[route].summary(duration)
+                       for route in sorted(self.routes)},
+        }
+
+
+#
+# SEED DATA
+#
+
+
+def seed(
+    config: ManageConfig,
+    users: int,
+    transactions: int,
+) -> None:
+    """
+    Create a fresh database for the given config & seed it.
+
+    Data is loaded by `manage.py generate`, with Users' handles numbered
+    from `load_1`, all sharing one password.
+    """
+    with _server_cursor(config) as cursor:
+        _replace_db(cursor, config.name)
+
+    sync(["silent", "noprompt"], config)
+    generate(["silent", "noprompt",
+              f"users={users}",
+              f"transactions={transactions}",
+              "prefix=load_",
+              f"password={PASSWORD}"], config)
+
+
+#
+# SERVER
+#
+
+
+def start_server(
+    config: ManageConfig,
+    port: int,
+    workers: int,
+    directory: Optional[str] = None,
+    **settings: str,
+) -> "subprocess.Popen[bytes]":
+    """
+    Start the app with uvicorn against the given database.
+
+    The app is run from the given directory, e.g. a checkout of another
+    revision, or this one, with any other settings given as environment
+    variables.
+    """
+    env = {
+        **os.environ,
+        "APP_KEY": os.getenv("APP_KEY", "load_test_key"),
+        "DB_USER": config.user,
+        "DB_PASS": config.password,
+        "DB_HOST": config.host,
+        "DB_PORT": str(config.port),
+        "DB_NAME": config.name,
+        **settings,
+    }
+
+    if directory is not None:
+        env["PYTHONPATH"] = directory
+
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src:app", "--factory",
+         "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=directory,
+        env=env)
+
+
+async def wait_for_server(url: str, timeout: float = 30) -> None:
+    """Wait until the server at the given URL responds."""
+    deadline = time.perf_counter() + timeout
+
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                if time.perf_counter() > deadline:
+                    raise
+
+            await asyncio.sleep(0.2)
+
+
+#
+# JOURNEYS
+#
+
+
+class User:
+    """A simulated User, making requests one at a time."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        results: Results,
+        handle: str,
+    ) -> None:
+        self.client = client
+        self.results = results
+        self.handle = handle
+        self.headers: Dict[str, str] = {}
+        self.accounts: List[Dict[str, Any]] = []
+        self.envelopes: List[Dict[str, Any]] = []
+
+    async def request(
+        self,
+        method: str,
+        route: str,
+        *,
+        path: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Request a route, given as a path template filled from `path`."""
+        start = time.perf_counter()
+        response = await self.client.request(
+            method,
+            route.format(**(path or {})),
+            headers={**self.headers, **kwargs.pop("headers", {})},
+            **kwargs)
+        self.results.record(f"{method} {route}",
+                            time.perf_counter() - start,
+                            response.status_code)
+
+        return response
+
+    async def login(self) -> None:
+        """Get a token, then the User's Accounts & Envelopes."""
+        self.headers = {}
+        response = await self.request(
+            "POST", "/token",
+            data={"username": self.handle, "password": PASSWORD})
+        self.headers = {
+            "Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def dashboard(self) -> None:
+        """Open the app: User, Accounts, Envelopes, & balances."""
+        await self.request("GET", "/user")
+        self.accounts = (await self.request("GET", "/account")).json()
+        self.envelopes = (await self.request("GET", "/envelope")).json()
+        await self.request("GET", "/balance/total")
+        await self.request("GET", "/balance/available")
+
+    async def paging(self) -> None:
+        """Page back through recent Transactions, sometimes by Account."""
+        filters: Dict[str, Any] = {"limit": 50, "sort": "timestamp"}
+
+        if random.random() < 0.5:
+            account = random.choice(self.accounts)
+            filters["account_id"] = account["id"]
+            await self.request("GET", "/balance/account/{account_id}",
+                               path={"account_id": account["id"]})
+
+        for page in range(random.randint(1, 5)):
+            await self.request("GET", "/transaction",
+                               params={**filters, "page": page})
+
+    async def posting(self) -> None:
+        """Post a purchase, retried once as a client would on a timeout."""
+        key = str(uuid4())
+        body = {
+            "amount": str(-Decimal(random.randint(100, 10000)) / 100),
+            "payee": f"payee {int(PAYEES * random.random() ** 3)}",
+            "description": "posted by load test",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "account_id": random.choice(self.accounts)["id"],
+            "spent_from": random.choice(self.envelopes)["id"]
+            if self.envelopes and random.random() < 0.4 else None,
+        }
+
+        for _ in range(1 if random.random() < 0.9 else 2):
+            await self.request("POST", "/transaction",
+                               json=body,
+                               headers={"Idempotency-Key": key})
+
+    async def funding(self) -> None:
+        """Move funds from Available Balance into an Envelope."""
+        if not self.envelopes:
+            return
+
+        envelope = random.choice(self.envelopes)
+        path = {"envelope_id": envelope["id"],
+                "funds": str(Decimal(random.randint(100, 5000)) / 100)}
+
+        await self.request("GET", "/balance/available")
+        await self.request("PUT", "/envelope/{envelope_id}/funds/{funds}",
+                           path=path)
+        await self.request("GET", "/balance/envelope/{envelope_id}",
+                           path=path)
+
+    async def run(self, deadline: float) -> None:
+        """Log in, then run journeys until the deadline."""
+        journeys: List[Tuple[Callable[[], Coroutine[Any, Any, None]],
+                             float]] = [
+            (self.dashboard, 0.35),
+            (self.paging, 0.35),
+            (self.posting, 0.2),
+            (self.funding, 0.08),
+            (self.login, 0.02),
+        ]
+
+        await self.login()
+        await self.dashboard()
+
+        while time.perf_counter() < deadline:
+            journey = random.choices([journey for journey, _ in journeys],
+                                     [weight for _, weight in journeys])[0]
+            await journey()
+
+
+async def drive(
+    url: str,
+    users: int,
+    seeded_users: int,
+    warmup: float,
+    duration: float,
+) -> Results:
+    """Run the given number of Users against the server at once."""
+    results = Results()
+    deadline = time.perf_counter() + warmup + duration
+
+    async with httpx.AsyncClient(
+        base_url=url,
+        timeout=30,
+        limits=httpx.Limits(max_connections=users),
+    ) as client:
+        async def count_after_warmup() -> None:
+            await asyncio.sleep(warmup)
+            results.counting = True
+
+        await asyncio.gather(
+            count_after_warmup(),
+            *[User(client, results, f"load_{n % seeded_users + 1}")
+              .run(deadline)
+              for n in range(users)])
+
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Get the commit being benchmarked, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, check=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    """Seed, start the app, run benchmark, & report results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url",
+                        help="Benchmark a server already running instead.")
+    parser.add_argument("--database", default="load_benchmark",
+                        help="Database created & seeded for the app.")
+    parser.add_argument("--no-seed", action="store_true",
+                        help="Reuse the database seeded by an earlier run.")
+    parser.add_argument("--seed-users", type=int, default=50,
+                        help="Users seeded.")
+    parser.add_argument("--transactions", type=int, default=300_000,
+                        help="Transactions seeded, across every User.")
+    parser.add_argument("--users", type=int, default=20,
+                        help="Users making requests at once.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn worker processes.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warmup", type=float, default=5,
+                        help="Seconds before requests are counted.")
+    parser.add_argument("--duration", type=float, default=30,
+                        help="Seconds requests are counted for.")
+    parser.add_argument("--output", help="Write results to this file.")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+
+    if url is None:
+        config = ManageConfig(name=args.database)
+
+        if not args.no_seed:
+            seed(config, args.seed_users, args.transactions)
+
+        server = start_server(config, args.port, args.workers)
+        url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        asyncio.run(wait_for_server(url))
+        results = asyncio.run(drive(url,
+                                    args.users,
+                                    args.seed_users,
+                                    args.warmup,
+                                    args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = json.dumps({
+        "revision": git_revision(),
+        "users": args.users,
+        "workers": args.workers,
+        "seed_users": args.seed_users,
+        "seed_transactions": args.transactions,
+        "duration_s": args.duration,
+        **results.summary(args.duration),
+    }, indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
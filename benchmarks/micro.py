@@ -0,0 +1,301 @@
+"""
+Time the query building & model code run on every request, without a DB.
+
+Covers filter & pagination building, the `changes` updaters composing
+their SET clauses, & Transaction models built from request bodies & rows.
+Model methods run against a client whose queries return canned rows at
+once, so only the Python around each query is timed.
+
+Each benchmark is run in rounds of enough calls to take `--min-time`, & the
+fastest round is kept, as the one least disturbed by anything else running.
+Results are compared against a baseline saved with `--save` by an earlier
+run on the same machine; the run fails if any benchmark is slower than its
+baseline by more than `--threshold` percent.
+"""
+
+import argparse
+from dataclasses import fields
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+from uuid import uuid4
+
+from db_wrapper import AsyncClient
+
+from benchmarks.responses import LOOP, make_rows
+from src.database import create_client, create_conn_config, Client
+from src.models import (
+    AccountChanges,
+    AccountModel,
+    EnvelopeChanges,
+    EnvelopeModel,
+    TransactionChanges,
+    TransactionIn,
+    TransactionModel,
+    TransactionOut,
+    TransactionRow,
+    UserChanges,
+    UserModel,
+)
+from src.models.filters import (
+    build_pagination_filters,
+    build_query_filters,
+    equals,
+    greater_than_or_equal_to,
+    less_than_or_equal_to,
+    logical_and,
+)
+
+# runs the benchmarked code the given number of times
+Benchmark = Callable[[int], None]
+
+BASELINE = os.path.join(".benchmarks", "micro.json")
+PAGE = 50
+
+ROWS = make_rows(PAGE)
+# in the order the reader selects columns
+ROW_TUPLES = [tuple(row.get(column.name) for column in fields(TransactionRow))
+              for row in ROWS]
+USER_ID = uuid4()
+
+
+# rows every query is answered with, set for each benchmark
+_answer: Dict[str, List[Any]] = {"rows": [], "tuples": ROW_TUPLES}
+
+
+async def execute_and_return(*_: Any) -> List[Dict[str, Any]]:
+    """Answer any query with the current benchmark's rows, at once."""
+    return _answer["rows"]
+
+
+async def execute_and_return_tuples(*_: Any) -> List[Tuple[Any, ...]]:
+    """Answer any query with a page of tuple rows, at once."""
+    return _answer["tuples"]
+
+
+def returned_row(**values: Any) -> Dict[str, Any]:
+    """Build a row as returned by an UPDATE, from a Transaction's."""
+    row = {key: ROWS[0][key] for key in ("id", "version", "updated_at")}
+
+    return {**row, **values}
+
+
+def sync_benchmark(function: Callable[[], Any]) -> Benchmark:
+    """Benchmark calling a function."""
+    def run(calls: int) -> None:
+        for _ in range(calls):
+            function()
+
+    return run
+
+
+def async_benchmark(
+    function: Callable[[], Awaitable[Any]],
+    row: Optional[Dict[str, Any]] = None,
+) -> Benchmark:
+    """
+    Benchmark awaiting a coroutine function, all calls in one loop run.
+
+    Queries are answered with the given row, if any.
+    """
+    async def calls_of(calls: int) -> None:
+        for _ in range(calls):
+            await function()
+
+    def run(calls: int) -> None:
+        _answer["rows"] = [row] if row is not None else []
+        LOOP.run_until_complete(calls_of(calls))
+
+    return run
+
+
+def transaction_filters() -> Dict[str, Any]:
+    """Build the filters given by a request for a filtered list."""
+    return {
+        "account_id": equals(ROWS[0]["account_id"]),
+        "payee": equals("payee 7"),
+        "amount": logical_and(
+            greater_than_or_equal_to(Decimal("-50.00")),
+            less_than_or_equal_to(Decimal("50.00"))),
+        "timestamp": logical_and(
+            greater_than_or_equal_to(ROWS[0]["timestamp"]),
+            less_than_or_equal_to(ROWS[-1]["timestamp"])),
+        "spent_from": None,
+    }
+
+
+def create_benchmarks() -> Dict[str, Benchmark]:
+    """Create every benchmark, by name."""
+    client = create_client(create_conn_config())
+    transactions = TransactionModel(client)
+    accounts = AccountModel(client)
+    envelopes = EnvelopeModel(client)
+    users = UserModel(client)
+    filters = transaction_filters()
+    body = {"amount": "-12.34",
+            "description": "a description",
+            "payee": "payee 7",
+            "timestamp": "2021-06-01T12:00:00+00:00",
+            "account_id": str(ROWS[0]["account_id"]),
+            "spent_from": None}
+    transaction_changes = TransactionChanges(amount=Decimal("-1.00"),
+                                             payee="payee 8",
+                                             spent_from=uuid4())
+
+    return {
+        "build_query_filters": sync_benchmark(
+            lambda: build_query_filters(filters)),
+        "build_query_filters.empty": sync_benchmark(
+            lambda: build_query_filters(
+                {key: None for key in filters})),
+        "build_pagination_filters": sync_benchmark(
+            lambda: build_pagination_filters(PAGE, 3, "timestamp")),
+        "TransactionIn.parse": sync_benchmark(
+            lambda: TransactionIn(**body)),
+        "TransactionOut.validate": sync_benchmark(
+            lambda: [TransactionOut(**row) for row in ROWS]),
+        "TransactionOut.construct": sync_benchmark(
+            lambda: [TransactionOut.construct(**row) for row in ROWS]),
+        "TransactionOut.dict": sync_benchmark(
+            lambda: TransactionOut.construct(**ROWS[0]).dict()),
+        "TransactionReader.many_by_user": async_benchmark(
+            lambda: transactions.read.many_by_user(
+                USER_ID, limit=PAGE, page=0, sort="timestamp", **filters)),
+        "TransactionUpdater.changes": async_benchmark(
+            lambda: transactions.update.changes(
+                ROWS[0]["id"], transaction_changes),
+            {**ROWS[0], "spent_from": None}),
+        "AccountUpdater.changes": async_benchmark(
+            lambda: accounts.update.changes(
+                ROWS[0]["account_id"], USER_ID,
+                AccountChanges(name="new name")),
+            returned_row(name="new name", user_id=USER_ID, closed=False)),
+        "EnvelopeUpdater.changes": async_benchmark(
+            lambda: envelopes.update.changes(
+                ROWS[0]["id"], USER_ID, EnvelopeChanges(name="new name")),
+            returned_row(name="new name", user_id=USER_ID,
+                         total_funds=Decimal("10.00"))),
+        "UserUpdater.changes": async_benchmark(
+            lambda: users.update.changes(
+                USER_ID, UserChanges(full_name="New Name")),
+            {"id": USER_ID, "handle": "handle", "full_name": "New Name",
+             "preferred_name": "Nickname"}),
+    }
+
+
+def measure(
+    benchmark: Benchmark,
+    rounds: int,
+    min_time: float,
+) -> Dict[str, float]:
+    """Get the fastest & median microseconds per call over every round."""
+    calls = 1
+
+    # find how many calls take long enough to time reliably
+    while True:
+        start = time.perf_counter()
+        benchmark(calls)
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time:
+            break
+
+        # far short of min_time, grow faster; close to it, don't overshoot
+        calls *= 10 ** 0.5 if elapsed < min_time / 10 else 2
+        calls = int(calls) + 1
+
+    per_call: List[float] = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        benchmark(calls)
+        per_call.append((time.perf_counter() - start) / calls * 1e6)
+
+    return {"min_us": round(min(per_call), 3),
+            "median_us": round(statistics.median(per_call), 3),
+            "calls": calls}
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """
+    Compare results to a baseline, giving the benchmarks that regressed.
+
+    Every result gets its change from the baseline, as a percentage.
+    """
+    regressed = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        change = (result["min_us"] / baseline[name]["min_us"] - 1) * 100
+        result["change_percent"] = round(change, 1)
+
+        if change > threshold:
+            regressed.append(name)
+
+    return regressed
+
+
+def main() -> None:
+    """Run benchmarks, compare to baseline, & print results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="Timed rounds of each benchmark.")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="Seconds each round takes, at least.")
+    parser.add_argument("--threshold", type=float, default=20,
+                        help="Percent slower than baseline that fails.")
+    parser.add_argument("--baseline", default=BASELINE,
+                        help="Baseline file compared against.")
+    parser.add_argument("--save", action="store_true",
+                        help="Save results as the new baseline.")
+    parser.add_argument("-k", dest="only",
+                        help="Only run benchmarks with names containing this.")
+    args = parser.parse_args()
+
+    baseline: Optional[Dict[str, Dict[str, float]]] = None
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="UTF-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    with patch.object(AsyncClient, "execute_and_return",
+                      new=execute_and_return), \
+            patch.object(Client, "execute_and_return_tuples",
+                         new=execute_and_return_tuples):
+        results = {name: measure(benchmark, args.rounds, args.min_time)
+                   for name, benchmark in create_benchmarks().items()
+                   if args.only is None or args.only in name}
+
+    regressed = compare(results, baseline, args.threshold) \
+        if baseline is not None and not args.save else []
+
+    print(json.dumps({
+        "baseline": args.baseline if baseline is not None else None,
+        "threshold_percent": args.threshold,
+        "regressed": regressed,
+        "results": results,
+    }, indent=2))
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="UTF-8") as baseline_file:
+            json.dump({**(baseline or {}), **results}, baseline_file,
+                      indent=2)
+
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
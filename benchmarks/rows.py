@@ -0,0 +1,90 @@
+"""
+Compare memory allocated to hold a page of Transactions read for a list.
+
+Before: the driver builds a dict for each row (RealDictRow), which the
+reader turns into a TransactionOut.
+After: the driver builds a tuple for each row, which the reader turns into
+a slotted TransactionRow.
+
+Column values (UUIDs, Decimals, datetimes...) are created up front & shared
+by both paths, since they're allocated by the driver either way.
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from psycopg2.extras import RealDictRow
+
+from benchmarks.responses import make_rows
+from src.models import TransactionOut, TransactionRow
+
+Values = List[Tuple[Any, ...]]
+COLUMNS = list(TransactionOut.__fields__)
+
+
+def before(values: Values) -> List[TransactionOut]:
+    """Read dict rows into Models."""
+    rows = [RealDictRow(zip(COLUMNS, row)) for row in values]
+
+    return [TransactionOut.construct(**row) for row in rows]
+
+
+def after(values: Values) -> List[TransactionRow]:
+    """Read tuple rows into row objects."""
+    # a new tuple for each row, as the driver would build
+    rows = [tuple(iter(row)) for row in values]
+
+    return [TransactionRow(*row) for row in rows]
+
+
+def measure(
+    read: Callable[[Values], List[Any]],
+    values: Values,
+) -> Dict[str, int]:
+    """Trace memory allocated while reading a page & by the page kept."""
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+
+    page = read(values)
+
+    kept = tracemalloc.take_snapshot().compare_to(start, "filename")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del page
+
+    return {
+        "kept_bytes": sum(stat.size_diff for stat in kept),
+        "kept_blocks": sum(stat.count_diff for stat in kept),
+        "peak_bytes": peak,
+    }
+
+
+def main() -> None:
+    """Run benchmark & print results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000,
+                        help="Transactions per page.")
+    args = parser.parse_args()
+
+    values = [tuple(row.get(column) for column in COLUMNS)
+              for row in make_rows(args.rows)]
+    before_stats = measure(before, values)
+    after_stats = measure(after, values)
+
+    print(json.dumps({
+        "rows_per_page": args.rows,
+        "before": before_stats,
+        "after": after_stats,
+        "kept_bytes_reduction": round(
+            1 - after_stats["kept_bytes"] / before_stats["kept_bytes"], 3),
+        "peak_bytes_reduction": round(
+            1 - after_stats["peak_bytes"] / before_stats["peak_bytes"], 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
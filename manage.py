@@ -1,32 +1,65 @@
 """Script for managing database migrations.
 
-Exposes two methods:
+Exposes five methods:
     sync        diff app to live db & apply changes, use for dev primarily
     pending     diff schema dump & save to file, used for prod primarily
+    generate    load synthetic Users, Accounts, Envelopes, & Transactions
+    template    build app schema into a template db to copy others from
+    partitions  create monthly Transaction partitions ahead of time
 """
 
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+import hashlib
 import io
+from multiprocessing import Pool
 import os
+from pathlib import Path
 import random
+import re
 import string
 import sys
 import time
-from typing import Any, Optional, Generator, List, Tuple
+from typing import Any, Dict, Optional, Generator, List, Tuple, Type, TypeVar
+from uuid import UUID
 
 from migra import Migration
 from psycopg2 import connect, OperationalError
 from psycopg2 import sql
+from psycopg2.errors import (  # pylint: disable=E0611
+    DeadlockDetected,
+    LockNotAvailable,
+)
 from psycopg2.sql import Composed
 from sqlbag import (
     S,
     load_sql_from_folder,
+    raw_execute,
 )
 
 
 PRJ_DIR = os.path.dirname(os.path.realpath(__file__))
 
+# monthly Transaction partitions are kept out of the app schema, here, so
+# diffing with migra leaves them be
+PARTITIONS_SCHEMA = 'transaction_partitions'
+# an unpartitioned Transaction table is set aside here, then attached as
+# the partition holding every month up to when it was
+HISTORY_PARTITION = f'{PARTITIONS_SCHEMA}.transaction_history'
+# months ahead of the current one partitions are created for by default
+PARTITIONS_AHEAD = 3
+
+# holds the fingerprint of the app schema a database was last synced to
+FINGERPRINT_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_fingerprint (
+        -- only ever one row
+        id boolean PRIMARY KEY DEFAULT true CHECK (id),
+        fingerprint text NOT NULL,
+        synced_at timestamptz NOT NULL DEFAULT now()
+    );
+"""
+
 
 @dataclass
 class Config:
@@ -96,10 +129,19 @@ def _temp_name() -> str:
     return tempname
 
 
-def _create_db(cursor: Any, name: str) -> None:
-    """Create a database with a given name."""
-    query = sql.SQL('create database {name};').format(
-        name=sql.Identifier(name))
+def _create_db(
+    cursor: Any,
+    name: str,
+    template: Optional[str] = None,
+) -> None:
+    """Create a database with a given name, copying template if given."""
+    if template is None:
+        query = sql.SQL('create database {name};').format(
+            name=sql.Identifier(name))
+    else:
+        query = sql.SQL('create database {name} template {template};').format(
+            name=sql.Identifier(name),
+            template=sql.Identifier(template))
 
     cursor.execute(query)
 
@@ -136,6 +178,45 @@ def _drop_db(cursor: Any, name: str) -> None:
     cursor.execute(drop)
 
 
+def _replace_db(
+    cursor: Any,
+    name: str,
+    template: Optional[str] = None,
+) -> None:
+    """Drop a database with a given name, if any, & create it again."""
+    cursor.execute('SELECT 1 FROM pg_database WHERE datname = %s;', (name,))
+
+    if cursor.fetchone():
+        _drop_db(cursor, name)
+
+    _create_db(cursor, name, template)
+
+
+@contextmanager
+def _server_cursor(config: Config) -> Generator[Any, Any, Any]:
+    """
+    Yield a cursor on the server's `postgres` database as context.
+
+    For creating & dropping databases, including the one configured.
+    """
+    connection = _resilient_connect(Config(**{  # type: ignore
+        **config.__dict__,
+        'name': 'postgres',
+    }).url)
+    connection.set_session(autocommit=True)
+
+    try:
+        with connection.cursor() as cursor:
+            yield cursor
+    finally:
+        connection.close()
+
+
+def _template_name(config: Config) -> str:
+    """Name the template database for a given database."""
+    return f'{config.name}_template'
+
+
 def _load_pre_migration(dsn: str) -> None:
     """
     Load schema for production server.
@@ -161,6 +242,257 @@ def _load_from_app(session: S) -> None:
     Uses all .sql files stored at ./src/models/**
     """
     load_sql_from_folder(session, f'{PRJ_DIR}/src/models')
+    raw_execute(session, FINGERPRINT_TABLE)
+
+
+def _schema_fingerprint() -> str:
+    """
+    Hash the application schema.
+
+    Covers the path & contents of every .sql file at ./src/models/**, in
+    the order they're loaded, along with the fingerprint table itself.
+    """
+    digest = hashlib.sha256(FINGERPRINT_TABLE.encode())
+    models = os.path.join(PRJ_DIR, 'src', 'models')
+
+    for path in sorted(Path(models).glob('**/*.sql')):
+        digest.update(str(path.relative_to(models)).encode() + b'\0')
+        digest.update(path.read_bytes() + b'\0')
+
+    return digest.hexdigest()
+
+
+def _synced_fingerprint(dsn: str) -> Optional[str]:
+    """Get the fingerprint of the schema a database was synced to, if any."""
+    connection = _resilient_connect(dsn)
+
+    with connection, connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('schema_fingerprint');")
+        if cursor.fetchone()[0] is None:
+            fingerprint = None
+        else:
+            cursor.execute('SELECT fingerprint FROM schema_fingerprint;')
+            row = cursor.fetchone()
+            fingerprint = row[0] if row else None
+
+    connection.close()
+
+    return fingerprint
+
+
+def _save_fingerprint(dsn: str, fingerprint: str) -> None:
+    """Record the fingerprint of the schema a database was synced to."""
+    connection = _resilient_connect(dsn)
+
+    with connection, connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO schema_fingerprint (fingerprint)
+            VALUES (%s)
+            ON CONFLICT (id) DO UPDATE
+            SET fingerprint = EXCLUDED.fingerprint, synced_at = now();
+        """, (fingerprint,))
+
+    connection.close()
+
+
+#
+# TRANSACTION PARTITIONS
+#
+
+# lower & upper bounds of every Transaction partition but the default, as
+# seconds since the epoch
+_PARTITION_BOUNDS = r"""
+    SELECT
+        CASE WHEN bound LIKE '%FROM (MINVALUE)%' THEN '-Infinity'::float8
+        ELSE extract(epoch FROM (regexp_match(
+            bound, 'FROM \(''([^'']+)''\)'))[1]::timestamptz)::float8
+        END,
+        CASE WHEN bound LIKE '%TO (MAXVALUE)%' THEN 'Infinity'::float8
+        ELSE extract(epoch FROM (regexp_match(
+            bound, 'TO \(''([^'']+)''\)'))[1]::timestamptz)::float8
+        END
+    FROM (
+        SELECT pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits AS i
+        INNER JOIN pg_class AS c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.transaction'::regclass
+    ) AS partitions
+    WHERE bound <> 'DEFAULT';
+"""
+
+
+def _month_start(moment: datetime, months: int = 0) -> datetime:
+    """Get the start of the UTC month a number of months from a moment."""
+    index = moment.year * 12 + moment.month - 1 + months
+
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _set_aside_unpartitioned(cursor: Any, online: bool) -> bool:
+    """
+    Set aside the Transaction table, if not yet partitioned.
+
+    Migra can only partition a table by dropping & creating it again, along
+    with every row, so the table is moved out of the app schema instead, to
+    be attached to its partitioned replacement once that's created. Its
+    triggers & foreign keys are dropped, as it gets the replacement's.
+
+    Refused if changes are to be applied online, as the table would be
+    missing until they're all applied, or for good if one fails.
+    """
+    cursor.execute("""
+        SELECT relkind FROM pg_class
+        WHERE oid = to_regclass('public.transaction');
+    """)
+    row = cursor.fetchone()
+
+    if row is None or row[0] != 'r':
+        return False
+
+    if online:
+        raise ValueError(
+            'The transaction table must be partitioned in one '
+            'transaction, sync without `online` first.')
+
+    history = sql.SQL(HISTORY_PARTITION)
+    cursor.execute(sql.SQL("""
+        CREATE SCHEMA IF NOT EXISTS {schema};
+        ALTER TABLE public.transaction SET SCHEMA {schema};
+        ALTER TABLE {schema}.transaction RENAME TO {name};
+    """).format(schema=sql.Identifier(PARTITIONS_SCHEMA),
+                name=sql.Identifier(HISTORY_PARTITION.split('.')[1])))
+
+    cursor.execute("""
+        SELECT tgname FROM pg_trigger
+        WHERE tgrelid = %s::regclass AND NOT tgisinternal;
+    """, (HISTORY_PARTITION,))
+    for (trigger,) in cursor.fetchall():
+        cursor.execute(sql.SQL('DROP TRIGGER {trigger} ON {history};').format(
+            trigger=sql.Identifier(trigger), history=history))
+
+    cursor.execute("""
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f';
+    """, (HISTORY_PARTITION,))
+    for (constraint,) in cursor.fetchall():
+        cursor.execute(sql.SQL(
+            'ALTER TABLE {history} DROP CONSTRAINT {constraint};'
+        ).format(history=history, constraint=sql.Identifier(constraint)))
+
+    return True
+
+
+def _attach_history(dsn: str) -> None:
+    """
+    Attach a Transaction table set aside to the partitioned one.
+
+    It holds every Transaction up to the end of the current month, or the
+    latest it holds, & monthly partitions carry on from there.
+    """
+    connection = _resilient_connect(dsn)
+
+    with connection, connection.cursor() as cursor:
+        cursor.execute(sql.SQL("""
+            SELECT
+                date_trunc('month', greatest(max("timestamp"), now()), 'UTC')
+                + interval '1 month'
+            FROM {history};
+        """).format(history=sql.SQL(HISTORY_PARTITION)))
+        upper = cursor.fetchone()[0]
+
+        cursor.execute(sql.SQL("""
+            ALTER TABLE "transaction" ATTACH PARTITION {history}
+            FOR VALUES FROM (MINVALUE) TO ({upper});
+        """).format(history=sql.SQL(HISTORY_PARTITION),
+                    upper=sql.Literal(upper.isoformat())))
+
+    connection.close()
+
+
+def _fill_transaction_ids(dsn: str) -> None:
+    """
+    Fill the Transaction id lookup table, if empty while Transactions aren't.
+
+    Its triggers only see Transactions written once it exists, so those
+    written before, or attached as history, are added here. Fails if an id
+    is taken twice, as the lookup table's key is what keeps ids unique.
+    """
+    connection = _resilient_connect(dsn)
+
+    with connection, connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO transaction_id (id, "timestamp")
+            SELECT id, "timestamp" FROM "transaction"
+            WHERE NOT EXISTS (SELECT FROM transaction_id);
+        """)
+
+    connection.close()
+
+
+def _create_partition(cursor: Any, start: datetime, end: datetime) -> None:
+    """
+    Create the Transaction partition for a range.
+
+    Transactions in the range are moved into it from the default partition,
+    directly, so no triggers see them as changed.
+    """
+    bounds = {'start': start.isoformat(), 'end': end.isoformat()}
+    cursor.execute("""
+        CREATE TEMPORARY TABLE moving ON COMMIT DROP AS
+        SELECT * FROM transaction_default
+        WHERE "timestamp" >= %(start)s AND "timestamp" < %(end)s;
+
+        DELETE FROM transaction_default
+        WHERE "timestamp" >= %(start)s AND "timestamp" < %(end)s;
+    """, bounds)
+    cursor.execute(sql.SQL("""
+        CREATE TABLE {name} PARTITION OF "transaction"
+        FOR VALUES FROM ({start}) TO ({end});
+
+        INSERT INTO {name} SELECT * FROM moving;
+    """).format(
+        name=sql.Identifier(PARTITIONS_SCHEMA,
+                            f'transaction_y{start:%Y}m{start:%m}'),
+        start=sql.Literal(bounds['start']),
+        end=sql.Literal(bounds['end'])))
+
+
+def _ensure_partitions(
+    dsn: str,
+    since: datetime,
+    ahead: int = PARTITIONS_AHEAD,
+) -> List[datetime]:
+    """
+    Create monthly Transaction partitions from a month to months ahead.
+
+    Months already covered by a partition are skipped, & each partition is
+    created in a transaction of its own. Gives the months created.
+    """
+    last = _month_start(datetime.now(timezone.utc), ahead)
+    month = _month_start(since)
+    created = []
+    connection = _resilient_connect(dsn)
+
+    with connection, connection.cursor() as cursor:
+        cursor.execute(sql.SQL('CREATE SCHEMA IF NOT EXISTS {schema};')
+                       .format(schema=sql.Identifier(PARTITIONS_SCHEMA)))
+        cursor.execute(_PARTITION_BOUNDS)
+        bounds = cursor.fetchall()
+
+    while month <= last:
+        end = _month_start(month, 1)
+
+        if not any(lower < end.timestamp() and month.timestamp() < upper
+                   for lower, upper in bounds):
+            with connection, connection.cursor() as cursor:
+                _create_partition(cursor, month, end)
+            created.append(month)
+
+        month = end
+
+    connection.close()
+
+    return created
 
 
 @contextmanager
@@ -173,7 +505,8 @@ def _get_schema_diff(
             S(target_db_url) as target_schema_session:
         migration = Migration(
             from_schema_session,
-            target_schema_session)
+            target_schema_session,
+            exclude_schema=PARTITIONS_SCHEMA)
         migration.set_safety(False)
         migration.add_all_changes()
 
@@ -198,6 +531,198 @@ def _temp_db(config: Config) -> Generator[str, Any, Any]:
     connection.close()
 
 
+AnyOptions = TypeVar('AnyOptions', bound='Options')
+
+
+@dataclass
+class Options:
+    """Options given to a task as `name=value` arguments."""
+
+    @classmethod
+    def from_args(cls: Type[AnyOptions], args: List[str]) -> AnyOptions:
+        """Read options given as `name=value` arguments."""
+        types = {option.name: option.type for option in fields(cls)}
+        values: Dict[str, Any] = {}
+
+        for arg in args:
+            name, equals, value = arg.partition('=')
+
+            if equals:
+                if name not in types:
+                    raise ValueError(f'Unknown option: {name}')
+                values[name] = types[name](value)  # type: ignore
+
+        return cls(**values)
+
+
+@dataclass
+class OnlineOptions(Options):
+    """Timeouts & retries for applying changes with `sync online`."""
+
+    # longest wait for a lock before a statement is given up & retried
+    lock_timeout: str = '2s'
+    # longest any statement may run, except building an index concurrently
+    statement_timeout: str = '5min'
+    # times a statement is retried after waiting too long for a lock
+    retries: int = 10
+    # seconds waited before the first retry, doubling for each after
+    backoff: float = 0.5
+
+
+# a name, quoted or not, & one optionally qualified by its schema
+_IDENTIFIER = r'(?:"(?:[^"]|"")+"|[^\s".;(]+)'
+_QUALIFIED = rf'(?:{_IDENTIFIER}\.)?{_IDENTIFIER}'
+_CREATE_INDEX = re.compile(
+    r'^\s*create\s+(unique\s+)?index\s+(?!concurrently\b)'
+    rf'(?:if\s+not\s+exists\s+)?({_IDENTIFIER})\s+on\s+(?!only\b)'
+    rf'({_QUALIFIED})',
+    re.IGNORECASE)
+# index name & the schema of its table
+_CONCURRENT_INDEX = re.compile(
+    r'^\s*create\s+(?:unique\s+)?index\s+concurrently\s+'
+    rf'({_IDENTIFIER})\s+on\s+(?:({_IDENTIFIER})\.)?',
+    re.IGNORECASE)
+_DROP_INDEX = re.compile(
+    r'^\s*drop\s+index\s+(?!concurrently\b)(?:if\s+exists\s+)?'
+    rf'({_QUALIFIED})',
+    re.IGNORECASE)
+_ADD_CONSTRAINT = re.compile(
+    rf'^\s*alter\s+table\s+({_QUALIFIED})\s+add\s+constraint\s+'
+    rf'({_IDENTIFIER})\s+((?:foreign\s+key|check)\b.*?)\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL)
+
+
+def _is_partitioned(cursor: Any, relation: str) -> bool:
+    """Check if a table or index exists & is partitioned."""
+    cursor.execute("""
+        SELECT relkind IN ('p', 'I')
+        FROM pg_class
+        WHERE oid = to_regclass(%s);
+    """, (relation,))
+    row = cursor.fetchone()
+
+    return bool(row and row[0])
+
+
+def _online_statements(cursor: Any, statement: str) -> List[str]:
+    """
+    Rewrite a statement from migra to avoid blocking writes for long.
+
+    Indexes are built & dropped concurrently, so writes carry on while they
+    are, & foreign key & check constraints are added without checking
+    existing rows, which are then validated without blocking writes.
+    Partitioned tables can't do either, so changes to them are kept as is.
+    """
+    create_index = _CREATE_INDEX.match(statement)
+    drop_index = _DROP_INDEX.match(statement)
+    add_constraint = _ADD_CONSTRAINT.match(statement)
+
+    if create_index and not _is_partitioned(cursor, create_index[3]):
+        return [_CREATE_INDEX.sub(
+            lambda match: f'CREATE {match[1] or ""}INDEX CONCURRENTLY '
+                          f'{match[2]} ON {match[3]}',
+            statement, count=1)]
+    if drop_index and not _is_partitioned(cursor, drop_index[1]):
+        return [f'DROP INDEX CONCURRENTLY IF EXISTS {drop_index[1]};']
+    if add_constraint \
+            and not re.search(r'\bnot\s+valid\b', add_constraint[3], re.I) \
+            and not _is_partitioned(cursor, add_constraint[1]):
+        table, name, definition = add_constraint.groups()
+        return [f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+                f'{definition} NOT VALID;',
+                f'ALTER TABLE {table} VALIDATE CONSTRAINT {name};']
+
+    return [statement]
+
+
+def _run_with_retries(
+    cursor: Any,
+    statement: str,
+    options: OnlineOptions,
+    log: bool,
+) -> int:
+    """
+    Run a statement, retrying while locks aren't available in time.
+
+    A concurrent index build that fails leaves an invalid index behind,
+    which is dropped, with retries of its own, before building it again.
+    """
+    concurrent_index = _CONCURRENT_INDEX.match(statement)
+    attempt = 1
+
+    while True:
+        # building an index concurrently doesn't block writes, however
+        # long; set each time, as dropping a failed build sets it too
+        cursor.execute(
+            'SET statement_timeout = %s;',
+            ('0' if concurrent_index else options.statement_timeout,))
+
+        try:
+            cursor.execute(statement)
+            return attempt
+        except (LockNotAvailable, DeadlockDetected):
+            if attempt > options.retries:
+                raise
+
+            if concurrent_index:
+                index, schema = concurrent_index.groups()
+                _run_with_retries(
+                    cursor,
+                    'DROP INDEX CONCURRENTLY IF EXISTS '
+                    f'{f"{schema}." if schema else ""}{index};',
+                    options,
+                    log)
+
+            wait = options.backoff * 2 ** (attempt - 1)
+
+            if log:
+                print(f'  lock not available, retrying in {wait:.1f}s '
+                      f'({attempt}/{options.retries})')
+
+            time.sleep(wait)
+            attempt += 1
+
+
+def _apply_online(
+    dsn: str,
+    statements: List[str],
+    options: OnlineOptions,
+    log: bool,
+) -> None:
+    """
+    Apply statements from migra one at a time, without long write locks.
+
+    Each statement is rewritten to avoid blocking writes where it can, see
+    `_online_statements`, & run in a transaction of its own, as concurrent
+    index builds must be. Every statement gives up waiting for a lock after
+    `lock_timeout` so writes queued behind it aren't held up, then is tried
+    again after a backoff. If a statement fails, those before it stay
+    applied, & syncing again picks up from the rest.
+    """
+    connection = _resilient_connect(dsn)
+    connection.set_session(autocommit=True)
+    started = time.perf_counter()
+
+    with connection.cursor() as cursor:
+        cursor.execute('SET lock_timeout = %s;', (options.lock_timeout,))
+
+        for statement in statements:
+            for online_statement in _online_statements(cursor, statement):
+                statement_started = time.perf_counter()
+                attempts = _run_with_retries(
+                    cursor, online_statement, options, log)
+
+                if log:
+                    print(f'{time.perf_counter() - statement_started:9.3f}s '
+                          f'{attempts} attempt(s): '
+                          f'{" ".join(online_statement.split())[:120]}')
+
+    connection.close()
+
+    if log:
+        print(f'{time.perf_counter() - started:9.3f}s total')
+
+
 def sync(args: List[str], config: Config = Config()) -> None:
     """
     Compare live database to application schema & apply changes to database.
@@ -205,17 +730,41 @@ def sync(args: List[str], config: Config = Config()) -> None:
     Uses running database specified for application via
     `DB_[USER|PASS|HOST|NAME]` environment variables & compares to application
     schema defined at `./src/models/**/*.sql`.
+
+    The diff is skipped if the database was last synced to a schema with the
+    same fingerprint, a hash of those files, unless given `force`, e.g. to
+    catch changes made to the database by hand.
+
+    An unpartitioned Transaction table is partitioned, & Transaction ids
+    are filled into their lookup table, but monthly partitions are only
+    created by `partitions`.
+
+    Given `online`, changes are applied without blocking writes for long,
+    see `_apply_online`, with options given as `name=value` arguments, see
+    OnlineOptions, e.g. `sync online lock_timeout=1s retries=20`. An
+    unpartitioned Transaction table can't be partitioned online.
     """
     # define if prompts are needed or not
     no_prompt = False
     # define if output should be printed
     log = True
+    # define if changes should be applied online
+    online = 'online' in args
+    online_statements: List[str] = []
 
     if 'noprompt' in args:
         no_prompt = True
     if 'silent' in args:
         log = False
 
+    fingerprint = _schema_fingerprint()
+
+    if 'force' not in args and \
+            _synced_fingerprint(config.url) == fingerprint:
+        if log:
+            print('Already synced, schema fingerprint unchanged.')
+        return
+
     # create temp database for app schema
     with _temp_db(config) as temp_db_url:
         if log:
@@ -228,10 +777,16 @@ def sync(args: List[str], config: Config = Config()) -> None:
             # load target schema to temp db
             _load_from_app(target_schema_session)
 
+            # only applied along with the diff, so rolled back if it isn't
+            set_aside = _set_aside_unpartitioned(
+                from_schema_session.connection().connection.cursor(),
+                online)
+
             # diff target db & current db
             migration = Migration(
                 from_schema_session,
-                target_schema_session)
+                target_schema_session,
+                exclude_schema=PARTITIONS_SCHEMA)
             migration.set_safety(False)
             migration.add_all_changes()
 
@@ -241,29 +796,45 @@ def sync(args: List[str], config: Config = Config()) -> None:
                     print('\nTHE FOLLOWING CHANGES ARE PENDING:', end='\n\n')
                     print(migration.sql)
 
-                if no_prompt:
+                if not no_prompt and not _prompt('Apply these changes?'):
                     if log:
-                        print('Applying...')
+                        print('Not applying.')
+                    from_schema_session.rollback()
+                    return
 
+                if log:
+                    print('Applying...')
+
+                if online:
+                    # applied once these sessions are closed, as their open
+                    # transactions would hold up building indexes
+                    # concurrently
+                    online_statements = list(migration.statements)
+                else:
                     migration.apply()
 
                     if log:
                         print('Changes applied.')
-                else:
-                    if _prompt('Apply these changes?'):
-                        if log:
-                            print('Applying...')
-                        migration.apply()
-                        if log:
-                            print('Changes applied.')
-                    else:
-                        if log:
-                            print('Not applying.')
 
             else:
                 if log:
                     print('Already synced.')
 
+    if online_statements:
+        _apply_online(config.url,
+                      online_statements,
+                      OnlineOptions.from_args(args),
+                      log)
+
+        if log:
+            print('Changes applied.')
+
+    if set_aside:
+        _attach_history(config.url)
+
+    _fill_transaction_ids(config.url)
+    _save_fingerprint(config.url, fingerprint)
+
 
 def pending(_: List[str], config: Config = Config()) -> None:
     """
@@ -289,7 +860,8 @@ def pending(_: List[str], config: Config = Config()) -> None:
             # get a diff
             migration = Migration(
                 from_schema_session,
-                target_schema_session)
+                target_schema_session,
+                exclude_schema=PARTITIONS_SCHEMA)
             migration.set_safety(False)
             migration.add_all_changes()
 
@@ -308,10 +880,285 @@ def pending(_: List[str], config: Config = Config()) -> None:
             print('Changes written to ./migrations/pending.sql.')
 
 
+def template(args: List[str], config: Config = Config()) -> None:
+    """
+    Build application schema into a template database.
+
+    Replaces `<DB_NAME>_template` with a database synced to the app schema
+    defined at `./src/models/**/*.sql`, then closes every connection to it,
+    so other databases can be copied from it with `CREATE DATABASE ...
+    TEMPLATE`, e.g. one per test worker, much faster than syncing each.
+    """
+    log = 'silent' not in args
+    template_config = Config(**{  # type: ignore
+        **config.__dict__,
+        'name': _template_name(config),
+    })
+
+    with _server_cursor(config) as cursor:
+        _replace_db(cursor, template_config.name)
+
+    sync(['noprompt', *args], template_config)
+
+    with _server_cursor(config) as cursor:
+        # sessions used to sync stay pooled & would block copying
+        cursor.execute(_kill_query(template_config.name))
+
+    if log:
+        print(f'Template built at {template_config.url}')
+
+
+@dataclass
+class PartitionOptions(Options):
+    """Months of Transaction partitions created by `partitions`."""
+
+    # months after the current one to create partitions for
+    ahead: int = PARTITIONS_AHEAD
+    # first month to create partitions for, as YYYY-MM, if before this one
+    since: str = ''
+
+
+def partitions(args: List[str], config: Config = Config()) -> None:
+    """
+    Create monthly Transaction partitions ahead of time.
+
+    Creates a partition for every month from this one, or `since=YYYY-MM`,
+    to `ahead=` months from now that isn't covered yet, moving any
+    Transactions for it out of the default partition. Run daily, e.g. from
+    cron, so Transactions arrive to partitions of their own; `sync` leaves
+    them to this, so it only ever changes the schema.
+    """
+    options = PartitionOptions.from_args(args)
+    log = 'silent' not in args
+    since = datetime.strptime(options.since, '%Y-%m').replace(
+        tzinfo=timezone.utc) if options.since else datetime.now(timezone.utc)
+
+    created = _ensure_partitions(config.url, since, options.ahead)
+
+    if log:
+        if created:
+            print('Created partitions for '
+                  f'{", ".join(f"{month:%Y-%m}" for month in created)}.')
+        else:
+            print('Partitions already created.')
+
+
+@dataclass
+class GenerateOptions(Options):
+    """Amounts & shape of the data loaded by `generate`."""
+
+    users: int = 1000
+    # total across every User
+    transactions: int = 100_000
+    # Transactions are spread over this many years up to now
+    years: float = 3
+    workers: int = os.cpu_count() or 1
+    # Transactions loaded per chunk, each chunk in a transaction of its own
+    chunk: int = 50_000
+    # same seed, same data
+    seed: int = 0
+    # handles are the prefix followed by a number, from 1
+    prefix: str = 'generated_'
+    password: str = 'password'
+
+
+# payees shared by every User, the first few far more often than the rest
+_PAYEES = 5000
+_ACCOUNTS_PER_USER = ([1, 2, 3, 4], [0.3, 0.4, 0.2, 0.1])
+# most purchases come from a User's main Account
+_ACCOUNT_USE = [0.6, 0.25, 0.1, 0.05]
+_INCOME_SHARE = 0.07
+_USES_ENVELOPES = 0.7
+_SPENT_FROM_ENVELOPE = 0.6
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def _skewed(rng: random.Random, items: List[Any], power: float) -> Any:
+    """Pick an item, favouring the first ones more the higher the power."""
+    return items[int(len(items) * rng.random() ** power)]
+
+
+def _transaction_counts(options: GenerateOptions) -> List[int]:
+    """
+    Split Transactions between Users, heavy tailed.
+
+    Counts follow a log-normal distribution: most Users have a modest
+    number of Transactions, a few have many times the median.
+    """
+    rng = random.Random(options.seed)
+    weights = [rng.lognormvariate(0, 1.2) for _ in range(options.users)]
+    total = sum(weights)
+    counts = [int(options.transactions * weight / total)
+              for weight in weights]
+
+    for user in rng.sample(range(options.users),
+                           options.transactions - sum(counts)):
+        counts[user] += 1
+
+    return counts
+
+
+def _generate_chunk(job: Tuple[str, GenerateOptions, int, int, List[int],
+                               str, float]) -> int:
+    """
+    Generate & COPY the Users in a chunk, with everything they own.
+
+    Every chunk gets a random generator seeded from the chunk, so the same
+    options generate the same data however chunks are spread over workers.
+    """
+    dsn, options, index, first_user, counts, password_hash, now = job
+    rng = random.Random(f'{options.seed}:{index}')
+    span = options.years * 365.25 * 24 * 60 * 60
+    tables: Dict[str, io.StringIO] = {
+        'hoops_user(id, handle, full_name, preferred_name, password)':
+            io.StringIO(),
+        'account(id, user_id, name)': io.StringIO(),
+        'envelope(id, user_id, name, total_funds)': io.StringIO(),
+        'transaction(amount, description, payee, timestamp, account_id, '
+        'spent_from)': io.StringIO(),
+    }
+    users, accounts_out, envelopes_out, transactions_out = tables.values()
+
+    for number, count in enumerate(counts, first_user):
+        user_id = _uuid(rng)
+        users.write(f'{user_id}\t{options.prefix}{number}\t'
+                    f'Generated User {number}\tUser {number}\t'
+                    f'{password_hash}\n')
+
+        accounts = [_uuid(rng) for _ in range(
+            rng.choices(*_ACCOUNTS_PER_USER)[0])]
+        for n, account_id in enumerate(accounts, 1):
+            accounts_out.write(f'{account_id}\t{user_id}\taccount {n}\n')
+
+        envelopes = [_uuid(rng) for _ in range(rng.randint(3, 12))] \
+            if rng.random() < _USES_ENVELOPES else []
+        for n, envelope_id in enumerate(envelopes, 1):
+            envelopes_out.write(f'{envelope_id}\t{user_id}\tenvelope {n}\t'
+                                f'{rng.randint(0, 500)}.00\n')
+
+        # every User keeps going back to a handful of payees
+        regulars = [f'Payee {int(_PAYEES * rng.random() ** 3)}'
+                    for _ in range(rng.randint(5, 20))]
+        employer = f'Employer {rng.randrange(_PAYEES)}'
+        account_use = _ACCOUNT_USE[:len(accounts)]
+
+        for _ in range(count):
+            timestamp = datetime.fromtimestamp(
+                now - rng.random() * span, timezone.utc).isoformat()
+            account_id = rng.choices(accounts, account_use)[0]
+            spent_from = '\\N'
+
+            if rng.random() < _INCOME_SHARE:
+                amount = f'{rng.uniform(800, 4000):.2f}'
+                payee = employer
+            else:
+                amount = f'-{min(rng.lognormvariate(3, 1), 99999):.2f}'
+                payee = _skewed(rng, regulars, 2) if rng.random() < 0.8 \
+                    else f'Payee {rng.randrange(_PAYEES)}'
+
+                if envelopes and rng.random() < _SPENT_FROM_ENVELOPE:
+                    spent_from = str(_skewed(rng, envelopes, 2))
+
+            transactions_out.write(
+                f'{amount}\t{payee}\t{payee}\t{timestamp}\t'
+                f'{account_id}\t{spent_from}\n')
+
+    connection = _resilient_connect(dsn)
+
+    with connection, connection.cursor() as cursor:
+        for table, rows in tables.items():
+            rows.seek(0)
+            cursor.copy_expert(f'COPY {table} FROM STDIN', rows)
+
+    connection.close()
+
+    return sum(counts)
+
+
+def _chunks(
+    counts: List[int],
+    size: int,
+) -> Generator[Tuple[int, List[int]], Any, Any]:
+    """Split Users into chunks of about `size` Transactions each."""
+    first = 0
+    total = 0
+
+    for user, count in enumerate(counts):
+        total += count
+
+        if total >= size:
+            yield first + 1, counts[first:user + 1]
+            first = user + 1
+            total = 0
+
+    if first < len(counts):
+        yield first + 1, counts[first:]
+
+
+def generate(args: List[str], config: Config = Config()) -> None:
+    """
+    Load synthetic data into the database, as fast as possible.
+
+    Options are given as `name=value` arguments, see GenerateOptions, e.g.
+    `generate users=1000000 transactions=10000000 workers=8`. Users are
+    split into chunks that are generated & loaded with COPY by parallel
+    worker processes, each chunk in a single transaction.
+    """
+    options = GenerateOptions.from_args(args)
+    log = 'silent' not in args
+
+    if 'noprompt' not in args and not _prompt(
+            f'Add {options.users} users & {options.transactions} '
+            f'transactions to {config.url}?'):
+        return
+
+    connection = _resilient_connect(config.url)
+    with connection, connection.cursor() as cursor:
+        # hashing is slow by design, so every User shares one hash
+        cursor.execute("SELECT crypt(%s, gen_salt('bf'));",
+                       (options.password,))
+        password_hash = cursor.fetchone()[0]
+    connection.close()
+
+    # Transactions go to their month's partition, not the default one
+    first = datetime.now(timezone.utc) - timedelta(days=options.years * 365.25)
+    partitions(['silent', f'since={first:%Y-%m}'], config)
+
+    started = time.perf_counter()
+    jobs = [(config.url, options, index, first_user, counts,
+             password_hash, time.time())
+            for index, (first_user, counts) in enumerate(
+                _chunks(_transaction_counts(options), options.chunk))]
+    loaded = 0
+
+    with Pool(options.workers) as pool:
+        for count in pool.imap_unordered(_generate_chunk, jobs):
+            loaded += count
+
+            if log:
+                print(f'{loaded}/{options.transactions} transactions '
+                      f'loaded ({time.perf_counter() - started:.1f}s)')
+
+    connection = _resilient_connect(config.url)
+    connection.set_session(autocommit=True)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE;')
+    connection.close()
+
+    if log:
+        print(f'Done in {time.perf_counter() - started:.1f}s.')
+
+
 if __name__ == '__main__':
     tasks = {
         'sync': sync,
         'pending': pending,
+        'generate': generate,
+        'template': template,
+        'partitions': partitions,
     }
 
     print(f'task: { sys.argv[1] }')
@@ -1,40 +1,63 @@
 """API server."""
 
-from typing import Awaitable, Callable, Optional
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
 
 from fastapi import FastAPI, status as http_status, Request, Response
 from fastapi.responses import JSONResponse
 
+from .cache import (
+    create_cache_backend,
+    create_cache_middleware,
+    ResponseCache,
+)
+from .compression import CompressionMiddleware
 from .config import create_default_config, Config
-from .database import create_client, NoResultFound
+from .database import create_client, Client, NoResultFound
+from .events import ChangeBroker
+from .idempotency import create_idempotency_middleware, remove_expired_keys
+from .metrics import Metrics, MetricsMiddleware
+from .models import forget_flights
+from .query_debug import QueryDebugMiddleware
+from .responses import FastJSONResponse
+from .security import user_id_from_request
+from .slow_queries import SlowQueryLog
+from .sync import remove_old_deleted_records
 from .routers import (
     status,
     create_account,
+    create_admin,
     create_balance,
+    create_batch,
     create_envelope,
+    create_events,
+    create_metrics,
+    create_sync,
     create_token,
     create_transaction,
     create_user,
 )
+from .timing import ServerTimingMiddleware
+from .tracing import (
+    configure_tracing,
+    create_span_exporter,
+    traced,
+    TracingMiddleware,
+)
 
 
-def create_app(config: Optional[Config] = None) -> FastAPI:
-    """Application factory, create new server with given configuration."""
-    if config is None:
-        config = create_default_config()
-
-    database = create_client(config.database)
-    app = FastAPI()
-
-    @app.on_event("startup")
-    async def startup() -> None:
-        await database.connect()
-
-    @app.on_event("shutdown")
-    async def shutdown() -> None:
-        await database.disconnect()
+def _add_middleware(
+    app: FastAPI,
+    config: Config,
+    database: Client,
+    cache: Optional[ResponseCache],
+    metrics: Metrics,
+) -> None:
+    """Add every middleware to the given app, innermost first."""
+    jwt_key = config.jwt_key
 
     @app.middleware("http")
+    @traced("middleware post_must_be_json")
     async def post_must_be_json(
         req: Request,
         call_next: Callable[[Request], Awaitable[Response]]
@@ -50,6 +73,106 @@ def create_app(config: Optional[Config] = None) -> FastAPI:
 
         return await call_next(req)
 
+    @app.middleware("http")
+    @traced("middleware forget_flights")
+    async def writes_end_shared_reads(
+        req: Request,
+        call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        if req.method == "GET":
+            return await call_next(req)
+
+        # reads after a User's write mustn't join one from before it
+        try:
+            return await call_next(req)
+        finally:
+            user_id = user_id_from_request(req, jwt_key)
+            if user_id is not None:
+                forget_flights(user_id)
+
+    app.middleware("http")(traced("middleware idempotency")(
+        create_idempotency_middleware(database,
+                                      jwt_key,
+                                      config.idempotency_lease)))
+
+    if cache is not None:
+        app.middleware("http")(traced("middleware cache")(
+            create_cache_middleware(cache, database, jwt_key)))
+
+    # outside every middleware sending a body of its own, e.g. a cached
+    # response, so it compresses all of them; the middleware added after it
+    # only adds headers or times requests, so it needn't see compressed
+    # bodies or be compressed itself
+    app.add_middleware(CompressionMiddleware,
+                       minimum_size=config.compression_minimum_size)
+    # middleware is created again whenever the stack is rebuilt, so query
+    # observers are added here, once
+    if config.server_timing:
+        database.add_query_observer(ServerTimingMiddleware.observe_query)
+        app.add_middleware(ServerTimingMiddleware)
+    if config.query_debug:
+        database.add_query_observer(QueryDebugMiddleware.observe_query)
+        app.add_middleware(QueryDebugMiddleware,
+                           repeat_threshold=config.query_repeat_threshold)
+    if config.trace_exporter is not None:
+        database.add_query_observer(TracingMiddleware.observe_query)
+        app.add_middleware(TracingMiddleware)
+    # outermost, so requests are timed through every other middleware
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+
+def create_app(config: Optional[Config] = None) -> FastAPI:
+    """Application factory, create new server with given configuration."""
+    if config is None:
+        config = create_default_config()
+
+    if config.trace_exporter is not None:
+        configure_tracing(create_span_exporter(config.trace_exporter),
+                          config.trace_sample_rate)
+
+    database = create_client(config.database, config.database_pool_size)
+    broker = ChangeBroker(config.database)
+    cache = ResponseCache(create_cache_backend(config.cache_url),
+                          config.cache_ttls) \
+        if config.cache_url else None
+    metrics = Metrics(database, cache)
+    slow_queries = SlowQueryLog(database,
+                                config.database,
+                                config.slow_query_threshold,
+                                config.slow_query_explain_rate,
+                                config.slow_query_log_size) \
+        if config.slow_query_threshold is not None else None
+    idempotency_ttl = config.idempotency_ttl
+    sync_retention = config.sync_retention
+    app = FastAPI(default_response_class=FastJSONResponse)
+    # tasks run in the background for as long as the app is
+    tasks: List["asyncio.Task[Any]"] = []
+
+    @app.on_event("startup")
+    async def startup() -> None:
+        await database.connect()
+        await broker.start()
+        if cache is not None:
+            await cache.backend.connect()
+        tasks.append(asyncio.create_task(
+            remove_expired_keys(database, idempotency_ttl)))
+        tasks.append(asyncio.create_task(
+            remove_old_deleted_records(database, sync_retention)))
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:
+        for task in tasks:
+            task.cancel()
+        tasks.clear()
+        if cache is not None:
+            await cache.backend.disconnect()
+        if slow_queries is not None:
+            await slow_queries.stop()
+        await broker.stop()
+        await database.disconnect()
+
+    _add_middleware(app, config, database, cache, metrics)
+
     @app.exception_handler(NoResultFound)
     async def no_result_found_sends_404(
         req: Request,
@@ -75,5 +198,10 @@ def create_app(config: Optional[Config] = None) -> FastAPI:
     app.include_router(create_transaction(config, database))
     app.include_router(create_balance(config, database))
     app.include_router(create_envelope(config, database))
+    app.include_router(create_batch(config, database))
+    app.include_router(create_events(config, database, broker))
+    app.include_router(create_sync(config, database))
+    app.include_router(create_metrics(config, metrics))
+    app.include_router(create_admin(config, slow_queries))
 
     return app
@@ -0,0 +1,477 @@
+"""Cache responses to repeated GET requests from the same User."""
+
+import asyncio
+from collections import OrderedDict
+from datetime import timedelta
+import json
+import logging
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
+from urllib.parse import parse_qsl, urlencode, urlparse
+from uuid import UUID
+
+from fastapi import Request, Response
+from starlette.background import BackgroundTask
+
+from src.database import Client
+from src.routes import route_template
+from src.security import user_id_from_request
+
+logger = logging.getLogger(__name__)
+
+Middleware = Callable[
+    [Request, Callable[[Request], Awaitable[Response]]],
+    Awaitable[Response]]
+
+# header names & values, as Starlette keeps them
+RawHeaders = List[Tuple[bytes, bytes]]
+
+# set on cacheable responses, either "hit" or "miss"
+CACHE_HEADER = "x-cache"
+
+
+class CacheError(Exception):
+    """Raised when a cache backend can't complete a command."""
+
+
+class CacheBackend(Protocol):
+    """Storage for cached responses & the counters used to expire them."""
+
+    async def connect(self) -> None:
+        """Open any connections the backend needs."""
+
+    async def disconnect(self) -> None:
+        """Close any connections the backend opened."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value stored at key, or None if there isn't one."""
+
+    async def set(self, key: str, value: bytes, ttl: timedelta) -> None:
+        """Store value at key until ttl has passed."""
+
+    async def counter(self, key: str) -> int:
+        """Get the counter stored at key, starting at 0."""
+
+    async def increment(self, key: str) -> int:
+        """Add 1 to the counter stored at key & return the new count."""
+
+
+class MemoryCache:
+    """
+    Cache backend storing values in this process.
+
+    Values are evicted least recently used first once there are more than
+    max_entries of them. Counters are never evicted, since forgetting one
+    could bring back values it expired.
+    """
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self._max_entries = max_entries
+        self._values: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def connect(self) -> None:
+        """Nothing to connect to."""
+
+    async def disconnect(self) -> None:
+        """Forget everything."""
+        self._values.clear()
+        self._counters.clear()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value stored at key, or None if there isn't one."""
+        entry = self._values.get(key)
+
+        if entry is None:
+            return None
+
+        expires, value = entry
+
+        if expires <= time.monotonic():
+            del self._values[key]
+            return None
+
+        self._values.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: timedelta) -> None:
+        """Store value at key until ttl has passed."""
+        self._values[key] = (time.monotonic() + ttl.total_seconds(), value)
+        self._values.move_to_end(key)
+
+        while len(self._values) > self._max_entries:
+            self._values.popitem(last=False)
+
+    async def counter(self, key: str) -> int:
+        """Get the counter stored at key, starting at 0."""
+        return self._counters.get(key, 0)
+
+    async def increment(self, key: str) -> int:
+        """Add 1 to the counter stored at key & return the new count."""
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+
+RespValue = Union[None, int, bytes, List[Any]]
+
+
+class RedisCache:
+    """
+    Cache backend storing values in a Redis compatible server.
+
+    Speaks just enough of the Redis protocol (RESP) for caching, over one
+    connection shared by every request; commands are sent one at a time.
+    The connection is opened again on the next command after it's lost.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        database: int = 0,
+        password: Optional[str] = None,
+        timeout: float = 1,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._database = database
+        self._password = password
+        self._timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock_instance: Optional[asyncio.Lock] = None
+
+    @property
+    def _lock(self) -> asyncio.Lock:
+        # created on first use, so it belongs to the loop serving requests
+        if self._lock_instance is None:
+            self._lock_instance = asyncio.Lock()
+
+        return self._lock_instance
+
+    async def connect(self) -> None:
+        """Open connection to the server, if it's available."""
+        async with self._lock:
+            try:
+                await self._connect()
+            except (OSError, asyncio.TimeoutError, CacheError) as exc:
+                await self._disconnect()
+                logger.warning("Cache server unavailable: %s", exc)
+
+    async def disconnect(self) -> None:
+        """Close connection to the server."""
+        async with self._lock:
+            await self._disconnect()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port), self._timeout)
+
+        if self._password is not None:
+            await self._send(b"AUTH", self._password.encode())
+        if self._database:
+            await self._send(b"SELECT", str(self._database).encode())
+
+    async def _disconnect(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _send(self, *args: bytes) -> RespValue:
+        """Send a command & read its reply, connection must be open."""
+        assert self._reader is not None and self._writer is not None
+
+        command = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            command.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+
+        self._writer.write(b"".join(command))
+        await self._writer.drain()
+
+        return await asyncio.wait_for(self._read(), self._timeout)
+
+    async def _read(self) -> RespValue:
+        assert self._reader is not None
+
+        line = await self._reader.readline()
+
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by cache server.")
+
+        kind, rest = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise CacheError(rest.decode(errors="replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [await self._read() for _ in range(length)]
+
+        raise CacheError(f"Unexpected reply from cache server: {line!r}")
+
+    async def _command(self, *args: bytes) -> RespValue:
+        """Send a command, opening the connection first if needed."""
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+
+                return await self._send(*args)
+            except (OSError, EOFError, asyncio.TimeoutError) as exc:
+                # the reply may still arrive later, so never reuse the
+                # connection after a failed command
+                await self._disconnect()
+                raise CacheError(f"Cache server unavailable: {exc}") from exc
+            except CacheError:
+                raise
+            except BaseException:
+                await self._disconnect()
+                raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value stored at key, or None if there isn't one."""
+        value = await self._command(b"GET", key.encode())
+
+        return value if isinstance(value, bytes) else None
+
+    async def set(self, key: str, value: bytes, ttl: timedelta) -> None:
+        """Store value at key until ttl has passed."""
+        milliseconds = max(1, int(ttl.total_seconds() * 1000))
+
+        await self._command(
+            b"SET", key.encode(), value, b"PX", str(milliseconds).encode())
+
+    async def counter(self, key: str) -> int:
+        """Get the counter stored at key, starting at 0."""
+        value = await self._command(b"GET", key.encode())
+
+        return int(value) if isinstance(value, bytes) else 0
+
+    async def increment(self, key: str) -> int:
+        """Add 1 to the counter stored at key & return the new count."""
+        value = await self._command(b"INCR", key.encode())
+
+        return value if isinstance(value, int) else 0
+
+
+def create_cache_backend(url: str) -> CacheBackend:
+    """
+    Create a cache backend from the given url.
+
+    Use `memory` to cache in each worker process, or
+    `redis://[:password@]host[:port][/database]` to share a cache between
+    workers.
+    """
+    if url == "memory":
+        return MemoryCache()
+
+    parsed = urlparse(url)
+
+    if parsed.scheme == "redis":
+        return RedisCache(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            database=int(parsed.path.lstrip("/") or 0),
+            password=parsed.password)
+
+    raise ValueError(f"Unsupported cache url: {url}")
+
+
+class ResponseCache:
+    """
+    Responses to GET requests, cached per User for the given routes.
+
+    Each User's cached responses are stored under a generation number;
+    any write by the User starts a new generation, so everything cached
+    for them before it is never read again & is left to expire.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttls: Dict[str, timedelta],
+    ) -> None:
+        self.backend = backend
+        # route path templates to how long their responses are cached
+        self.ttls = ttls
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _generation_key(user_id: UUID) -> str:
+        return f"generation:{user_id}"
+
+    async def key(
+        self,
+        user_id: UUID,
+        path: str,
+        query: bytes,
+        accept: str = "",
+    ) -> str:
+        """Get the key a User's response to path & query is cached at."""
+        generation = await self.backend.counter(self._generation_key(user_id))
+        # the same parameters in any order get the same response
+        normalized = urlencode(sorted(
+            parse_qsl(query.decode("latin-1"), keep_blank_values=True)))
+        # the same request may be answered in a different format
+        variant = f"#{accept}" if accept else ""
+
+        return f"response:{user_id}:{generation}:{path}?{normalized}{variant}"
+
+    async def get(self, key: str) -> Optional[Tuple[RawHeaders, bytes]]:
+        """Get the headers & body cached at key."""
+        value = await self.backend.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        headers, _, body = value.partition(b"\n")
+        return [(name.encode("latin-1"), content.encode("latin-1"))
+                for name, content in json.loads(headers)], body
+
+    async def set(
+        self,
+        key: str,
+        headers: RawHeaders,
+        body: bytes,
+        ttl: timedelta,
+    ) -> None:
+        """
+        Cache a response's headers & body at key.
+
+        Headers can't hold a line break, so they're kept on one line.
+        """
+        kept = [(name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in _without_length(headers)]
+        await self.backend.set(
+            key, json.dumps(kept).encode("latin-1") + b"\n" + body, ttl)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """Stop using every response cached for the given User."""
+        await self.backend.increment(self._generation_key(user_id))
+
+
+def _without_length(headers: RawHeaders) -> RawHeaders:
+    """Leave out Content-Length, which is set again for each body sent."""
+    return [header for header in headers if header[0] != b"content-length"]
+
+
+def _cached_response(
+    body: bytes,
+    headers: RawHeaders,
+    status: str,
+    background: Optional[BackgroundTask] = None,
+) -> Response:
+    """
+    Send a cacheable response with the given headers, marked hit or miss.
+
+    Headers are sent as they were, repeated ones too, e.g. Vary, so a hit
+    is sent the same headers as the miss it was cached from.
+    """
+    response = Response(body,
+                        headers={CACHE_HEADER: status},
+                        background=background)
+    response.raw_headers.extend(_without_length(headers))
+
+    return response
+
+
+def create_cache_middleware(
+    cache: ResponseCache,
+    database: Client,
+    jwt_key: str,
+) -> Middleware:
+    """
+    Create middleware caching responses to GET requests on cached routes.
+
+    Only successful responses to authenticated requests are cached, each
+    for the TTL given for its route. Every other request from a User
+    expires all of their cached responses, whether it succeeds or not. The
+    cache is skipped entirely if the backend is unavailable.
+    """
+
+    async def cached(
+        req: Request,
+        call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        user_id = user_id_from_request(req, jwt_key)
+
+        if user_id is None:
+            return await call_next(req)
+
+        if req.method != "GET":
+            try:
+                return await call_next(req)
+            finally:
+                try:
+                    await cache.invalidate(user_id)
+                except CacheError as exc:
+                    logger.warning("Cache not invalidated: %s", exc)
+
+        template = route_template(req)
+        ttl = cache.ttls.get(template) if template is not None else None
+
+        # responses read inside a transaction may be rolled back
+        if ttl is None or database.in_transaction:
+            return await call_next(req)
+
+        try:
+            key = await cache.key(user_id,
+                                  req.url.path,
+                                  req.scope["query_string"],
+                                  req.headers.get("accept", ""))
+            saved = await cache.get(key)
+        except CacheError as exc:
+            logger.warning("Cache unavailable: %s", exc)
+            return await call_next(req)
+
+        if saved is not None:
+            headers, body = saved
+            return _cached_response(body, headers, "hit")
+
+        response = await call_next(req)
+
+        if response.status_code != 200:
+            return response
+
+        body = b"".join([chunk async for chunk
+                         in response.body_iterator])  # type: ignore
+
+        try:
+            await cache.set(key, response.raw_headers, body, ttl)
+        except CacheError as exc:
+            logger.warning("Response not cached: %s", exc)
+
+        return _cached_response(body,
+                                response.raw_headers,
+                                "miss",
+                                response.background)
+
+    return cached
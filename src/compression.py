@@ -0,0 +1,210 @@
+"""Compress responses with an encoding negotiated with the client."""
+
+from typing import Callable, Dict, Optional, Tuple
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+Compressor = Tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+
+# streams of events must reach the client as soon as they're sent
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def _gzip(level: int) -> Compressor:
+    # wbits offset by 16 writes a gzip header & trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    return compressor.compress, compressor.flush
+
+
+def _brotli(quality: int) -> Compressor:
+    compressor = brotli.Compressor(quality=quality)
+
+    return compressor.process, compressor.finish
+
+
+def parse_quality_header(header: str) -> Dict[str, float]:
+    """
+    Get the weight given to each value in a header weighted by q values.
+
+    E.g. Accept or Accept-Encoding, with values lowercased. Values without
+    a q parameter weigh 1, & those with an unreadable one weigh 0.
+    """
+    weights: Dict[str, float] = {}
+
+    for part in header.split(","):
+        name, *params = part.split(";")
+        weight = 1.0
+
+        for param in params:
+            key, _, value = param.strip().partition("=")
+
+            if key.lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0
+
+        if name.strip():
+            weights[name.strip().lower()] = weight
+
+    return weights
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with brotli or gzip, as the client prefers.
+
+    Bodies sent whole are only compressed if they're at least minimum_size
+    bytes. Bodies sent in several parts are compressed as each part
+    arrives, so large responses are never buffered whole. Brotli is only
+    offered if a brotli module is installed; when a client weighs both
+    encodings equally, brotli is used as it compresses JSON further.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders: Dict[str, Callable[[], Compressor]] = {}
+
+        if brotli is not None:
+            self.encoders["br"] = lambda: _brotli(brotli_quality)
+        self.encoders["gzip"] = lambda: _gzip(gzip_level)
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """Choose the encoding the client weighs highest, if any."""
+        weights = parse_quality_header(accept_encoding)
+        default = weights.get("*", 0)
+        chosen: Optional[str] = None
+        best = 0.0
+
+        for encoding in self.encoders:
+            weight = weights.get(encoding, default)
+
+            if weight > best:
+                chosen, best = encoding, weight
+
+        return chosen
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Compress the response to an HTTP request, if negotiated."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(
+            Headers(scope=scope).get("accept-encoding", ""))
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _Responder(self, encoding, send).run(scope, receive)
+
+
+class _Responder:
+    """Compress a single response, deciding when its first body arrives."""
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: str,
+        send: Send,
+    ) -> None:
+        self._middleware = middleware
+        self._encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor: Optional[Compressor] = None
+        self._passthrough = False
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        """Run the app, compressing what it sends."""
+        await self._middleware.app(scope, receive, self.send)
+
+    def _should_compress(self, headers: Headers, first: Message) -> bool:
+        if "content-encoding" in headers:
+            return False
+        if headers.get("content-type", "").startswith(UNCOMPRESSED_TYPES):
+            return False
+        minimum_size = self._middleware.minimum_size
+
+        # a body sent whole, or in parts with its length given up front,
+        # can be checked against the threshold
+        if not first.get("more_body", False):
+            return len(first.get("body", b"")) >= minimum_size
+        if "content-length" in headers:
+            return int(headers["content-length"]) >= minimum_size
+
+        return True
+
+    async def send(self, message: Message) -> None:
+        """Hold the response start until the first body part is seen."""
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(raw=list(start["headers"]))
+
+            if not self._should_compress(headers, message):
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._compressor = self._middleware.encoders[self._encoding]()
+            headers["Content-Encoding"] = self._encoding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+
+            if not more_body:
+                compressed = self._compress(body, finish=True)
+                headers["Content-Length"] = str(len(compressed))
+                await self._send({**start, "headers": headers.raw})
+                await self._send({"type": "http.response.body",
+                                  "body": compressed})
+                return
+
+            await self._send({**start, "headers": headers.raw})
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self._compress(body, finish=not more_body),
+            "more_body": more_body,
+        })
+
+    def _compress(self, body: bytes, finish: bool) -> bytes:
+        assert self._compressor is not None
+        compress, flush = self._compressor
+
+        return compress(body) + flush() if finish else compress(body)
@@ -1,8 +1,9 @@
 """Application config."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import timedelta
 import os
-from typing import Optional
+from typing import Dict, Optional
 
 from .database import create_conn_config, ConnectionParameters
 
@@ -25,12 +26,85 @@ def get_app_key() -> str:
     return key
 
 
+def get_slow_query_threshold() -> Optional[timedelta]:
+    """
+    Get slow query threshold from environment.
+
+    Given in milliseconds; an empty value turns the slow query log off.
+    """
+    milliseconds = os.getenv("SLOW_QUERY_MS", "500")
+
+    return timedelta(milliseconds=float(milliseconds)) \
+        if milliseconds else None
+
+
+def get_cache_ttls() -> Dict[str, timedelta]:
+    """
+    Get cached routes from environment.
+
+    Routes are given as a comma separated list of route path templates &
+    the seconds their responses are cached for, e.g.
+    `/transaction=5,/balance/account/{account_id}=10`.
+    """
+    routes = os.getenv("CACHE_ROUTES", "")
+    ttls: Dict[str, timedelta] = {}
+
+    for route in routes.split(","):
+        if not route.strip():
+            continue
+
+        path, _, seconds = route.rpartition("=")
+        ttls[path.strip()] = timedelta(seconds=float(seconds))
+
+    return ttls
+
+
 @dataclass
 class Config:
     """Application configuration object."""
 
     database: ConnectionParameters
     jwt_key: str
+    # most connections held by transactions at once, each worker keeps up
+    # to this many open for them
+    database_pool_size: int = 10
+    # how long responses to requests with an Idempotency-Key are kept
+    idempotency_ttl: timedelta = timedelta(hours=24)
+    # how long a request with an Idempotency-Key can be handled for before
+    # retries take over its key, should be at least the request timeout
+    idempotency_lease: timedelta = timedelta(minutes=1)
+    # how long deleted records are kept for syncing; clients last synced
+    # before then must sync from the start
+    sync_retention: timedelta = timedelta(days=90)
+    # where GET responses are cached, see src.cache.create_cache_backend;
+    # no responses are cached if None
+    cache_url: Optional[str] = None
+    # route path templates to how long their responses are cached for
+    cache_ttls: Dict[str, timedelta] = field(default_factory=dict)
+    # smallest response body, in bytes, worth compressing
+    compression_minimum_size: int = 1024
+    # report time spent on queries to clients in Server-Timing headers
+    server_timing: bool = True
+    # count statements per request in X-Query-Count headers & flag
+    # statements of the same shape repeated at least
+    # `query_repeat_threshold` times; for development & tests only
+    query_debug: bool = False
+    query_repeat_threshold: int = 3
+    # statements taking longer are logged, no statements are if None
+    slow_query_threshold: Optional[timedelta] = timedelta(milliseconds=500)
+    # share of slow reads explained again to capture their plan; none are
+    # by default, as that runs them again while the database is slow
+    slow_query_explain_rate: float = 0
+    # most recent slow statements kept
+    slow_query_log_size: int = 100
+    # where spans are exported, see src.tracing.create_span_exporter;
+    # nothing is traced if None
+    trace_exporter: Optional[str] = None
+    # share of requests traced
+    trace_sample_rate: float = 1.0
+    # key required by `/admin` & `/metrics` routes, given in the
+    # X-Admin-Key header; the routes are disabled if None
+    admin_key: Optional[str] = None
 
 
 def create_default_config() -> Config:
@@ -41,4 +115,25 @@ def create_default_config() -> Config:
             host=os.getenv('DB_HOST', 'localhost'),
             port=int(os.getenv('DB_PORT', '5432')),
             database=os.getenv('DB_NAME', 'dev')),
-        jwt_key=get_app_key())
+        jwt_key=get_app_key(),
+        database_pool_size=int(os.getenv('DB_POOL_SIZE', '10')),
+        idempotency_ttl=timedelta(
+            hours=float(os.getenv('IDEMPOTENCY_TTL_HOURS', '24'))),
+        idempotency_lease=timedelta(
+            seconds=float(os.getenv('IDEMPOTENCY_LEASE_SECONDS', '60'))),
+        sync_retention=timedelta(
+            days=float(os.getenv('SYNC_RETENTION_DAYS', '90'))),
+        cache_url=os.getenv('CACHE_URL'),
+        cache_ttls=get_cache_ttls(),
+        compression_minimum_size=int(
+            os.getenv('COMPRESSION_MINIMUM_SIZE', '1024')),
+        server_timing=os.getenv('SERVER_TIMING', 'true').lower() == 'true',
+        query_debug=os.getenv('QUERY_DEBUG', 'false').lower() == 'true',
+        query_repeat_threshold=int(os.getenv('QUERY_REPEAT_THRESHOLD', '3')),
+        slow_query_threshold=get_slow_query_threshold(),
+        slow_query_explain_rate=float(
+            os.getenv('SLOW_QUERY_EXPLAIN_RATE', '0')),
+        slow_query_log_size=int(os.getenv('SLOW_QUERY_LOG_SIZE', '100')),
+        trace_exporter=os.getenv('TRACE_EXPORTER') or None,
+        trace_sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '1')),
+        admin_key=os.getenv('ADMIN_KEY') or None)
@@ -1,8 +1,304 @@
 """Database methods."""
 
-from db_wrapper import AsyncClient as Client, ConnectionParameters
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from itertools import count
+import sys
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from db_wrapper import AsyncClient, ConnectionParameters
+from db_wrapper.model import sql, RealDictRow
 # import NoResultFound to re-export
 from db_wrapper.model.base import NoResultFound  # pylint: disable=W0611
+from psycopg2 import extensions
+
+Query = Union[str, sql.Composable]
+Params = Optional[Dict[Hashable, Any]]
+# called after every statement with its label, the statement, its
+# parameters, & the seconds it took
+QueryObserver = Callable[[str, Query, Params, float], None]
+
+# connection held by the transaction open in the current context, if any
+_transaction: ContextVar[Optional[AsyncClient]] = \
+    ContextVar("transaction", default=None)
+_savepoints = count()
+# label given to statements executed in the current context, if any
+_label: ContextVar[Optional[str]] = ContextVar("query_label", default=None)
+
+
+@contextmanager
+def query_label(label: str) -> Iterator[None]:
+    """
+    Label every statement executed in context with the given label.
+
+    Needed where statements are executed away from the method asking for
+    them, e.g. in a separate task, so the caller can't be found otherwise.
+    """
+    token = _label.set(label)
+
+    try:
+        yield
+    finally:
+        _label.reset(token)
+
+
+def _caller_label() -> str:
+    """
+    Label a statement with the method that executed it.
+
+    Walks up from the client's own frames to the first method outside this
+    module, e.g. `TransactionReader.many_by_user`, or a plain function's
+    name if no method is found.
+    """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+
+    while frame.f_back is not None \
+            and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+
+    code = frame.f_code
+
+    if code.co_argcount and code.co_varnames[0] == "self":
+        instance = frame.f_locals.get("self")
+        return f"{type(instance).__name__}.{code.co_name}"
+
+    return code.co_name
+
+
+def _raw_connection(client: AsyncClient) -> Any:
+    """
+    Get the aiopg connection a db_wrapper client executes statements on.
+
+    db_wrapper has no public way to open a cursor, & only returns rows as
+    dicts, so this is the one place relying on its private attribute.
+    """
+    return client._connection  # pylint: disable=protected-access
+
+
+class Client(AsyncClient):
+    """
+    Database client, extended to support explicit transactions.
+
+    The client's own connection is shared by every request & runs in
+    autocommit mode, so a transaction is given a dedicated connection for
+    its duration. While a transaction is open, any statement executed in
+    the same context is sent to that connection instead. Connections are
+    kept open for the next transaction once one ends, & at most `pool_size`
+    are held at once; transactions wait for one to be free beyond that.
+
+    Every statement is timed & passed to each of `query_observers`, labelled
+    with the method that executed it. Nothing is labelled while there are
+    no observers.
+    """
+
+    def __init__(
+        self,
+        connection_params: ConnectionParameters,
+        pool_size: int = 10,
+    ) -> None:
+        super().__init__(connection_params)
+        self._connection_params = connection_params
+        self.query_observers: List[QueryObserver] = []
+        # connections currently held by transactions
+        self.open_transactions = 0
+        self._pool_size = pool_size
+        # connections kept open for transactions, but held by none
+        self._idle: List[AsyncClient] = []
+        # created on first use, so it's bound to the running loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def add_query_observer(self, observer: QueryObserver) -> None:
+        """
+        Pass every statement executed to the given observer.
+
+        Adding an observer again does nothing, so each statement is only
+        passed to it once, however many times it was added.
+        """
+        if observer not in self.query_observers:
+            self.query_observers.append(observer)
+
+    def _observe(self, query: Query, params: Params, started: float) -> None:
+        if not self.query_observers:
+            return
+
+        elapsed = perf_counter() - started
+        label = _label.get() or _caller_label()
+
+        for observer in self.query_observers:
+            observer(label, query, params, elapsed)
+
+    async def _acquire(self) -> AsyncClient:
+        """Take an idle connection, or open one, once one is free."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._pool_size)
+
+        await self._slots.acquire()
+
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                # closed by the server since it was last used
+                if not _raw_connection(connection).closed:
+                    return connection
+
+            connection = AsyncClient(self._connection_params)
+            await connection.connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        return connection
+
+    async def _release(self, connection: AsyncClient, reuse: bool) -> None:
+        """Keep the given connection for the next transaction, or close it."""
+        assert self._slots is not None
+
+        try:
+            if reuse:
+                self._idle.append(connection)
+            else:
+                await connection.disconnect()
+        finally:
+            self._slots.release()
+
+    async def disconnect(self) -> None:
+        """Close the client's own connection & every idle one."""
+        await super().disconnect()
+
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.disconnect()
+
+    @property
+    def in_transaction(self) -> bool:
+        """Check if a transaction is open in the current context."""
+        return _transaction.get() is not None
+
+    @asynccontextmanager
+    async def transaction(
+        self,
+        *,
+        isolation: Optional[str] = None,
+    ) -> AsyncIterator[None]:
+        """
+        Run all statements in context in a single transaction.
+
+        Commits on exit & rolls back if an exception is raised. If a
+        transaction is already open, a savepoint is used instead, so the
+        given isolation level, e.g. `REPEATABLE READ`, is only used by the
+        outermost transaction.
+        """
+        current = _transaction.get()
+
+        if current is not None:
+            name = sql.Identifier(f"savepoint_{next(_savepoints)}")
+
+            await current.execute(
+                sql.SQL("SAVEPOINT {name};").format(name=name))
+            try:
+                yield
+            except BaseException:
+                await current.execute(
+                    sql.SQL("ROLLBACK TO SAVEPOINT {name};").format(name=name))
+                raise
+            await current.execute(
+                sql.SQL("RELEASE SAVEPOINT {name};").format(name=name))
+
+            return
+
+        connection = await self._acquire()
+        token = _transaction.set(connection)
+        self.open_transactions += 1
+        # only reused once the transaction is known to have ended
+        ended = False
+
+        try:
+            await connection.execute(
+                "BEGIN;" if isolation is None else sql.SQL(
+                    "BEGIN ISOLATION LEVEL {isolation};").format(
+                        isolation=sql.SQL(isolation)))
+            try:
+                yield
+            except BaseException:
+                await connection.execute("ROLLBACK;")
+                ended = True
+                raise
+            await connection.execute("COMMIT;")
+            ended = True
+        finally:
+            self.open_transactions -= 1
+            _transaction.reset(token)
+            await self._release(connection, ended)
+
+    async def execute(self, query: Query, params: Params = None) -> None:
+        """Execute the given query, discarding any result."""
+        connection = _transaction.get()
+        started = perf_counter()
+
+        try:
+            if connection is not None:
+                await connection.execute(query, params)
+            else:
+                await super().execute(query, params)
+        finally:
+            self._observe(query, params, started)
+
+    async def execute_and_return(
+        self,
+        query: Query,
+        params: Params = None,
+    ) -> List[RealDictRow]:
+        """Execute the given query & return the resulting rows."""
+        connection = _transaction.get()
+        started = perf_counter()
+
+        try:
+            if connection is not None:
+                rows: List[RealDictRow] = \
+                    await connection.execute_and_return(query, params)
+            else:
+                rows = await super().execute_and_return(query, params)
+        finally:
+            self._observe(query, params, started)
+
+        return rows
+
+    async def execute_and_return_tuples(
+        self,
+        query: Query,
+        params: Params = None,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Execute the given query & return the resulting rows as tuples.
+
+        Cheaper than execute_and_return for large results, since no dict is
+        built for each row; values are in the order the query selects them.
+        """
+        client: AsyncClient = _transaction.get() or self
+        started = perf_counter()
+
+        try:
+            async with _raw_connection(client).cursor(
+                    cursor_factory=extensions.cursor) as cursor:
+                await cursor.execute(query, params)
+                rows: List[Tuple[Any, ...]] = await cursor.fetchall()
+        finally:
+            self._observe(query, params, started)
+
+        return rows
 
 
 def create_conn_config(
@@ -22,7 +318,8 @@ def create_conn_config(
 
 
 def create_client(
-    conn_params: ConnectionParameters
+    conn_params: ConnectionParameters,
+    pool_size: int = 10,
 ) -> Client:
     """Create & return a database client."""
-    return Client(conn_params)
+    return Client(conn_params, pool_size)
@@ -0,0 +1,137 @@
+"""Fan change notices out from the database to subscribed clients."""
+
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import logging
+from typing import Any, AsyncIterator, DefaultDict, Optional, Set
+from uuid import UUID
+
+from psycopg2 import connect, Error as DatabaseError
+from psycopg2 import sql
+from pydantic import ValidationError
+
+from src.database import ConnectionParameters
+from src.models import Change, CHANGES_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+ChangeQueue = asyncio.Queue[Change]
+
+
+class ChangeBroker:
+    """
+    Listen for change notices from the database & fan them out to clients.
+
+    Each worker holds one connection LISTENing for notices, then passes each
+    notice on to every queue subscribed to the changed User, so any number
+    of clients can be served without adding database connections.
+    """
+
+    def __init__(
+        self,
+        conn_params: ConnectionParameters,
+        queue_size: int = 16,
+        retry_seconds: float = 5,
+    ) -> None:
+        self._conn_params = conn_params
+        self._queue_size = queue_size
+        self._retry_seconds = retry_seconds
+        self._connection: Optional[Any] = None
+        self._reconnecting: Optional["asyncio.Task[None]"] = None
+        self._subscribers: DefaultDict[UUID, Set[ChangeQueue]] = \
+            defaultdict(set)
+
+    def _connect(self) -> Any:
+        """Open a connection & LISTEN for change notices (blocking)."""
+        connection = connect(host=self._conn_params.host,
+                             port=self._conn_params.port,
+                             user=self._conn_params.user,
+                             password=self._conn_params.password,
+                             dbname=self._conn_params.database)
+        connection.set_session(autocommit=True)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql.SQL("LISTEN {channel};").format(
+                channel=sql.Identifier(CHANGES_CHANNEL)))
+
+        return connection
+
+    async def start(self) -> None:
+        """Connect to the database & start passing on change notices."""
+        loop = asyncio.get_running_loop()
+        connection = await loop.run_in_executor(None, self._connect)
+        self._connection = connection
+        loop.add_reader(connection.fileno(), self._read)
+
+    async def stop(self) -> None:
+        """Stop passing on change notices & close the connection."""
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            self._reconnecting = None
+
+        if self._connection is not None:
+            asyncio.get_running_loop().remove_reader(
+                self._connection.fileno())
+            self._connection.close()
+            self._connection = None
+
+    async def _reconnect(self) -> None:
+        """Keep trying to start listening again after losing connection."""
+        while self._connection is None:
+            await asyncio.sleep(self._retry_seconds)
+
+            try:
+                await self.start()
+            except DatabaseError as err:
+                logger.warning(f"Unable to listen for changes: {err}")
+
+        self._reconnecting = None
+
+    def _read(self) -> None:
+        """Pass on all change notices waiting on the connection."""
+        assert self._connection is not None
+
+        try:
+            self._connection.poll()
+        except DatabaseError as err:
+            logger.warning(f"Lost connection listening for changes: {err}")
+            loop = asyncio.get_running_loop()
+            loop.remove_reader(self._connection.fileno())
+            self._connection = None
+            self._reconnecting = loop.create_task(self._reconnect())
+
+            return
+
+        while self._connection.notifies:
+            self.publish(self._connection.notifies.pop(0).payload)
+
+    def publish(self, payload: str) -> None:
+        """Pass the given change notice on to its User's subscribers."""
+        try:
+            change = Change.parse_raw(payload)
+        except ValidationError:
+            logger.warning(f"Ignoring malformed change notice: {payload}")
+            return
+
+        for queue in self._subscribers.get(change.user_id, ()):
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                # a notice only tells a client to fetch again, so one that
+                # hasn't caught up yet loses nothing by missing more
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: UUID) -> AsyncIterator[ChangeQueue]:
+        """Receive the given User's change notices on a queue in context."""
+        queue: ChangeQueue = asyncio.Queue(self._queue_size)
+        self._subscribers[user_id].add(queue)
+
+        try:
+            yield queue
+        finally:
+            self._subscribers[user_id].discard(queue)
+
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
@@ -0,0 +1,297 @@
+"""Encode rows read from the database in the format a client accepts."""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from uuid import UUID
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+import msgpack
+import pyarrow
+
+from src.compression import parse_quality_header
+from src.responses import dump_json, FastJSONResponse
+from src.tracing import traced_block
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+# in order of preference when a client accepts more than one equally
+MEDIA_TYPES = (JSON, MSGPACK, ARROW)
+
+# Amounts are stored as NUMERIC(11, 2)
+AMOUNT_TYPE = pyarrow.decimal128(11, 2)
+ARROW_TYPES: Dict[type, pyarrow.DataType] = {
+    bool: pyarrow.bool_(),
+    int: pyarrow.int64(),
+    str: pyarrow.string(),
+    UUID: pyarrow.binary(16),
+    datetime: pyarrow.timestamp("us", tz="UTC"),
+    Decimal: AMOUNT_TYPE,
+}
+
+# rows are tuples as read from the database, in the order of the fields of
+# the row dataclass they're sent as
+Row = Tuple[Any, ...]
+Batches = AsyncIterator[Sequence[Row]]
+Column = Sequence[Any]
+Encoder = Callable[[Batches, Type[Any]], AsyncIterator[bytes]]
+
+
+def choose_media_type(accept: Optional[str]) -> str:
+    """
+    Choose the format the client weighs highest in its Accept header.
+
+    JSON is used if the client accepts none of the formats, so clients that
+    don't ask for a format are served as they always have been.
+    """
+    if not accept:
+        return JSON
+
+    weights = parse_quality_header(accept)
+    chosen, best = JSON, 0.0
+
+    for media_type in MEDIA_TYPES:
+        weight = weights.get(
+            media_type,
+            weights.get(media_type.split("/", maxsplit=1)[0] + "/*",
+                        weights.get("*/*", 0)))
+
+        if weight > best:
+            chosen, best = media_type, weight
+
+    return chosen
+
+
+def _uuid_bytes(values: Column) -> Column:
+    return [None if value is None else value.bytes for value in values]
+
+
+def _floats(values: Column) -> Column:
+    # matches the JSON encoding of Decimals
+    return [None if value is None else float(value) for value in values]
+
+
+def _field_types(row_type: Type[Any]) -> Tuple[Tuple[str, type, bool], ...]:
+    """Get name, type & whether it's nullable for each field of a row."""
+    types = []
+
+    for name, hint in get_type_hints(row_type).items():
+        nullable = False
+
+        # Optional[X] is Union[X, None]
+        if get_origin(hint) is Union:
+            hint = next(arg for arg in get_args(hint)
+                        if not isinstance(None, arg))
+            nullable = True
+
+        types.append((name, hint, nullable))
+
+    return tuple(types)
+
+
+def _convert_columns(
+    rows: Sequence[Row],
+    row_type: Type[Any],
+    converters: Dict[type, Callable[[Column], Column]],
+) -> List[Column]:
+    """Split rows into columns, converting those of the given types."""
+    types = _field_types(row_type)
+    columns: List[Column] = list(zip(*rows)) or [()] * len(types)
+
+    for index, (_, hint, _) in enumerate(types):
+        if hint in converters:
+            columns[index] = converters[hint](columns[index])
+
+    return columns
+
+
+def _packer() -> msgpack.Packer:
+    # datetimes are packed as msgpack's own Timestamp type
+    return msgpack.Packer(datetime=True)
+
+
+def msgpack_rows(rows: Sequence[Row], row_type: Type[Any]) -> List[Row]:
+    """
+    Convert rows to tuples msgpack packs as arrays without any help.
+
+    UUIDs are packed as their 16 bytes & Decimals as floats.
+    """
+    if not rows:
+        return []
+
+    return list(zip(*_convert_columns(
+        rows, row_type, {UUID: _uuid_bytes, Decimal: _floats})))
+
+
+def arrow_schema(row_type: Type[Any]) -> pyarrow.Schema:
+    """Get the Arrow schema for a row dataclass, from its field types."""
+    return pyarrow.schema([pyarrow.field(name, ARROW_TYPES[hint], nullable)
+                           for name, hint, nullable
+                           in _field_types(row_type)])
+
+
+def arrow_batch(
+    rows: Sequence[Row],
+    row_type: Type[Any],
+    schema: pyarrow.Schema,
+) -> pyarrow.RecordBatch:
+    """Build a record batch from rows, one whole column at a time."""
+    columns = _convert_columns(rows, row_type, {UUID: _uuid_bytes})
+
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(values, type=field.type)
+         for values, field in zip(columns, schema)],
+        schema=schema)
+
+
+def rows_response(
+    rows: Sequence[Row],
+    row_type: Type[Any],
+    media_type: str,
+) -> Response:
+    """Respond with rows, sent as the given type, in the given format."""
+    # the format depends on the Accept header, so caches must too
+    headers = {"Vary": "Accept"}
+
+    if media_type == MSGPACK:
+        with traced_block("serialize MessagePack"):
+            body = _packer().pack(msgpack_rows(rows, row_type))
+
+        return Response(body, media_type=MSGPACK, headers=headers)
+
+    if media_type == ARROW:
+        with traced_block("serialize Arrow"):
+            schema = arrow_schema(row_type)
+            body = _arrow_stream([arrow_batch(rows, row_type, schema)],
+                                 schema)
+
+        return Response(body, media_type=ARROW, headers=headers)
+
+    return FastJSONResponse([row_type(*row) for row in rows],
+                            headers=headers)
+
+
+class _Chunks:
+    """File-like sink collecting what's written until it's taken."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+
+    def write(self, data: Any) -> int:
+        """Collect data."""
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        """Nothing to flush, data is kept until taken."""
+
+    def close(self) -> None:
+        """Mark sink as closed."""
+        self.closed = True
+
+    def take(self) -> bytes:
+        """Take everything written since the last take."""
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _arrow_stream(
+    batches: Sequence[pyarrow.RecordBatch],
+    schema: pyarrow.Schema,
+) -> bytes:
+    sink = _Chunks()
+
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+    return sink.take()
+
+
+def rows_stream(
+    batches: Batches,
+    row_type: Type[Any],
+    media_type: str,
+) -> StreamingResponse:
+    """
+    Stream batches of rows, sent as the given type, in the given format.
+
+    Each batch is encoded & sent as soon as it's read. JSON is sent as one
+    array of objects, MessagePack as a sequence of arrays, one per row with
+    values in field order, & Arrow as an IPC stream with one record batch
+    per batch read.
+    """
+    encoders: Dict[str, Encoder] = {
+        JSON: _json_stream,
+        MSGPACK: _msgpack_stream,
+        ARROW: _arrow_batches_stream,
+    }
+
+    return StreamingResponse(encoders[media_type](batches, row_type),
+                             media_type=media_type,
+                             headers={"Vary": "Accept"})
+
+
+async def _json_stream(
+    batches: Batches,
+    row_type: Type[Any],
+) -> AsyncIterator[bytes]:
+    yield b"["
+    first = True
+
+    async for batch in batches:
+        if not batch:
+            continue
+
+        # strip each batch's brackets to join them into one array
+        yield (b"" if first else b",") + \
+            dump_json([row_type(*row) for row in batch])[1:-1]
+        first = False
+
+    yield b"]"
+
+
+async def _msgpack_stream(
+    batches: Batches,
+    row_type: Type[Any],
+) -> AsyncIterator[bytes]:
+    packer = _packer()
+
+    async for batch in batches:
+        yield b"".join(map(packer.pack, msgpack_rows(batch, row_type)))
+
+
+async def _arrow_batches_stream(
+    batches: Batches,
+    row_type: Type[Any],
+) -> AsyncIterator[bytes]:
+    schema = arrow_schema(row_type)
+    sink = _Chunks()
+    writer = pyarrow.ipc.new_stream(sink, schema)
+
+    async for batch in batches:
+        if batch:
+            writer.write_batch(arrow_batch(batch, row_type, schema))
+            yield sink.take()
+
+    writer.close()
+    yield sink.take()
@@ -0,0 +1,136 @@
+"""Replay saved responses to requests retried with an Idempotency-Key."""
+
+import asyncio
+from datetime import timedelta
+import logging
+from typing import Awaitable, Callable
+
+from fastapi import status as http_status, Request, Response
+from fastapi.responses import JSONResponse
+from psycopg2 import Error as DatabaseError
+from psycopg2.errors import ForeignKeyViolation  # pylint: disable=E0611
+
+from src.database import Client
+from src.models import IdempotencyModel, SavedResponse
+from src.security import user_id_from_request
+
+Middleware = Callable[
+    [Request, Callable[[Request], Awaitable[Response]]],
+    Awaitable[Response]]
+
+HEADER = "idempotency-key"
+# set on responses that are a replay of a saved response
+REPLAYED_HEADER = "idempotent-replayed"
+MAX_KEY_LENGTH = 255
+IDEMPOTENT_METHODS = ("POST", "PUT", "DELETE")
+
+logger = logging.getLogger(__name__)
+
+
+def _replay(req: Request, saved: SavedResponse) -> Response:
+    """Send the response saved for a key again, if it's for this request."""
+    if saved.method != req.method or saved.path != req.url.path:
+        return JSONResponse(
+            "Idempotency-Key was already used for another request.",
+            http_status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    if saved.status_code is None:
+        return JSONResponse(
+            "A request with this Idempotency-Key is still running.",
+            http_status.HTTP_409_CONFLICT)
+
+    return Response(saved.body,
+                    status_code=saved.status_code,
+                    media_type=saved.media_type,
+                    headers={REPLAYED_HEADER: "true"})
+
+
+def create_idempotency_middleware(
+    database: Client,
+    jwt_key: str,
+    lease: timedelta = timedelta(minutes=1),
+) -> Middleware:
+    """
+    Create middleware saving responses to requests with an Idempotency-Key.
+
+    The first authenticated POST, PUT, or DELETE request sent with a given
+    key is handled as usual & its response saved; any later request from
+    the same User with that key is sent the saved response instead of
+    being handled again. Requests retried while the first is still being
+    handled are refused, unless it started longer than lease ago, when the
+    first is taken to have failed without releasing the key.
+    """
+    model = IdempotencyModel(database)
+
+    async def idempotency(
+        req: Request,
+        call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        key = req.headers.get(HEADER)
+
+        if key is None or req.method not in IDEMPOTENT_METHODS:
+            return await call_next(req)
+
+        # leave unauthenticated requests to be refused by their route
+        user_id = user_id_from_request(req, jwt_key)
+
+        if user_id is None:
+            return await call_next(req)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return JSONResponse(
+                f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters.",
+                http_status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reservation = await model.create.reserve(
+                user_id, key, req.method, req.url.path, lease)
+        except ForeignKeyViolation:
+            # the token's User is gone, so leave them to be refused too
+            return await call_next(req)
+
+        if isinstance(reservation, SavedResponse):
+            return _replay(req, reservation)
+
+        try:
+            response = await call_next(req)
+
+            # server errors may be fixed by trying again, so don't keep them
+            if response.status_code >= 500:
+                await model.delete.one(reservation)
+                return response
+
+            body = b"".join([chunk async for chunk
+                             in response.body_iterator])  # type: ignore
+            await model.update.response(reservation,
+                                        response.status_code,
+                                        response.headers.get("content-type"),
+                                        body)
+        except BaseException:
+            await model.delete.one(reservation)
+            raise
+
+        return Response(body,
+                        status_code=response.status_code,
+                        headers=dict(response.headers),
+                        background=response.background)
+
+    return idempotency
+
+
+async def remove_expired_keys(
+    database: Client,
+    ttl: timedelta,
+    interval: timedelta = timedelta(hours=1),
+) -> None:
+    """Remove saved responses older than ttl every interval, forever."""
+    model = IdempotencyModel(database)
+
+    while True:
+        try:
+            await model.delete.older_than(ttl)
+        except DatabaseError as exc:
+            # the database may be back by the next interval
+            logger.warning("Expired idempotency keys not removed: %s", exc)
+
+        await asyncio.sleep(interval.total_seconds())
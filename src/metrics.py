@@ -0,0 +1,186 @@
+"""Collect & expose metrics in the Prometheus text format."""
+
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional, TYPE_CHECKING
+
+from prometheus_client import generate_latest, CollectorRegistry, Histogram
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database import Client, Params, Query
+from src.models import single_flight_counts
+from src.routes import endpoint_template
+
+if TYPE_CHECKING:
+    # src.cache imports the routers, which import this module
+    from src.cache import ResponseCache
+
+# requests to paths no route matches, grouped to keep the label set small
+UNMATCHED = "unmatched"
+
+# most requests take a few milliseconds, a slow one a few seconds
+REQUEST_BUCKETS = (.0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1)
+
+
+class _StateCollector(Collector):
+    """Read counts kept elsewhere only when metrics are scraped."""
+
+    def __init__(
+        self,
+        database: Client,
+        cache: Optional["ResponseCache"],
+    ) -> None:
+        self._database = database
+        self._cache = cache
+
+    def collect(self) -> Iterator[Metric]:
+        """Collect current transaction, cache, & single-flight counts."""
+        yield GaugeMetricFamily(
+            "db_open_transactions",
+            "Transactions open, each holding a database connection of its "
+            "own.",
+            value=self._database.open_transactions)
+
+        if self._cache is not None:
+            lookups = CounterMetricFamily(
+                "response_cache_lookups",
+                "Cached responses looked up, by result.",
+                labels=["result"])
+            lookups.add_metric(["hit"], self._cache.hits)
+            lookups.add_metric(["miss"], self._cache.misses)
+            yield lookups
+
+            total = self._cache.hits + self._cache.misses
+            yield GaugeMetricFamily(
+                "response_cache_hit_ratio",
+                "Share of cached responses looked up that were found.",
+                value=self._cache.hits / total if total else 0)
+
+        single_flight = CounterMetricFamily(
+            "db_single_flight_queries",
+            "Read queries executed, or shared with an identical one "
+            "already in flight, by reader method.",
+            labels=["query", "result"])
+
+        for label, counts in single_flight_counts().items():
+            for result, value in counts.items():
+                single_flight.add_metric([label, result], value)
+        yield single_flight
+
+
+class Metrics:
+    """
+    Metrics for an app & its database client, in their own registry.
+
+    Requests are timed by route template & status; their counts are the
+    `_count` of the same histogram. Every statement the client executes is
+    timed by the method executing it. Everything else is only read when
+    metrics are scraped, so costs nothing on the way.
+    """
+
+    def __init__(
+        self,
+        database: Client,
+        cache: Optional["ResponseCache"] = None,
+    ) -> None:
+        self.registry = CollectorRegistry()
+        self.requests = Histogram(
+            "http_request_duration_seconds",
+            "Seconds spent responding to requests, by route & status.",
+            ["method", "route", "status"],
+            buckets=REQUEST_BUCKETS,
+            registry=self.registry)
+        self.queries = Histogram(
+            "db_query_duration_seconds",
+            "Seconds spent executing statements, by the method executing.",
+            ["query"],
+            buckets=QUERY_BUCKETS,
+            registry=self.registry)
+        self.registry.register(_StateCollector(database, cache))
+        # label lookups are cached, they're slower than observing a value
+        self._request_children: Dict[Any, Histogram] = {}
+        self._query_children: Dict[str, Histogram] = {}
+
+        database.add_query_observer(self.observe_query)
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+    ) -> None:
+        """Record how long a request took."""
+        key = (method, route, status)
+        child = self._request_children.get(key)
+
+        if child is None:
+            child = self.requests.labels(method, route, str(status))
+            self._request_children[key] = child
+
+        child.observe(seconds)
+
+    def observe_query(
+        self,
+        label: str,
+        _: Query,
+        __: Params,
+        seconds: float,
+    ) -> None:
+        """Record how long a statement took."""
+        child = self._query_children.get(label)
+
+        if child is None:
+            child = self.queries.labels(label)
+            self._query_children[label] = child
+
+        child.observe(seconds)
+
+    def render(self) -> bytes:
+        """Render every metric in the Prometheus text format."""
+        return generate_latest(self.registry)
+
+
+class MetricsMiddleware:
+    """Time every HTTP request & record it by its route's template."""
+
+    def __init__(self, app: ASGIApp, metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Time the response to an HTTP request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        # anything raised is sent as a 500 by the app's error handler
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            self.metrics.observe_request(
+                scope["method"],
+                endpoint_template(scope) or UNMATCHED,
+                status,
+                perf_counter() - started)
@@ -6,23 +6,42 @@ from .account import (
     AccountModel,
     AccountNew,
     AccountOut,
+    AccountRow,
 )
 from .balance import (
     Balance,
     BalanceModel
 )
+from .change import (
+    Change,
+    CHANGES_CHANNEL,
+)
 from .envelope import (
     EnvelopeChanges,
     EnvelopeIn,
     EnvelopeModel,
     EnvelopeNew,
     EnvelopeOut,
+    EnvelopeRow,
+)
+from .idempotency import (
+    IdempotencyModel,
+    Reservation,
+    SavedResponse,
+)
+from .single_flight import forget_flights, single_flight_counts
+from .sync import (
+    Deleted,
+    SyncChanges,
+    SyncModel,
+    SyncTokenExpired,
 )
 from .transaction import (
     TransactionChanges,
     TransactionIn,
     TransactionModel,
     TransactionOut,
+    TransactionRow,
 )
 from .token import (
     Token,
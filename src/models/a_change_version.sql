@@ -0,0 +1,4 @@
+-- Shared counter for the `version` of every synced record, so one number
+-- can mark a point in a User's history across all their data. Must be
+-- created before the tables using it, hence the `a_` prefix.
+CREATE SEQUENCE IF NOT EXISTS change_version;
@@ -1,9 +1,10 @@
 """DB Model for Account objects."""
 
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
-from db_wrapper.client import AsyncClient
 from db_wrapper.model import (
     sql,
     AsyncCreate,
@@ -13,8 +14,10 @@ from db_wrapper.model import (
 )
 from db_wrapper.model.base import NoResultFound
 
-from src.models.base import Base, BaseDb
+from src.database import Client
+from src.models.base import Base, BaseDb, select_columns, Versioned
 from src.models.filters import build_query_equality_filters
+from src.tracing import traced_methods
 
 
 class AccountIn(Base):
@@ -36,12 +39,32 @@ class AccountNew(AccountIn):
     user_id: UUID
 
 
-class AccountOut(AccountNew, BaseDb):
+class AccountOut(AccountNew, BaseDb, Versioned):
     """Fields returned by Account queries."""
 
     closed: bool
 
 
+@dataclass
+class AccountRow:
+    """
+    An Account read straight from the database, without validation.
+
+    Much lighter than an AccountOut when reading many at once; fields are
+    the same & in the same order, so both serialize identically.
+    """
+
+    __slots__ = ("version", "updated_at", "id", "name", "user_id", "closed")
+
+    version: int
+    updated_at: datetime
+    id: UUID
+    name: str
+    user_id: UUID
+    closed: bool
+
+
+@traced_methods
 class AccountCreator(AsyncCreate[AccountOut]):
     """Extended create methods."""
 
@@ -63,14 +86,17 @@ class AccountCreator(AsyncCreate[AccountOut]):
         return AccountOut(**query_result[0])
 
 
+@traced_methods
 class AccountReader(AsyncRead[AccountOut]):
     """Extended read methods."""
 
+    _client: Client
+
     async def many_by_user(
         self,
         user_id: UUID,
         **kwargs: Any
-    ) -> List[AccountOut]:
+    ) -> List[AccountRow]:
         """Get list of accounts for user."""
         filter_values = AccountChanges(**{
             # default to filtering by accounts not marked as closed
@@ -80,19 +106,21 @@ class AccountReader(AsyncRead[AccountOut]):
         })
 
         query = sql.SQL("""
-            SELECT * FROM {table}
+            SELECT {columns} FROM {table}
             WHERE user_id = {user_id}
             {filters};
         """).format(
+            columns=select_columns(AccountRow),
             table=self._table,
             user_id=sql.Literal(str(user_id)),
             filters=build_query_equality_filters(filter_values))
         query_result = \
-            await self._client.execute_and_return(query)
+            await self._client.execute_and_return_tuples(query)
 
-        return [AccountOut(**account) for account in query_result]
+        return [AccountRow(*account) for account in query_result]
 
 
+@traced_methods
 class AccountUpdater(AsyncUpdate[AccountOut]):
     """Extended update methods."""
 
@@ -147,7 +175,7 @@ class AccountModel(AsyncModel[AccountOut]):
     read: AccountReader
     update: AccountUpdater
 
-    def __init__(self, client: AsyncClient) -> None:
+    def __init__(self, client: Client) -> None:
         """Create Account Model."""
         super().__init__(client, "account", AccountOut)
         self.create = AccountCreator(client, self.table, AccountOut)
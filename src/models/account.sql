@@ -2,5 +2,7 @@ CREATE TABLE IF NOT EXISTS "account" (
     "id" UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     "user_id" UUID NOT NULL,
     "name" TEXT NOT NULL,
-    "closed" BOOL DEFAULT false
+    "closed" BOOL DEFAULT false,
+    "version" BIGINT NOT NULL DEFAULT nextval('change_version'),
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT now()
 );
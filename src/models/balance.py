@@ -3,11 +3,13 @@
 from typing import Literal, Optional, Union
 from uuid import UUID
 
-from db_wrapper.client import AsyncClient
 from db_wrapper.model import sql
 
+from src.database import Client
 from src.models.amount import Amount
 from src.models.base import Base
+from src.models.single_flight import SingleFlight
+from src.tracing import traced_methods
 
 
 class Balance(Base):
@@ -21,13 +23,16 @@ class Balance(Base):
     user_id: UUID
 
 
+@traced_methods
 class BalanceReader:
     """Database read queries for Balance objects."""
 
-    def __init__(self, client: AsyncClient, table: sql.Literal) -> None:
+    def __init__(self, client: Client, table: sql.Literal) -> None:
         """Create Balance reader."""
         self._client = client
         self._table = table
+        # Balances are aggregates, so are expensive to read many at once
+        self.single_flight = SingleFlight(client)
 
     async def all_accounts_by_user(self, user_id: UUID) -> Balance:
         """Get the sum total Balance of all accounts for given User."""
@@ -40,7 +45,8 @@ class BalanceReader:
         """).format(
             table=self._table,
             user_id=sql.Literal(user_id))
-        query_result = await self._client.execute_and_return(query)
+        query_result = await self.single_flight.execute_and_return(
+            "BalanceReader.all_accounts_by_user", user_id, query)
 
         return Balance(**query_result[0])
 
@@ -56,7 +62,8 @@ class BalanceReader:
             table=self._table,
             collection_id=sql.Literal(collection_id),
             user_id=sql.Literal(user_id))
-        query_result = await self._client.execute_and_return(query)
+        query_result = await self.single_flight.execute_and_return(
+            "BalanceReader.one_by_collection", user_id, query)
 
         return Balance(**query_result[0])
 
@@ -92,7 +99,8 @@ class BalanceReader:
         """).format(
             table=self._table,
             user_id=sql.Literal(user_id))
-        query_result = await self._client.execute_and_return(query)
+        query_result = await self.single_flight.execute_and_return(
+            "BalanceReader.all_minus_allocated", user_id, query)
 
         return Balance(**query_result[0])
 
@@ -100,10 +108,10 @@ class BalanceReader:
 class BalanceModel:
     """Database queries for Balance objects."""
 
-    client: AsyncClient
+    client: Client
     table: sql.Identifier
 
-    def __init__(self, client: AsyncClient) -> None:
+    def __init__(self, client: Client) -> None:
         """Create Balance Model."""
         self.client = client
         self.table = sql.Identifier("balance")
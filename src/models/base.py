@@ -1,9 +1,13 @@
 """Shared Model behavior."""
 
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Optional, Type
+
 from pydantic import (  # pylint: disable=no-name-in-module
     BaseModel,
 )
-from db_wrapper.model import ModelData
+from db_wrapper.model import ModelData, sql
 
 
 class Base(BaseModel):
@@ -18,3 +22,27 @@ class Base(BaseModel):
 
 class BaseDb(Base, ModelData):
     """Combine shared Pydantic settings & required id field."""
+
+
+class Versioned(Base):
+    """Fields tracking when a synced record last changed."""
+
+    version: int
+    updated_at: datetime
+
+
+def select_columns(
+    row_type: Type[Any],
+    table: Optional[str] = None,
+) -> sql.Composed:
+    """
+    Build a list of columns to select, one for each field of a row type.
+
+    Columns are in the same order as the fields, so each selected tuple can
+    be given to the row type as positional arguments. Columns are qualified
+    with the given table name or alias, if any.
+    """
+    return sql.SQL(", ").join(
+        sql.Identifier(table, field.name) if table is not None
+        else sql.Identifier(field.name)
+        for field in fields(row_type))
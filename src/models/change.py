@@ -0,0 +1,25 @@
+"""Change notice data Models."""
+
+from typing import Literal, Union
+from uuid import UUID
+
+from src.models.base import Base
+
+# database channel change notices are sent on, see z_notify_changes.sql
+CHANGES_CHANNEL = "hoops_changes"
+
+
+class Change(Base):
+    """Notice that a User's Accounts, Envelopes, or Transactions changed."""
+
+    user_id: UUID
+    collection: Union[
+        Literal["account"],
+        Literal["envelope"],
+        Literal["transaction"],
+    ]
+    operation: Union[
+        Literal["insert"],
+        Literal["update"],
+        Literal["delete"],
+    ]
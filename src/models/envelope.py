@@ -1,10 +1,11 @@
 """DB Model for Envelope objects."""
 
+from dataclasses import dataclass
+from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
-from db_wrapper.client import AsyncClient
 from db_wrapper.model import (
     sql,
     AsyncCreate,
@@ -14,8 +15,10 @@ from db_wrapper.model import (
 )
 from db_wrapper.model.base import NoResultFound
 
+from src.database import Client
 from src.models.amount import Amount
-from src.models.base import Base, BaseDb
+from src.models.base import Base, BaseDb, select_columns, Versioned
+from src.tracing import traced_methods
 
 
 class EnvelopeIn(Base):
@@ -30,18 +33,39 @@ class EnvelopeNew(EnvelopeIn):
     user_id: UUID
 
 
-class EnvelopeOut(EnvelopeNew, BaseDb):
+class EnvelopeOut(EnvelopeNew, BaseDb, Versioned):
     """Fields returned by Envelope queries."""
 
     total_funds: Amount
 
 
+@dataclass
+class EnvelopeRow:
+    """
+    An Envelope read straight from the database, without validation.
+
+    Much lighter than an EnvelopeOut when reading many at once; fields are
+    the same & in the same order, so both serialize identically.
+    """
+
+    __slots__ = ("version", "updated_at", "id", "name", "user_id",
+                 "total_funds")
+
+    version: int
+    updated_at: datetime
+    id: UUID
+    name: str
+    user_id: UUID
+    total_funds: Decimal
+
+
 class EnvelopeChanges(Base):
     """Fields used when updating an Envelope, all are optional."""
 
     name: Optional[str]
 
 
+@traced_methods
 class EnvelopeCreator(AsyncCreate[EnvelopeOut]):
     """Extended create methods."""
 
@@ -63,9 +87,12 @@ class EnvelopeCreator(AsyncCreate[EnvelopeOut]):
         return EnvelopeOut(**query_result[0])
 
 
+@traced_methods
 class EnvelopeReader(AsyncRead[EnvelopeOut]):
     """Extended read methods."""
 
+    _client: Client
+
     async def one(
             self,
             envelope_id: UUID,
@@ -90,19 +117,21 @@ class EnvelopeReader(AsyncRead[EnvelopeOut]):
     async def many_by_user(
         self,
         user_id: UUID,
-    ) -> List[EnvelopeOut]:
+    ) -> List[EnvelopeRow]:
         """Get list of envelopes for user."""
         query = sql.SQL("""
-            SELECT * FROM {table}
+            SELECT {columns} FROM {table}
             WHERE user_id = {user_id};
         """).format(
+            columns=select_columns(EnvelopeRow),
             table=self._table,
             user_id=sql.Literal(str(user_id)))
-        query_result = await self._client.execute_and_return(query)
+        query_result = await self._client.execute_and_return_tuples(query)
 
-        return [EnvelopeOut(**envelope) for envelope in query_result]
+        return [EnvelopeRow(*envelope) for envelope in query_result]
 
 
+@traced_methods
 class EnvelopeUpdater(AsyncUpdate[EnvelopeOut]):
     """Extended update methods."""
 
@@ -187,7 +216,7 @@ class EnvelopeModel(AsyncModel[EnvelopeOut]):
     read: EnvelopeReader
     update: EnvelopeUpdater
 
-    def __init__(self, client: AsyncClient) -> None:
+    def __init__(self, client: Client) -> None:
         """Create Envelope Model."""
         super().__init__(client, "envelope", EnvelopeOut)
         self.create = EnvelopeCreator(client, self.table, EnvelopeOut)
@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from db_wrapper.model import sql
 
@@ -158,8 +158,14 @@ def build_pagination_filters(
     limit: int,
     page: int,
     sort: str,
+    table: Optional[str] = None,
 ) -> sql.Composed:
-    """Construct SQL filters for adding pagination to a query."""
+    """
+    Construct SQL filters for adding pagination to a query.
+
+    The sort column is qualified by the given table name or alias, if any,
+    for queries joining tables that share it.
+    """
     # offset is n times limit
     # if limit = 50: (0, 0), (1, 50), ... (n+1, 50*n)
     offset = page * limit
@@ -167,6 +173,7 @@ def build_pagination_filters(
     return sql.SQL(
         " ORDER BY {sort} DESC LIMIT {limit} OFFSET {offset} "
     ).format(
-        sort=sql.Identifier(sort),
+        sort=sql.Identifier(sort) if table is None
+        else sql.Identifier(table, sort),
         limit=sql.Literal(limit),
         offset=sql.Literal(offset))
@@ -0,0 +1,196 @@
+"""DB Model for saved responses to idempotent requests."""
+
+from datetime import datetime, timedelta
+from typing import Optional, Union
+from uuid import UUID
+
+from db_wrapper.client import AsyncClient
+from db_wrapper.model import sql
+
+from src.models.base import Base
+from src.tracing import traced_methods
+
+
+class SavedResponse(Base):
+    """A request sent with an Idempotency-Key & the response it was given."""
+
+    method: str
+    path: str
+    # all None while the request is still being handled
+    status_code: Optional[int]
+    media_type: Optional[str]
+    body: Optional[bytes]
+
+
+class Reservation(Base):
+    """A key reserved for the request handling it."""
+
+    user_id: UUID
+    key: str
+    # tells the reservation apart from any taking over the key later
+    reserved_at: datetime
+
+
+@traced_methods
+class IdempotencyCreator:
+    """Database create queries for saved responses."""
+
+    def __init__(self, client: AsyncClient, table: sql.Identifier) -> None:
+        """Create saved response creator."""
+        self._client = client
+        self._table = table
+
+    async def reserve(
+        self,
+        user_id: UUID,
+        key: str,
+        method: str,
+        path: str,
+        lease: timedelta,
+    ) -> Union[Reservation, SavedResponse]:
+        """
+        Reserve the given key for a request, unless it's already been used.
+
+        Returns the reservation if the key was reserved, otherwise returns
+        whatever was saved for the key when it was first used. A key still
+        reserved for the same request after lease is taken over, as the
+        request handling it can't have finished.
+        """
+        reserve = sql.SQL("""
+            INSERT INTO {table}(user_id, key, method, path)
+            VALUES ({user_id}, {key}, {method}, {path})
+            ON CONFLICT (user_id, key) DO UPDATE
+            SET reserved_at = now()
+            WHERE {table}.status_code IS NULL
+            AND {table}.method = EXCLUDED.method
+            AND {table}.path = EXCLUDED.path
+            AND {table}.reserved_at < now() - {lease}
+            RETURNING reserved_at;
+        """).format(
+            table=self._table,
+            user_id=sql.Literal(user_id),
+            key=sql.Literal(key),
+            method=sql.Literal(method),
+            path=sql.Literal(path),
+            lease=sql.Literal(lease))
+        reserved = await self._client.execute_and_return(reserve)
+
+        if reserved:
+            return Reservation(user_id=user_id,
+                               key=key,
+                               reserved_at=reserved[0]["reserved_at"])
+
+        existing = sql.SQL("""
+            SELECT method, path, status_code, media_type, body
+            FROM {table}
+            WHERE user_id = {user_id}
+            AND key = {key};
+        """).format(
+            table=self._table,
+            user_id=sql.Literal(user_id),
+            key=sql.Literal(key))
+        query_result = await self._client.execute_and_return(existing)
+
+        # bytea columns are read as memoryview
+        return SavedResponse(**{
+            **query_result[0],
+            "body": bytes(query_result[0]["body"])
+            if query_result[0]["body"] is not None else None,
+        })
+
+
+@traced_methods
+class IdempotencyUpdater:
+    """Database update queries for saved responses."""
+
+    def __init__(self, client: AsyncClient, table: sql.Identifier) -> None:
+        """Create saved response updater."""
+        self._client = client
+        self._table = table
+
+    async def response(
+        self,
+        reservation: Reservation,
+        status_code: int,
+        media_type: Optional[str],
+        body: bytes,
+    ) -> None:
+        """
+        Save the response given to the request that reserved a key.
+
+        Nothing is saved if the key has been taken over since.
+        """
+        query = sql.SQL("""
+            UPDATE {table}
+            SET
+                status_code = {status_code},
+                media_type = {media_type},
+                body = {body}
+            WHERE user_id = {user_id}
+            AND key = {key}
+            AND reserved_at = {reserved_at};
+        """).format(
+            table=self._table,
+            status_code=sql.Literal(status_code),
+            media_type=sql.Literal(media_type),
+            body=sql.Literal(body),
+            user_id=sql.Literal(reservation.user_id),
+            key=sql.Literal(reservation.key),
+            reserved_at=sql.Literal(reservation.reserved_at))
+
+        await self._client.execute(query)
+
+
+@traced_methods
+class IdempotencyDeleter:
+    """Database delete queries for saved responses."""
+
+    def __init__(self, client: AsyncClient, table: sql.Identifier) -> None:
+        """Create saved response deleter."""
+        self._client = client
+        self._table = table
+
+    async def one(self, reservation: Reservation) -> None:
+        """
+        Release a reserved key so it can be used again.
+
+        Left alone if the key has been taken over since.
+        """
+        query = sql.SQL("""
+            DELETE FROM {table}
+            WHERE user_id = {user_id}
+            AND key = {key}
+            AND reserved_at = {reserved_at};
+        """).format(
+            table=self._table,
+            user_id=sql.Literal(reservation.user_id),
+            key=sql.Literal(reservation.key),
+            reserved_at=sql.Literal(reservation.reserved_at))
+
+        await self._client.execute(query)
+
+    async def older_than(self, age: timedelta) -> None:
+        """Remove every saved response older than the given age."""
+        query = sql.SQL("""
+            DELETE FROM {table}
+            WHERE created_at < now() - {age};
+        """).format(
+            table=self._table,
+            age=sql.Literal(age))
+
+        await self._client.execute(query)
+
+
+class IdempotencyModel:
+    """Database queries for saved responses to idempotent requests."""
+
+    client: AsyncClient
+    table: sql.Identifier
+
+    def __init__(self, client: AsyncClient) -> None:
+        """Create saved response Model."""
+        self.client = client
+        self.table = sql.Identifier("idempotency_key")
+        self.create = IdempotencyCreator(client, self.table)
+        self.update = IdempotencyUpdater(client, self.table)
+        self.delete = IdempotencyDeleter(client, self.table)
@@ -0,0 +1,20 @@
+-- Responses to requests sent with an `Idempotency-Key` header, saved so
+-- retries can be answered without handling the request again
+CREATE TABLE IF NOT EXISTS "idempotency_key" (
+    "user_id" UUID NOT NULL,
+    "key" TEXT NOT NULL,
+    "method" TEXT NOT NULL,
+    "path" TEXT NOT NULL,
+    -- NULL until the first request with the key has been handled
+    "status_code" SMALLINT,
+    "media_type" TEXT,
+    "body" BYTEA,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT now(),
+    -- when the request handling the key started, so keys left reserved by
+    -- requests that never finished can be taken over
+    "reserved_at" TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY ("user_id", "key")
+);
+
+CREATE INDEX IF NOT EXISTS idempotency_key_created_at
+    ON "idempotency_key" (created_at);
@@ -0,0 +1,147 @@
+"""Share in-flight read queries between concurrent callers."""
+
+import asyncio
+from collections import Counter
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
+from uuid import UUID
+import weakref
+
+from db_wrapper.model import sql
+
+from src.database import query_label, Client, Query
+
+Rows = List[Dict[str, Any]]
+Result = TypeVar("Result")
+# the User a query reads for, its label, how it's executed, & the query
+FlightKey = Tuple[UUID, str, str, str]
+
+# every SingleFlight created, so their counts can be collected in one place
+_instances: "weakref.WeakSet[SingleFlight]" = weakref.WeakSet()
+
+
+class SingleFlight:
+    """
+    Run identical concurrent read queries only once.
+
+    While a query is running, any caller executing the exact same query
+    for the same User waits for its rows instead of sending another.
+    Queries are shared only while in flight, nothing is kept once they
+    finish. A caller joining a query may still get rows read up to one
+    query's duration before it arrived, missing writes committed since;
+    once a User's write is done, `forget_flights` stops their queries
+    already in flight being joined, so they always see their own writes.
+    Writes handled by another process aren't known of, so requests from
+    the same User sent to other workers may miss them for as long.
+
+    Counts of queries executed & callers that joined an in-flight query are
+    kept by label, e.g. the name of the reader method calling.
+    """
+
+    def __init__(self, client: Client) -> None:
+        """Create single-flight executor for the given client."""
+        self._client = client
+        self._flights: Dict[FlightKey, "asyncio.Future[Any]"] = {}
+        # queries executed, by label
+        self.executed: "Counter[str]" = Counter()
+        # callers given the rows of a query that was already in flight
+        self.shared: "Counter[str]" = Counter()
+        _instances.add(self)
+
+    async def execute_and_return(
+        self,
+        label: str,
+        user_id: UUID,
+        query: sql.Composed,
+    ) -> Rows:
+        """Execute a User's query & return rows, joining an identical one."""
+        return await self._share(
+            label, user_id, query, self._client.execute_and_return)
+
+    async def execute_and_return_tuples(
+        self,
+        label: str,
+        user_id: UUID,
+        query: sql.Composed,
+    ) -> List[Tuple[Any, ...]]:
+        """Execute a User's query & return tuples, joining an identical one."""
+        return await self._share(
+            label, user_id, query, self._client.execute_and_return_tuples)
+
+    def forget_user(self, user_id: UUID) -> None:
+        """Stop a User's queries in flight being joined by later callers."""
+        for key in [key for key in self._flights if key[0] == user_id]:
+            del self._flights[key]
+
+    async def _share(
+        self,
+        label: str,
+        user_id: UUID,
+        query: sql.Composed,
+        execute: Callable[[Query], Awaitable[Result]],
+    ) -> Result:
+        # queries in a transaction may see changes no one else can yet
+        if self._client.in_transaction:
+            self.executed[label] += 1
+            with query_label(label):
+                return await execute(query)
+
+        key = (user_id, label, execute.__name__, repr(query))
+        flight = self._flights.get(key)
+
+        if flight is not None:
+            self.shared[label] += 1
+        else:
+            self.executed[label] += 1
+            # the query runs in its own task, away from the method calling
+            with query_label(label):
+                flight = asyncio.ensure_future(execute(query))
+            self._flights[key] = flight
+            flight.add_done_callback(partial(self._land, key))
+
+        # one caller giving up mustn't cancel the query for everyone else
+        result: Result = await asyncio.shield(flight)
+        return result
+
+    def _land(
+        self,
+        key: FlightKey,
+        flight: "asyncio.Future[Any]",
+    ) -> None:
+        """Forget a finished query, so the next caller runs it again."""
+        # the query may have been forgotten & started again already
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+        # every caller may have given up, leaving no one to see an error
+        if not flight.cancelled():
+            flight.exception()
+
+
+def forget_flights(user_id: UUID) -> None:
+    """
+    Stop a User's queries in flight being joined, across all SingleFlights.
+
+    Call once a write by the User is done, so no read after it joins a
+    query that started before it.
+    """
+    for instance in list(_instances):
+        instance.forget_user(user_id)
+
+
+def single_flight_counts() -> Dict[str, Dict[str, int]]:
+    """
+    Get query counts for every label used, across all SingleFlights.
+
+    A high `shared` count relative to `executed` means many identical
+    queries are arriving at once.
+    """
+    counts: Dict[str, Dict[str, int]] = {}
+
+    for instance in list(_instances):
+        for label in set(instance.executed) | set(instance.shared):
+            count = counts.setdefault(label, {"executed": 0, "shared": 0})
+            count["executed"] += instance.executed[label]
+            count["shared"] += instance.shared[label]
+
+    return counts
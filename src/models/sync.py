@@ -0,0 +1,225 @@
+"""DB Model for syncing changes to a User's data."""
+
+from datetime import timedelta
+from typing import List, Literal, Sequence, Union
+from uuid import UUID
+
+from db_wrapper.model import sql
+
+from src.database import Client
+from src.models.account import AccountOut
+from src.models.base import Base, Versioned
+from src.models.envelope import EnvelopeOut
+from src.models.transaction import TransactionOut
+from src.tracing import traced_methods
+
+
+class Deleted(Base):
+    """A record removed from a User's data."""
+
+    id: UUID
+    collection: Union[
+        Literal["account"],
+        Literal["envelope"],
+        Literal["transaction"],
+    ]
+    version: int
+
+
+class SyncChanges(Base):
+    """All changes to a User's data since a given version."""
+
+    accounts: List[AccountOut]
+    envelopes: List[EnvelopeOut]
+    transactions: List[TransactionOut]
+    deleted: List[Deleted]
+    # version to sync from next time
+    token: int
+    # True if there are more changes after token
+    more: bool
+
+
+Changed = Union[Versioned, Deleted]
+
+
+class SyncTokenExpired(Exception):
+    """Raised when deletes since a sync token may have been pruned."""
+
+
+@traced_methods
+class SyncReader:
+    """Database read queries for changes to synced records."""
+
+    def __init__(self, client: Client) -> None:
+        """Create Sync reader."""
+        self._client = client
+
+    def _query(
+        self,
+        table: str,
+        user_id: UUID,
+        since: int,
+        horizon: int,
+        limit: int,
+    ) -> sql.Composed:
+        """Build query for a User's records in table, changed since version."""
+        return sql.SQL("""
+            SELECT *
+            FROM {table}
+            WHERE user_id = {user_id}
+            AND version > {since}
+            AND version <= {horizon}
+            ORDER BY version
+            LIMIT {limit};
+        """).format(
+            table=sql.Identifier(table),
+            user_id=sql.Literal(user_id),
+            since=sql.Literal(since),
+            horizon=sql.Literal(horizon),
+            limit=sql.Literal(limit))
+
+    async def since(
+        self,
+        user_id: UUID,
+        version: int,
+        limit: int,
+    ) -> SyncChanges:
+        """
+        Get the User's records created, changed, or deleted since version.
+
+        Returns at most `limit` of each type of record. If there are more
+        changes than that, only changes up to the lowest version where a
+        type ran out are returned, so nothing is skipped or sent twice when
+        syncing again from the returned token.
+
+        Versions are taken when records are written, not when they're
+        committed, so only versions below any still in flight are returned,
+        see `sync_horizon`, & every record is read in the same snapshot.
+
+        Raises SyncTokenExpired if records deleted since version have been
+        pruned already, so the User's data must be synced from the start.
+        """
+        # read before the snapshot, see sync_horizon
+        bounds = (await self._client.execute_and_return("""
+            SELECT
+                sync_horizon() AS horizon,
+                (SELECT coalesce(max(version), 0) FROM pruned_version)
+                    AS pruned;
+        """))[0]
+        horizon = bounds["horizon"]
+
+        if 0 < version < bounds["pruned"]:
+            raise SyncTokenExpired(version)
+
+        # Transactions are indexed by version for each Account, so each
+        # Account's first changes are read from its index & only those are
+        # sorted, rather than every change to the User's Transactions
+        transactions_query = sql.SQL("""
+            SELECT t.*
+            FROM account AS a
+            CROSS JOIN LATERAL (
+                SELECT *
+                FROM transaction
+                WHERE account_id = a.id
+                AND version > {since}
+                AND version <= {horizon}
+                ORDER BY version
+                LIMIT {limit}
+            ) AS t
+            WHERE a.user_id = {user_id}
+            ORDER BY t.version
+            LIMIT {limit};
+        """).format(
+            user_id=sql.Literal(user_id),
+            since=sql.Literal(version),
+            horizon=sql.Literal(horizon),
+            limit=sql.Literal(limit))
+
+        async with self._client.transaction(isolation="REPEATABLE READ"):
+            # rows from the database are already valid, so skip validation
+            accounts = [
+                AccountOut.construct(**row) for row in
+                await self._client.execute_and_return(self._query(
+                    "account", user_id, version, horizon, limit))]
+            envelopes = [
+                EnvelopeOut.construct(**row) for row in
+                await self._client.execute_and_return(self._query(
+                    "envelope", user_id, version, horizon, limit))]
+            deleted = [
+                Deleted.construct(id=row["id"],
+                                  collection=row["collection"],
+                                  version=row["version"]) for row in
+                await self._client.execute_and_return(self._query(
+                    "deleted_record", user_id, version, horizon, limit))]
+            transactions = [
+                TransactionOut.construct(**row) for row in
+                await self._client.execute_and_return(transactions_query)]
+
+        changes: List[Sequence[Changed]] = \
+            [accounts, envelopes, transactions, deleted]
+        full = [change for change in changes if len(change) >= limit]
+
+        if not full:
+            return SyncChanges.construct(
+                accounts=accounts,
+                envelopes=envelopes,
+                transactions=transactions,
+                deleted=deleted,
+                token=max((change[-1].version for change in changes
+                           if change),
+                          default=version),
+                more=False)
+
+        token = min(change[-1].version for change in full)
+
+        return SyncChanges.construct(
+            accounts=[item for item in accounts if item.version <= token],
+            envelopes=[item for item in envelopes if item.version <= token],
+            transactions=[
+                item for item in transactions if item.version <= token],
+            deleted=[item for item in deleted if item.version <= token],
+            token=token,
+            more=True)
+
+
+@traced_methods
+class SyncDeleter:
+    """Database delete queries for records kept for syncing."""
+
+    def __init__(self, client: Client) -> None:
+        """Create Sync deleter."""
+        self._client = client
+
+    async def older_than(self, age: timedelta) -> None:
+        """
+        Remove every deleted record older than the given age.
+
+        The highest version removed is kept, so syncs from before it, which
+        could miss a delete, are refused, see SyncReader.since.
+        """
+        query = sql.SQL("""
+            WITH pruned AS (
+                DELETE FROM deleted_record
+                WHERE deleted_at < now() - {age}
+                RETURNING version
+            )
+            INSERT INTO pruned_version (version)
+            SELECT max(version) FROM pruned
+            HAVING count(*) > 0
+            ON CONFLICT (id) DO UPDATE
+            SET version = greatest(pruned_version.version, EXCLUDED.version);
+        """).format(age=sql.Literal(age))
+
+        await self._client.execute(query)
+
+
+class SyncModel:
+    """Database queries for syncing changes to a User's data."""
+
+    client: Client
+
+    def __init__(self, client: Client) -> None:
+        """Create Sync Model."""
+        self.client = client
+        self.read = SyncReader(client)
+        self.delete = SyncDeleter(client)
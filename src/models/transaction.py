@@ -1,27 +1,54 @@
 """DB Model for Transaction objects."""
 
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 from uuid import UUID
 
-from db_wrapper.client import AsyncClient
 from db_wrapper.model import (
     sql,
     AsyncModel,
     AsyncCreate,
     AsyncUpdate,
     AsyncRead,
+    AsyncDelete,
 )
 from db_wrapper.model.base import NoResultFound
 
+from src.database import Client
 from src.models.amount import Amount
-from src.models.base import Base, BaseDb
+from src.models.base import Base, BaseDb, select_columns, Versioned
 from src.models.filters import (
     build_query_filters,
     build_pagination_filters,
     Condition,
     Logical
 )
+from src.models.single_flight import SingleFlight
+from src.tracing import traced_methods
+
+
+# months back the oldest Transaction on a page is looked for in, when
+# listing the most recent, before looking through every month
+RECENT_MONTHS = 12
+
+
+def _months_ago(months: int) -> datetime:
+    """Get the start of the UTC month the given number of months ago."""
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 - months
+
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
 
 
 class TransactionBase(Base):
@@ -41,10 +68,59 @@ class TransactionIn(TransactionBase):
     # simply a copy of TransactionBase for now
 
 
-class TransactionOut(TransactionBase, BaseDb):
+class TransactionOut(TransactionBase, BaseDb, Versioned):
     """Fields used when reading a Transaction."""
 
-    # adds `id` from BaseDb
+    # adds `id` from BaseDb & `version`, `updated_at` from Versioned
+
+
+@dataclass
+class TransactionRow:
+    """
+    A Transaction read straight from the database, without validation.
+
+    Much lighter than a TransactionOut when reading many at once; fields
+    are the same & in the same order, so both serialize identically.
+    """
+
+    __slots__ = ("version", "updated_at", "id", "amount", "description",
+                 "payee", "timestamp", "account_id", "spent_from")
+
+    version: int
+    updated_at: datetime
+    id: UUID
+    amount: Decimal
+    description: str
+    payee: str
+    timestamp: datetime
+    account_id: UUID
+    spent_from: Optional[UUID]
+
+
+# where the columns batches continue from are in a selected row
+_TIMESTAMP = TransactionRow.__slots__.index("timestamp")
+_ID = TransactionRow.__slots__.index("id")
+
+
+def _matches_id(
+    transaction_id: Union[str, UUID],
+    timestamp: Optional[datetime],
+) -> sql.Composed:
+    """
+    Match one Transaction by id, searching only its partition.
+
+    Without its timestamp, it's looked up by id in a scalar subquery, so
+    partitions are pruned once that's run.
+    """
+    in_partition = sql.Literal(timestamp) if timestamp is not None \
+        else sql.SQL(
+            '(SELECT "timestamp" FROM transaction_id WHERE id = {id})'
+        ).format(id=sql.Literal(str(transaction_id)))
+
+    return sql.SQL("id = {id} AND {column} = {in_partition}").format(
+        id=sql.Literal(str(transaction_id)),
+        column=sql.Identifier("timestamp"),
+        in_partition=in_partition)
 
 
 class TransactionChanges(Base):
@@ -58,6 +134,7 @@ class TransactionChanges(Base):
     spent_from: Optional[UUID]
 
 
+@traced_methods
 class TransactionCreator(AsyncCreate[TransactionOut]):
     """Extend default create methods."""
 
@@ -86,9 +163,37 @@ class TransactionCreator(AsyncCreate[TransactionOut]):
         return TransactionOut(**query_result[0])
 
 
+@traced_methods
 class TransactionReader(AsyncRead[TransactionOut]):
     """Extended read methods."""
 
+    _client: Client
+
+    def __init__(
+        self,
+        client: Client,
+        table: sql.Identifier,
+        return_constructor: Type[TransactionOut],
+    ) -> None:
+        """Create Transaction reader."""
+        super().__init__(client, table, return_constructor)
+        # the same page is often requested from several devices at once
+        self.single_flight = SingleFlight(client)
+
+    async def one_by_id(self, transaction_id: UUID) -> TransactionOut:
+        """Get a Transaction by id, from its partition only."""
+        query = sql.SQL("""
+            SELECT * FROM {table} WHERE {matches};
+        """).format(
+            table=self._table,
+            matches=_matches_id(transaction_id, None))
+        query_result = await self._client.execute_and_return(query)
+
+        try:
+            return TransactionOut(**query_result[0])
+        except IndexError as err:
+            raise NoResultFound from err
+
     async def many_by_user(
         self,
         user_id: UUID,
@@ -97,16 +202,46 @@ class TransactionReader(AsyncRead[TransactionOut]):
         page: int,
         sort: str,
         **kwargs: Union[Condition, Logical, None],
-    ) -> List[TransactionOut]:
-        """Get list of Transactions for User."""
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Get list of Transactions for User, as rows of TransactionRow fields.
+
+        Transactions sorted by `timestamp` without bounds on it are only
+        read back to the oldest one on the page, found among those from the
+        last RECENT_MONTHS months in the same query, so only the partitions
+        holding the page are read. Every month is read if recent ones don't
+        hold the whole page.
+        """
+        bound = sql.SQL("")
+
+        if sort == "timestamp" and kwargs.get("timestamp") is None:
+            # a scalar subquery, so partitions are pruned once it's run
+            bound = sql.SQL("""
+                AND t.timestamp >= (
+                    SELECT
+                        CASE WHEN count(*) = {needed}
+                        THEN min(newest.timestamp)
+                        ELSE '-infinity' END
+                    FROM (
+                        SELECT t.timestamp
+                        FROM {table} as t
+                        INNER JOIN account as a ON a.id = t.account_id
+                        WHERE a.user_id = {user_id}
+                        AND t.timestamp >= {recent}
+                        {filters}
+                        ORDER BY t.timestamp DESC
+                        LIMIT {needed}
+                    ) AS newest
+                )
+            """).format(
+                needed=sql.Literal((page + 1) * limit),
+                table=self._table,
+                user_id=sql.Literal(user_id),
+                recent=sql.Literal(_months_ago(RECENT_MONTHS)),
+                filters=build_query_filters(kwargs))
+
         query = sql.SQL("""
-            SELECT
-                t.id as id,
-                t.amount as amount,
-                t.payee as payee,
-                t.description as description,
-                t.timestamp as timestamp,
-                t.account_id as account_id
+            SELECT {columns}
             FROM
                 {table} as t
             INNER JOIN
@@ -116,27 +251,94 @@ class TransactionReader(AsyncRead[TransactionOut]):
             WHERE
                 a.user_id = {user_id}
             {filters}
+            {bound}
             {paginate};
         """).format(
+            columns=select_columns(TransactionRow, "t"),
             table=self._table,
             user_id=sql.Literal(user_id),
             filters=build_query_filters(kwargs),
-            paginate=build_pagination_filters(limit, page, sort))
-
-        query_result = await self._client.execute_and_return(query)
-
-        return [TransactionOut(**tran) for tran in query_result]
+            bound=bound,
+            paginate=build_pagination_filters(limit, page, sort, "t"))
 
+        return await self.single_flight.execute_and_return_tuples(
+            "TransactionReader.many_by_user", user_id, query)
 
+    async def batches_by_user(
+        self,
+        user_id: UUID,
+        *,
+        batch_size: int,
+        **kwargs: Union[Condition, Logical, None],
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        """
+        Get every Transaction for User, in batches ordered by timestamp.
+
+        Each batch continues from the last row of the one before, rather
+        than from an offset, so reading deep into a long history is as fast
+        as reading its start. Rows are given as read, in TransactionRow's
+        field order, so they're only built into objects if a format needs.
+        """
+        after: Optional[Tuple[datetime, UUID]] = None
+
+        while True:
+            # the bound on timestamp alone lets partitions before it be
+            # skipped, which the row comparison doesn't
+            continue_from = sql.SQL("") if after is None else sql.SQL(
+                "AND t.timestamp >= {timestamp} "
+                "AND (t.timestamp, t.id) > ({timestamp}, {id})"
+            ).format(timestamp=sql.Literal(after[0]),
+                     id=sql.Literal(after[1]))
+
+            query = sql.SQL("""
+                SELECT {columns}
+                FROM
+                    {table} as t
+                INNER JOIN
+                    account as a
+                ON
+                    a.id = t.account_id
+                WHERE
+                    a.user_id = {user_id}
+                {filters}
+                {continue_from}
+                ORDER BY t.timestamp, t.id
+                LIMIT {batch_size};
+            """).format(
+                columns=select_columns(TransactionRow, "t"),
+                table=self._table,
+                user_id=sql.Literal(user_id),
+                filters=build_query_filters(kwargs),
+                continue_from=continue_from,
+                batch_size=sql.Literal(batch_size))
+
+            batch = await self._client.execute_and_return_tuples(query)
+
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+
+            after = (batch[-1][_TIMESTAMP], batch[-1][_ID])
+
+
+@traced_methods
 class TransactionUpdater(AsyncUpdate[TransactionOut]):
     """Extended update methods."""
 
     async def changes(
         self,
         existing_id: UUID,
-        changes: TransactionChanges
+        changes: TransactionChanges,
+        *,
+        timestamp: Optional[datetime] = None,
     ) -> TransactionOut:
-        """Update existing Transaction with given changes."""
+        """
+        Update existing Transaction with given changes.
+
+        Only its partition is searched for it, found faster given the
+        Transaction's current timestamp.
+        """
         def compose_one_change(change: Tuple[str, Any]) -> sql.Composed:
             key = change[0]
             value = change[1]
@@ -153,12 +355,12 @@ class TransactionUpdater(AsyncUpdate[TransactionOut]):
         query = sql.SQL("""
             UPDATE {table}
             SET {changes}
-            WHERE id = {existing_id}
+            WHERE {matches}
             RETURNING *;
         """).format(
             table=self._table,
             changes=compose_changes(changes.dict()),
-            existing_id=sql.Literal(existing_id),
+            matches=_matches_id(existing_id, timestamp),
         )
         query_result = await self._client.execute_and_return(query)
 
@@ -168,16 +370,46 @@ class TransactionUpdater(AsyncUpdate[TransactionOut]):
             raise NoResultFound from err
 
 
+@traced_methods
+class TransactionDeleter(AsyncDelete[TransactionOut]):
+    """Extended delete methods."""
+
+    async def one_by_id(
+        self,
+        transaction_id: str,
+        *,
+        timestamp: Optional[datetime] = None,
+    ) -> TransactionOut:
+        """
+        Delete a Transaction by id, searching only its partition.
+
+        Found faster given the Transaction's current timestamp.
+        """
+        query = sql.SQL("""
+            DELETE FROM {table} WHERE {matches} RETURNING *;
+        """).format(
+            table=self._table,
+            matches=_matches_id(transaction_id, timestamp))
+        query_result = await self._client.execute_and_return(query)
+
+        try:
+            return TransactionOut(**query_result[0])
+        except IndexError as err:
+            raise NoResultFound from err
+
+
 class TransactionModel(AsyncModel[TransactionOut]):
     """Database queries for Transaction objects."""
 
     create: TransactionCreator
     read: TransactionReader
     update: TransactionUpdater
+    delete: TransactionDeleter
 
-    def __init__(self, client: AsyncClient) -> None:
+    def __init__(self, client: Client) -> None:
         """Override default CRUD methods & defer remaining to super."""
         super().__init__(client, "transaction", TransactionOut)
         self.create = TransactionCreator(client, self.table, TransactionOut)
         self.read = TransactionReader(client, self.table, TransactionOut)
         self.update = TransactionUpdater(client, self.table, TransactionOut)
+        self.delete = TransactionDeleter(client, self.table, TransactionOut)
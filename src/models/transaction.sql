@@ -1,11 +1,87 @@
 SET timezone = 'UTC';
 
+-- Partitioned by month of `timestamp`, so recent activity is read from a
+-- few small partitions & vacuuming stays cheap as history grows. Monthly
+-- partitions are created ahead of time by `manage.py partitions`, in the
+-- `transaction_partitions` schema, which isn't part of the app schema.
 CREATE TABLE IF NOT EXISTS "transaction" (
-    "id" UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    "id" UUID NOT NULL DEFAULT gen_random_uuid(),
     "amount" NUMERIC(11, 2) NOT NULL,
     "description" TEXT,
     "payee" TEXT NOT NULL,
     "timestamp" TIMESTAMPTZ NOT NULL,
     "account_id" UUID NOT NULL,
-    "spent_from" UUID 
+    "spent_from" UUID,
+    "version" BIGINT NOT NULL DEFAULT nextval('change_version'),
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT now(),
+    -- unique keys of a partitioned table must include its partition key
+    PRIMARY KEY ("id", "timestamp")
+) PARTITION BY RANGE ("timestamp");
+
+-- holds any Transaction outside of every monthly partition
+CREATE TABLE IF NOT EXISTS "transaction_default"
+    PARTITION OF "transaction" DEFAULT;
+
+-- The primary key only keeps ids unique within a partition, so every id is
+-- kept here too, once, along with the timestamp finding its partition.
+-- Kept by the triggers below; reads by id look up the timestamp first, so
+-- only that partition is searched.
+CREATE TABLE IF NOT EXISTS "transaction_id" (
+    "id" UUID PRIMARY KEY,
+    "timestamp" TIMESTAMPTZ NOT NULL
 );
+
+CREATE OR REPLACE FUNCTION add_transaction_ids() RETURNS trigger AS $$
+BEGIN
+    -- fails on an id already taken, as a unique key on the table would
+    INSERT INTO transaction_id (id, "timestamp")
+    SELECT id, "timestamp" FROM added;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION move_transaction_ids() RETURNS trigger AS $$
+BEGIN
+    -- only rows with a new id or timestamp, most updates change neither
+    DELETE FROM transaction_id
+    WHERE id IN (
+        SELECT r.id FROM removed AS r
+        LEFT JOIN added AS a
+            ON a.id = r.id AND a."timestamp" = r."timestamp"
+        WHERE a.id IS NULL);
+
+    INSERT INTO transaction_id (id, "timestamp")
+    SELECT a.id, a."timestamp" FROM added AS a
+    LEFT JOIN removed AS r
+        ON r.id = a.id AND r."timestamp" = a."timestamp"
+    WHERE r.id IS NULL;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION remove_transaction_ids() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM transaction_id WHERE id IN (SELECT id FROM removed);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- on the partitioned table, so rows moved between partitions directly,
+-- see `manage.py partitions`, keep their ids
+CREATE TRIGGER add_transaction_ids
+    AFTER INSERT ON "transaction"
+    REFERENCING NEW TABLE AS added
+    FOR EACH STATEMENT EXECUTE FUNCTION add_transaction_ids();
+
+CREATE TRIGGER move_transaction_ids
+    AFTER UPDATE ON "transaction"
+    REFERENCING OLD TABLE AS removed NEW TABLE AS added
+    FOR EACH STATEMENT EXECUTE FUNCTION move_transaction_ids();
+
+CREATE TRIGGER remove_transaction_ids
+    AFTER DELETE ON "transaction"
+    REFERENCING OLD TABLE AS removed
+    FOR EACH STATEMENT EXECUTE FUNCTION remove_transaction_ids();
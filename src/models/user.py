@@ -16,6 +16,7 @@ from db_wrapper.model import (
 from db_wrapper.model.base import NoResultFound
 
 from src.models.base import Base, BaseDb
+from src.tracing import traced_methods
 
 
 class UserBase(Base):  # pylint: disable=R0903
@@ -62,6 +63,7 @@ def create_user_out(user: Dict[str, Any]) -> UserOut:
                    preferred_name=user["preferred_name"])
 
 
+@traced_methods
 class UserCreator(AsyncCreate[UserOut]):  # pylint: disable=R0903
     """User creation methods."""
 
@@ -98,6 +100,7 @@ class UserCreator(AsyncCreate[UserOut]):  # pylint: disable=R0903
         return UserOut(**query_result[0])
 
 
+@traced_methods
 class UserReader(AsyncRead[UserOut]):
     """Extended read methods for UserModel."""
 
@@ -131,6 +134,7 @@ class UserReader(AsyncRead[UserOut]):
             raise NoResultFound from err
 
 
+@traced_methods
 class UserUpdater(AsyncUpdate[UserOut]):
     """Extended Updater for UserModel."""
 
@@ -190,6 +194,7 @@ class UserUpdater(AsyncUpdate[UserOut]):
             raise NoResultFound from err
 
 
+@traced_methods
 class UserDeleter(AsyncDelete[UserOut]):
 
     """Extend default delete behavior."""
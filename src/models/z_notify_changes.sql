@@ -0,0 +1,118 @@
+-- Send a notice on the `hoops_changes` channel for every User with a row
+-- changed by a statement. Notices are only delivered once the statement's
+-- transaction commits. Triggers using these functions must name their
+-- transition table `changed`.
+CREATE OR REPLACE FUNCTION notify_changes() RETURNS trigger AS $$
+DECLARE
+    owner UUID;
+BEGIN
+    FOR owner IN
+        SELECT DISTINCT user_id FROM changed
+    LOOP
+        PERFORM pg_notify(
+            'hoops_changes',
+            json_build_object(
+                'user_id', owner,
+                'collection', TG_TABLE_NAME,
+                'operation', lower(TG_OP)
+            )::text);
+    END LOOP;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transactions belong to a User through their Account
+CREATE OR REPLACE FUNCTION notify_transaction_changes() RETURNS trigger AS $$
+DECLARE
+    owner UUID;
+BEGIN
+    FOR owner IN
+        SELECT DISTINCT a.user_id
+        FROM changed AS t
+        INNER JOIN account AS a ON a.id = t.account_id
+    LOOP
+        PERFORM pg_notify(
+            'hoops_changes',
+            json_build_object(
+                'user_id', owner,
+                'collection', TG_TABLE_NAME,
+                'operation', lower(TG_OP)
+            )::text);
+    END LOOP;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transactions removed along with their Account can't be traced to their
+-- User once it's gone, so the Account's notice is sent for them too, for
+-- every deleted Account, whether it held any Transactions or not
+CREATE OR REPLACE FUNCTION notify_account_deletes() RETURNS trigger AS $$
+DECLARE
+    owner UUID;
+    collection TEXT;
+BEGIN
+    FOR owner IN
+        SELECT DISTINCT user_id FROM changed
+    LOOP
+        FOREACH collection IN ARRAY ARRAY['account', 'transaction']
+        LOOP
+            PERFORM pg_notify(
+                'hoops_changes',
+                json_build_object(
+                    'user_id', owner,
+                    'collection', collection,
+                    'operation', lower(TG_OP)
+                )::text);
+        END LOOP;
+    END LOOP;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notify_account_insert
+    AFTER INSERT ON "account"
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_changes();
+
+CREATE TRIGGER notify_account_update
+    AFTER UPDATE ON "account"
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_changes();
+
+CREATE TRIGGER notify_account_delete
+    AFTER DELETE ON "account"
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_account_deletes();
+
+CREATE TRIGGER notify_envelope_insert
+    AFTER INSERT ON "envelope"
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_changes();
+
+CREATE TRIGGER notify_envelope_update
+    AFTER UPDATE ON "envelope"
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_changes();
+
+CREATE TRIGGER notify_envelope_delete
+    AFTER DELETE ON "envelope"
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_changes();
+
+CREATE TRIGGER notify_transaction_insert
+    AFTER INSERT ON "transaction"
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_transaction_changes();
+
+CREATE TRIGGER notify_transaction_update
+    AFTER UPDATE ON "transaction"
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_transaction_changes();
+
+CREATE TRIGGER notify_transaction_delete
+    AFTER DELETE ON "transaction"
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_transaction_changes();
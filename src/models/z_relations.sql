@@ -21,3 +21,9 @@ ALTER TABLE "transaction"
         FOREIGN KEY(spent_from)
             REFERENCES envelope(id)
             ON DELETE SET NULL;
+
+ALTER TABLE "idempotency_key"
+    ADD CONSTRAINT fk_user
+        FOREIGN KEY(user_id)
+            REFERENCES hoops_user(id)
+            ON DELETE CASCADE;
@@ -0,0 +1,164 @@
+-- Records removed from a User's synced data, kept so clients syncing
+-- changes can be told what to remove too. Transactions removed along with
+-- their Account are covered by the Account's record. Pruned once older
+-- than the sync retention, see SyncDeleter.older_than.
+CREATE TABLE IF NOT EXISTS "deleted_record" (
+    "version" BIGINT PRIMARY KEY DEFAULT nextval('change_version'),
+    "id" UUID NOT NULL,
+    "user_id" UUID NOT NULL,
+    "collection" TEXT NOT NULL,
+    "deleted_at" TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT fk_user
+        FOREIGN KEY(user_id)
+            REFERENCES hoops_user(id)
+            ON DELETE CASCADE
+);
+
+-- Highest version among records pruned from deleted_record, see
+-- SyncDeleter.older_than; syncing from before it could miss a delete
+CREATE TABLE IF NOT EXISTS "pruned_version" (
+    -- only ever one row
+    "id" BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    "version" BIGINT NOT NULL
+);
+
+-- index changes since a version for each User's data
+CREATE INDEX IF NOT EXISTS account_user_id_version
+    ON "account" (user_id, version);
+CREATE INDEX IF NOT EXISTS envelope_user_id_version
+    ON "envelope" (user_id, version);
+CREATE INDEX IF NOT EXISTS transaction_account_id_version
+    ON "transaction" (account_id, version);
+CREATE INDEX IF NOT EXISTS deleted_record_user_id_version
+    ON "deleted_record" (user_id, version);
+
+-- Versions are taken when a record is written, not when its transaction
+-- commits, so a sync could see a version committed while an earlier one is
+-- still in flight, & skip the earlier one for good. So before a
+-- transaction takes its first version, it holds a shared advisory lock
+-- until it ends, keyed by the last version taken so far, which every
+-- version it takes is above. Locks are seen by every session whether or
+-- not their transaction has committed; two-key advisory locks are only
+-- taken here. Runs before each statement, so before any column default.
+CREATE OR REPLACE FUNCTION hold_versions() RETURNS trigger AS $$
+DECLARE
+    taken BIGINT;
+BEGIN
+    IF current_setting('hoops.versions_held', true) IS DISTINCT FROM 'on'
+    THEN
+        SELECT last_value INTO taken FROM change_version;
+        PERFORM pg_advisory_xact_lock_shared(
+            (taken >> 32)::INT, (taken & 4294967295)::BIT(32)::INT);
+        PERFORM set_config('hoops.versions_held', 'on', true);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER hold_account_versions
+    BEFORE INSERT OR UPDATE ON "account"
+    FOR EACH STATEMENT EXECUTE FUNCTION hold_versions();
+
+CREATE TRIGGER hold_envelope_versions
+    BEFORE INSERT OR UPDATE ON "envelope"
+    FOR EACH STATEMENT EXECUTE FUNCTION hold_versions();
+
+CREATE TRIGGER hold_transaction_versions
+    BEFORE INSERT OR UPDATE ON "transaction"
+    FOR EACH STATEMENT EXECUTE FUNCTION hold_versions();
+
+CREATE TRIGGER hold_deleted_record_versions
+    BEFORE INSERT ON "deleted_record"
+    FOR EACH STATEMENT EXECUTE FUNCTION hold_versions();
+
+-- Highest version a sync can return records up to, without skipping one
+-- still in flight, see hold_versions. Must be read before the snapshot the
+-- records are read in, so anything in flight now is either committed by
+-- then, or has its lock counted here.
+CREATE OR REPLACE FUNCTION sync_horizon() RETURNS BIGINT AS $$
+DECLARE
+    taken BIGINT;
+    held BIGINT;
+BEGIN
+    -- versions taken from now on are above this; read first, so versions
+    -- taken before it are either committed or held by now
+    SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END
+    INTO taken
+    FROM change_version;
+
+    SELECT min((classid::BIGINT << 32) | objid::BIGINT)
+    INTO held
+    FROM pg_locks
+    WHERE locktype = 'advisory'
+    AND objsubid = 2
+    AND database = (
+        SELECT oid FROM pg_database WHERE datname = current_database());
+
+    -- least ignores held if no lock is
+    RETURN least(taken, held - 1);
+END;
+$$ LANGUAGE plpgsql;
+
+-- give every changed record a new version
+CREATE OR REPLACE FUNCTION bump_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := nextval('change_version');
+    NEW.updated_at := now();
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bump_account_version
+    BEFORE UPDATE ON "account"
+    FOR EACH ROW EXECUTE FUNCTION bump_version();
+
+CREATE TRIGGER bump_envelope_version
+    BEFORE UPDATE ON "envelope"
+    FOR EACH ROW EXECUTE FUNCTION bump_version();
+
+CREATE TRIGGER bump_transaction_version
+    BEFORE UPDATE ON "transaction"
+    FOR EACH ROW EXECUTE FUNCTION bump_version();
+
+-- keep a record of deleted rows, triggers using these functions must name
+-- their transition table `changed`
+CREATE OR REPLACE FUNCTION record_deletes() RETURNS trigger AS $$
+BEGIN
+    -- skip records removed along with their User
+    INSERT INTO deleted_record (id, user_id, collection)
+    SELECT c.id, c.user_id, TG_TABLE_NAME
+    FROM changed AS c
+    INNER JOIN hoops_user AS u ON u.id = c.user_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transactions belong to a User through their Account
+CREATE OR REPLACE FUNCTION record_transaction_deletes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_record (id, user_id, collection)
+    SELECT t.id, a.user_id, TG_TABLE_NAME
+    FROM changed AS t
+    INNER JOIN account AS a ON a.id = t.account_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER record_account_deletes
+    AFTER DELETE ON "account"
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION record_deletes();
+
+CREATE TRIGGER record_envelope_deletes
+    AFTER DELETE ON "envelope"
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION record_deletes();
+
+CREATE TRIGGER record_transaction_deletes
+    AFTER DELETE ON "transaction"
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION record_transaction_deletes();
@@ -0,0 +1,174 @@
+"""Sample the stacks of every thread in the worker, on demand."""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+import os
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any, DefaultDict, Dict, List, Literal, Optional, Tuple
+
+Mode = Literal["wall", "cpu"]
+# a frame, as function name, file, & line; threads are given as a frame
+# with only a name, at the root of their stacks
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def _stack(frame: Optional[FrameType]) -> List[Frame]:
+    stack: List[Frame] = []
+
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+
+    stack.reverse()
+    return stack
+
+
+def _thread_cpu_time(thread_id: int) -> float:
+    """Get the seconds of CPU time used by a thread so far."""
+    # Unix only, & missing from typeshed's stubs
+    clock = time.pthread_getcpuclockid(thread_id)  # type: ignore
+
+    return time.clock_gettime(clock)
+
+
+def _frame_name(frame: Frame) -> str:
+    name, filename, line = frame
+
+    if not filename:
+        return name
+
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+@dataclass
+class Profile:
+    """Stacks sampled from every thread, weighted by time spent in them."""
+
+    mode: Mode
+    seconds: float
+    # stacks, rooted at their thread's name, to seconds spent in them
+    stacks: DefaultDict[Stack, float] = field(
+        default_factory=lambda: defaultdict(float))
+
+    def collapsed(self) -> str:
+        """
+        Describe the profile as collapsed stacks.
+
+        One stack per line, frames from the root separated by `;`, followed
+        by the microseconds spent in it, as read by `flamegraph.pl` &
+        speedscope.
+        """
+        lines = [
+            ";".join(_frame_name(frame).replace(";", ":") for frame in stack)
+            + f" {round(seconds * 1e6)}"
+            for stack, seconds in sorted(self.stacks.items(),
+                                         key=lambda item: item[1],
+                                         reverse=True)]
+
+        return "".join(f"{line}\n" for line in lines)
+
+    def speedscope(self) -> Dict[str, Any]:
+        """Describe the profile in speedscope's file format."""
+        frames: List[Dict[str, Any]] = []
+        indexes: Dict[Frame, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+
+        for stack, seconds in self.stacks.items():
+            sample = []
+
+            for frame in stack:
+                if frame not in indexes:
+                    indexes[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": filename,
+                                   "line": line})
+                sample.append(indexes[frame])
+
+            samples.append(sample)
+            weights.append(seconds)
+
+        name = f"{self.mode} profile of {self.seconds}s"
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "hoops",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of every thread in the process from a thread of its own.
+
+    In `wall` mode, each stack is weighted by the time between samples, so
+    time spent waiting, e.g. on the database, shows up; in `cpu` mode, by
+    the CPU time its thread used since the last sample, so waiting doesn't.
+    Nothing is installed in the interpreter, so there's no cost outside of
+    a call to `run`.
+    """
+
+    def __init__(self, mode: Mode = "wall", interval: float = 0.01) -> None:
+        self.mode = mode
+        self.interval = interval
+
+    def run(self, seconds: float) -> Profile:
+        """Sample stacks for the given number of seconds, blocking."""
+        profile = Profile(mode=self.mode, seconds=seconds)
+        sampler = threading.get_ident()
+        names = {thread.ident: thread.name
+                 for thread in threading.enumerate()}
+        cpu_times: Dict[int, float] = {}
+        last = time.perf_counter()
+        end = last + seconds
+
+        while True:
+            now = time.perf_counter()
+            # pylint: disable=protected-access
+            frames = sys._current_frames()
+
+            for thread_id, frame in frames.items():
+                if thread_id == sampler:
+                    continue
+
+                if self.mode == "cpu":
+                    try:
+                        used = _thread_cpu_time(thread_id)
+                    except OSError:
+                        # thread finished since its frame was taken
+                        continue
+                    weight = used - cpu_times.get(thread_id, used)
+                    cpu_times[thread_id] = used
+                else:
+                    weight = now - last
+
+                if weight > 0:
+                    if thread_id not in names:
+                        names = {thread.ident: thread.name
+                                 for thread in threading.enumerate()}
+                    root = (names.get(thread_id, str(thread_id)), "", 0)
+                    profile.stacks[(root, *_stack(frame))] += weight
+
+            last = now
+
+            if now >= end:
+                return profile
+
+            time.sleep(min(self.interval, end - now))
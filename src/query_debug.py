@@ -0,0 +1,119 @@
+"""Count statements executed per request & flag repeated ones."""
+
+from contextvars import ContextVar
+import logging
+from typing import Counter, Dict, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database import Params, Query
+from src.slow_queries import fingerprint
+
+logger = logging.getLogger(__name__)
+
+COUNT_HEADER = "X-Query-Count"
+REPEATED_HEADER = "X-Query-Repeated"
+
+
+class QueryLog:
+    """Statements executed while handling a single request, by shape."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        # fingerprint to times executed
+        self.shapes: Counter[str] = Counter()
+        # fingerprint to label of the first statement with it
+        self.labels: Dict[str, str] = {}
+
+    def record(self, label: str, query: Query, params: Params) -> None:
+        """Record a statement, grouped with others of the same shape."""
+        text, _ = fingerprint(query, params)
+        self.count += 1
+        self.shapes[text] += 1
+        self.labels.setdefault(text, label)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, str, int]]:
+        """
+        Get statements executed at least `threshold` times.
+
+        Given as label, fingerprint, & times executed, most executed first.
+        """
+        return [(self.labels[text], text, times)
+                for text, times in self.shapes.most_common()
+                if times >= threshold]
+
+
+# statements executed for the request handled in the current context, if any
+_queries: ContextVar[Optional[QueryLog]] = \
+    ContextVar("query_log", default=None)
+
+
+class QueryDebugMiddleware:
+    """
+    Count every statement executed for a request & flag likely N+1 queries.
+
+    Responses get an `X-Query-Count` header giving the number of statements
+    executed. Statements of the same shape, i.e. differing only in their
+    values, executed at least `repeat_threshold` times are logged & listed
+    in an `X-Query-Repeated` header as `label=times`, since they're usually
+    a query run once per row of another. Streamed responses only count
+    statements executed before their first part is sent.
+
+    Fingerprints every statement, so only meant for development & tests.
+    Statements are only counted once `observe_query` is added to the
+    client's query observers, see ServerTimingMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int = 3) -> None:
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    @staticmethod
+    def observe_query(
+        label: str,
+        query: Query,
+        params: Params,
+        _: float,
+    ) -> None:
+        """Record a statement for the request handled in context, if any."""
+        queries = _queries.get()
+
+        if queries is not None:
+            queries.record(label, query, params)
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Count statements for an HTTP request & add them to its response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = QueryLog()
+        token = _queries.set(queries)
+
+        async def send_counts(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(COUNT_HEADER, str(queries.count))
+
+                repeated = queries.repeated(self.repeat_threshold)
+
+                if repeated:
+                    headers.append(REPEATED_HEADER, ", ".join(
+                        f"{label}={times}" for label, _, times in repeated))
+
+                for label, text, times in repeated:
+                    logger.warning("Possible N+1 query in %s %s: %s executed "
+                                   "%d times: %s", scope["method"],
+                                   scope["path"], label, times, text)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_counts)
+        finally:
+            _queries.reset(token)
@@ -0,0 +1,49 @@
+"""Response classes."""
+
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+import orjson
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from src.tracing import traced_block
+
+
+def _default(value: Any) -> Any:
+    """Convert values orjson can't serialize on its own."""
+    if isinstance(value, BaseModel):
+        # fields only, in the order they're defined; nested Models are
+        # converted as orjson reaches them
+        return value.__dict__
+    if isinstance(value, Decimal):
+        # matches FastAPI's own encoding of Decimals
+        return float(value)
+
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize content to JSON with orjson."""
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson, directly from Models or row objects.
+
+    Returning one of these from a route skips FastAPI's validation &
+    encoding of the route's `response_model`, so it should only be given
+    data read from the database, where it's already trusted. Row
+    dataclasses are serialized by orjson natively.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """Serialize content to JSON."""
+        with traced_block("serialize JSON") as span:
+            body = dump_json(content)
+
+            if span is not None:
+                span.set_attribute("http.response_content_length", len(body))
+
+            return body
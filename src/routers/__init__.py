@@ -1,8 +1,13 @@
 """Sub Routers."""
 
 from .account import create_account
+from .admin import create_admin
 from .balance import create_balance
+from .batch import create_batch
 from .envelope import create_envelope
+from .events import create_events
+from .metrics import create_metrics
+from .sync import create_sync
 from .token import create_token
 from .transaction import create_transaction
 from .status import status
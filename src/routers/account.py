@@ -15,6 +15,7 @@ from src.models import (
     AccountOut,
     AccountModel as Model,
 )
+from src.responses import FastJSONResponse
 from src.security import create_auth_dep
 
 
@@ -48,9 +49,10 @@ def create_account(config: Config, database: Client) -> APIRouter:
         summary="Get the Accounts for the currently authenticated User.")
     async def get(
         user_id: UUID = Depends(auth_user)
-    ) -> List[AccountOut]:
+    ) -> FastJSONResponse:
         """Read all open accounts for given User."""
-        return await model.read.many_by_user(user_id=user_id)
+        return FastJSONResponse(
+            await model.read.many_by_user(user_id=user_id))
 
     @account.put(
         "/{account_id}",
@@ -87,10 +89,10 @@ def create_account(config: Config, database: Client) -> APIRouter:
     )
     async def get_closed(
         user_id: UUID = Depends(auth_user),
-    ) -> List[AccountOut]:
+    ) -> FastJSONResponse:
         """Mark the given account as closed."""
-        return await model.read.many_by_user(
-            user_id, closed=True)
+        return FastJSONResponse(
+            await model.read.many_by_user(user_id, closed=True))
 
     # return router
     return account
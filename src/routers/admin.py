@@ -0,0 +1,105 @@
+"""Routes under `/admin`."""
+
+import asyncio
+import threading
+from typing import List, Literal, Optional
+
+from fastapi import status, Depends, Query
+from fastapi.exceptions import HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.routing import APIRouter
+
+from src.config import Config
+from src.profiler import Mode, SamplingProfiler
+from src.responses import FastJSONResponse
+from src.slow_queries import SlowQuery, SlowQueryLog
+from src.security import create_admin_dep
+
+
+def create_admin(
+    config: Config,
+    slow_queries: Optional[SlowQueryLog],
+) -> APIRouter:
+    """Create a router for diagnosing the running server."""
+    auth_admin = create_admin_dep(config.admin_key)
+
+    admin = APIRouter(prefix="/admin",
+                      tags=["Admin"],
+                      dependencies=[Depends(auth_admin)])
+
+    @admin.get(
+        "/slow-queries",
+        response_model=List[SlowQuery],
+        summary="Fetch the most recent slow database statements.")
+    async def get_slow_queries() -> FastJSONResponse:
+        """
+        Get statements slower than the threshold, most recent first.
+
+        Statements are fingerprinted, with every value replaced by `?`, &
+        given with the types of the values bound to them. Given an explain
+        rate, a sample of reads include the plan captured by EXPLAIN
+        (ANALYZE, BUFFERS), which may only arrive shortly after the
+        statement is first seen.
+        """
+        return FastJSONResponse(
+            slow_queries.recent() if slow_queries is not None else [])
+
+    default_seconds = Query(
+        10,
+        ge=1,
+        le=120,
+        description="Seconds to profile for.")
+    default_mode = Query(
+        "wall",
+        description="Weigh stacks by time passed (`wall`), including time "
+                    "spent waiting, or by CPU time used (`cpu`).")
+    default_format = Query(
+        "collapsed",
+        description="Respond with collapsed stacks, as read by "
+                    "`flamegraph.pl`, or speedscope's JSON format.")
+    default_interval = Query(
+        10,
+        ge=1,
+        le=1000,
+        description="Milliseconds between samples.")
+    # only one profile is taken at a time, so profiling can't pile up
+    profiling = threading.Lock()
+
+    @admin.get(
+        "/profile",
+        summary="Profile the worker handling the request.",
+        responses={200: {"content": {"text/plain": {}}}})
+    async def get_profile(
+        seconds: int = default_seconds,
+        mode: Mode = default_mode,
+        format: Literal[  # pylint: disable=redefined-builtin
+            "collapsed", "speedscope"] = default_format,
+        interval: int = default_interval,
+    ) -> Response:
+        """
+        Sample the stack of every thread in this worker for a while.
+
+        Only the worker handling the request is profiled, from a thread of
+        its own, so requests keep being handled meanwhile. Nothing is
+        sampled outside of these requests.
+        """
+        # not `with`, as a second profile is refused rather than kept waiting
+        if not profiling.acquire(  # pylint: disable=consider-using-with
+                blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This worker is already being profiled.")
+
+        try:
+            profiler = SamplingProfiler(mode, interval / 1000)
+            profile = await asyncio.get_running_loop().run_in_executor(
+                None, profiler.run, seconds)
+        finally:
+            profiling.release()
+
+        if format == "speedscope":
+            return FastJSONResponse(profile.speedscope())
+
+        return PlainTextResponse(profile.collapsed())
+
+    return admin
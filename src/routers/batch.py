@@ -0,0 +1,212 @@
+"""Routes under `/batch`."""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
+
+from fastapi import status as status_code, Depends, Query, Request
+from fastapi.exceptions import HTTPException
+from fastapi.routing import APIRouter
+from pydantic import conlist, validator  # pylint: disable=no-name-in-module
+from starlette.types import ASGIApp, Message, Scope
+
+from src.config import Config
+from src.database import Client
+from src.models.base import Base
+from src.security import create_auth_dep, AUTHENTICATED_USER
+
+MAX_OPERATIONS = 20
+# scope keys copied from the batch request to each of its operations
+_SHARED_SCOPE = ("asgi", "http_version", "scheme", "server", "client")
+# headers copied from the batch request to each of its operations
+_SHARED_HEADERS = (b"authorization", b"accept")
+
+
+class _Failed(Exception):
+    """Raised to roll back an atomic batch when an operation fails."""
+
+
+class BatchOperation(Base):
+    """A single request to be run as part of a batch."""
+
+    method: Literal["GET", "POST", "PUT", "DELETE"]
+    path: str
+    body: Optional[Any]
+
+    # pylint: disable=no-self-argument,no-self-use
+    @validator("path")
+    def path_is_absolute_and_not_batch(cls, value: str) -> str:
+        """Only allow absolute paths to routes other than `/batch`."""
+        if not value.startswith("/"):
+            raise ValueError("path must begin with '/'")
+        if value.partition("?")[0].rstrip("/") == "/batch":
+            raise ValueError("batch requests can't be nested")
+
+        return value
+
+
+class BatchResult(Base):
+    """The outcome of a single operation in a batch."""
+
+    status: int
+    body: Optional[Any]
+
+
+def _in_stages(
+    operations: List[BatchOperation]
+) -> List[List[BatchOperation]]:
+    """
+    Group operations into stages that must be run one after another.
+
+    Consecutive reads are independent of each other & are grouped together
+    to be run concurrently, while each write gets a stage to itself so
+    operations after it see its changes.
+    """
+    stages: List[List[BatchOperation]] = []
+    reads: List[BatchOperation] = []
+
+    for operation in operations:
+        if operation.method == "GET":
+            reads.append(operation)
+            continue
+
+        if reads:
+            stages.append(reads)
+            reads = []
+        stages.append([operation])
+
+    if reads:
+        stages.append(reads)
+
+    return stages
+
+
+async def _dispatch(
+    app: ASGIApp,
+    parent: Scope,
+    operation: BatchOperation,
+    user_id: UUID,
+) -> BatchResult:
+    """Run the given operation against the application in-process."""
+    path, _, query_string = operation.path.partition("?")
+    body = b"" if operation.body is None \
+        else json.dumps(operation.body).encode()
+
+    scope: Dict[str, Any] = {
+        **{key: parent[key] for key in _SHARED_SCOPE if key in parent},
+        "type": "http",
+        "method": operation.method,
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "headers": [
+            *[(key, value) for key, value in parent["headers"]
+              if key in _SHARED_HEADERS],
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        AUTHENTICATED_USER: user_id,
+    }
+
+    status = status_code.HTTP_500_INTERNAL_SERVER_ERROR
+    chunks: List[bytes] = []
+    sent_body = False
+
+    async def receive() -> Message:
+        nonlocal sent_body
+
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        # the batch's client is still connected until every operation is
+        # done, so block until the operation's app stops listening
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+
+    content = b"".join(chunks)
+    try:
+        result_body = json.loads(content) if content else None
+    except ValueError:
+        result_body = content.decode(errors="replace")
+
+    return BatchResult(status=status, body=result_body)
+
+
+def create_batch(config: Config, database: Client) -> APIRouter:
+    """Create a batch router with access to the given database."""
+    # setup User authentication dependency
+    auth_user = create_auth_dep(database, config.jwt_key)
+
+    batch = APIRouter(prefix="/batch", tags=["Batch"])
+
+    default_atomic = Query(
+        False,
+        description="Run all operations in a single database transaction, "
+        "stopping & rolling back all changes at the first failure.")
+
+    @batch.post(
+        "",
+        response_model=List[BatchResult],
+        summary="Run multiple operations in a single request.")
+    async def post_root(
+        request: Request,
+        operations: conlist(  # type: ignore
+            BatchOperation, min_items=1, max_items=MAX_OPERATIONS),
+        atomic: bool = default_atomic,
+        user_id: UUID = Depends(auth_user),
+    ) -> List[BatchResult]:
+        """
+        Run the given operations in order & return each of their results.
+
+        Operations are authenticated once for the whole batch. Consecutive
+        reads are run concurrently, everything else is run one at a time.
+        """
+        results: List[BatchResult] = []
+
+        async def run(operation: BatchOperation) -> BatchResult:
+            return await _dispatch(request.app,
+                                   request.scope,
+                                   operation,
+                                   user_id)
+
+        if not atomic:
+            for stage in _in_stages(operations):
+                results.extend(
+                    await asyncio.gather(*[run(op) for op in stage]))
+
+            return results
+
+        # a transaction holds one connection, so operations in it must be
+        # run one at a time
+        try:
+            async with database.transaction():
+                for operation in operations:
+                    result = await run(operation)
+                    results.append(result)
+
+                    if result.status >= 400:
+                        raise _Failed()
+        except _Failed as exc:
+            raise HTTPException(
+                status_code=status_code.HTTP_409_CONFLICT,
+                detail={
+                    "message": "An operation failed, no changes were saved.",
+                    "results": [result.dict() for result in results],
+                }) from exc
+
+        return results
+
+    return batch
@@ -19,6 +19,7 @@ from src.models import (
     EnvelopeModel as Model
 )
 from src.models.amount import Amount
+from src.responses import FastJSONResponse
 from src.security import create_auth_dep
 
 
@@ -53,8 +54,8 @@ def create_envelope(config: Config, database: Client) -> APIRouter:
     )
     async def get_root(
         user_id: UUID = Depends(auth_user)
-    ) -> List[EnvelopeOut]:
-        return await model.read.many_by_user(user_id)
+    ) -> FastJSONResponse:
+        return FastJSONResponse(await model.read.many_by_user(user_id))
 
     @envelope.get(
         "/{envelope_id}",
@@ -0,0 +1,71 @@
+"""Routes under `/events`."""
+
+import asyncio
+from typing import AsyncIterator
+from uuid import UUID
+
+from fastapi import Depends
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRouter
+
+from src.config import Config
+from src.database import Client
+from src.events import ChangeBroker
+from src.security import create_auth_dep
+
+# send a comment at least this often to keep idle connections open
+KEEPALIVE_SECONDS = 15
+# ask clients to wait this long before reconnecting
+RETRY_MILLISECONDS = 5000
+
+
+def create_events(
+    config: Config,
+    database: Client,
+    broker: ChangeBroker,
+) -> APIRouter:
+    """Create an events router streaming notices from the given broker."""
+    # setup User authentication dependency
+    auth_user = create_auth_dep(database, config.jwt_key)
+
+    events = APIRouter(prefix="/events", tags=["Events"])
+
+    @events.get(
+        "",
+        response_class=StreamingResponse,
+        summary="Stream notices of changes to the current User's data.")
+    async def get_root(
+        user_id: UUID = Depends(auth_user)
+    ) -> StreamingResponse:
+        """
+        Stream change notices as Server-Sent Events.
+
+        An event is sent whenever the User's Accounts, Envelopes, or
+        Transactions are created, changed, or deleted, named for the type
+        of data changed, so clients only need to fetch again when told to.
+        """
+        async def stream() -> AsyncIterator[str]:
+            async with broker.subscribe(user_id) as queue:
+                yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+                while True:
+                    try:
+                        change = await asyncio.wait_for(queue.get(),
+                                                        KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+
+                    yield f"event: {change.collection}\n" \
+                        f"data: {change.json()}\n\n"
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                # stop reverse proxies from holding events in a buffer
+                "X-Accel-Buffering": "no",
+            })
+
+    return events
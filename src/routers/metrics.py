@@ -0,0 +1,34 @@
+"""Routes under `/metrics`."""
+
+from fastapi import Depends, Response
+from fastapi.routing import APIRouter
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from src.config import Config
+from src.metrics import Metrics
+from src.security import create_admin_dep
+
+
+def create_metrics(config: Config, metrics: Metrics) -> APIRouter:
+    """Create a router exposing the given metrics for scraping."""
+    auth_admin = create_admin_dep(config.admin_key)
+
+    router = APIRouter(prefix="/metrics",
+                       tags=["Metrics"],
+                       dependencies=[Depends(auth_admin)])
+
+    @router.get(
+        "",
+        response_class=Response,
+        summary="Scrape metrics in the Prometheus text format.")
+    async def get_root() -> Response:
+        """
+        Get request, query, transaction, & cache metrics.
+
+        Nothing here is specific to a User, but routes & query labels are
+        exposed, so the scraper must give the admin key in the X-Admin-Key
+        header, like the `/admin` routes.
+        """
+        return Response(metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+    return router
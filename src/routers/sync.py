@@ -0,0 +1,65 @@
+"""Routes under `/sync`."""
+
+from uuid import UUID
+
+from fastapi import Depends, Query, status
+from fastapi.exceptions import HTTPException
+from fastapi.routing import APIRouter
+
+from src.config import Config
+from src.database import Client
+from src.models import SyncChanges, SyncModel as Model, SyncTokenExpired
+from src.responses import FastJSONResponse
+from src.security import create_auth_dep
+
+
+def create_sync(config: Config, database: Client) -> APIRouter:
+    """Create a sync router & model with access to the given database."""
+    # setup db & Sync model
+    model = Model(database)
+    # setup User auth dependency
+    auth_user = create_auth_dep(database, config.jwt_key)
+
+    # setup router
+    sync = APIRouter(prefix="/sync", tags=["Sync"])
+
+    default_since = Query(
+        0,
+        ge=0,
+        description="Token returned by the last sync; "
+        "omit to get all data.")
+    default_limit = Query(
+        500,
+        ge=1,
+        le=5000,
+        description="Return at most this many of each type of record.")
+
+    @sync.get(
+        "",
+        response_model=SyncChanges,
+        summary="Get changes to the current User's data since a sync token.")
+    async def get_root(
+        since: int = default_since,
+        limit: int = default_limit,
+        user_id: UUID = Depends(auth_user),
+    ) -> FastJSONResponse:
+        """
+        Get Accounts, Envelopes, & Transactions changed since given token.
+
+        Also lists records deleted since then. Sync again from the returned
+        token to get later changes; if `more` is true, there are more
+        changes waiting already. Deleted records are only kept for a while,
+        so tokens older than that are refused with 410 Gone, & the User's
+        data must be synced again from the start.
+        """
+        try:
+            changes = await model.read.since(user_id, since, limit)
+        except SyncTokenExpired as exc:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync token has expired; sync from the start.",
+            ) from exc
+
+        return FastJSONResponse(changes)
+
+    return sync
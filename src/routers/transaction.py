@@ -5,7 +5,8 @@ from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import status as status_code, Depends, Query
+from fastapi import status as status_code, Depends, Header, Query
+from fastapi.responses import Response, StreamingResponse
 from fastapi.routing import APIRouter
 
 from src.config import Config
@@ -15,6 +16,7 @@ from src.models import (
     TransactionOut,
     TransactionChanges,
     TransactionModel as Model,
+    TransactionRow,
     AccountModel,
 )
 from src.models.filters import (
@@ -23,6 +25,13 @@ from src.models.filters import (
     less_than_or_equal_to,
     logical_and,
 )
+from src.formats import (
+    choose_media_type,
+    rows_response,
+    rows_stream,
+    ARROW,
+    MSGPACK,
+)
 from src.routers.helpers.filters import a_b_both_or_none
 from src.security import create_auth_dep, UnauthorizedException
 
@@ -85,11 +94,18 @@ def create_transaction(config: Config, database: Client) -> APIRouter:
     default_before = Query(
         None,
         description="Only return Transactions before the given date & time.")
+    default_accept = Header(
+        None,
+        description=("Respond with JSON, MessagePack "
+                     f"(`{MSGPACK}`), or Arrow (`{ARROW}`)."))
+    # rows read per query while exporting
+    export_batch_size = 5000
 
     @transaction.get(
         "",
         response_model=List[TransactionOut],
-        summary="Fetch all Transactions for the authenticated User.")
+        summary="Fetch all Transactions for the authenticated User.",
+        responses={200: {"content": {MSGPACK: {}, ARROW: {}}}})
     async def get_root(
         user_id: UUID = Depends(auth_user),
         account_id: Optional[UUID] = default_account_id,
@@ -101,7 +117,8 @@ def create_transaction(config: Config, database: Client) -> APIRouter:
         limit: Optional[int] = default_limit,
         page: Optional[int] = default_page,
         sort: Optional[str] = default_sort,
-    ) -> List[TransactionOut]:
+        accept: Optional[str] = default_accept,
+    ) -> Response:
         """Get all Transactions."""
         amount = a_b_both_or_none(minimum_amount,
                                   maximum_amount,
@@ -114,7 +131,7 @@ def create_transaction(config: Config, database: Client) -> APIRouter:
                                      less_than_or_equal_to,
                                      logical_and)
 
-        return await model.read.many_by_user(
+        rows = await model.read.many_by_user(
             user_id,
             # mypy can't tell these have default values given by Query
             limit=limit,  # type: ignore
@@ -125,6 +142,35 @@ def create_transaction(config: Config, database: Client) -> APIRouter:
             amount=amount,
             timestamp=timestamp)
 
+        return rows_response(rows, TransactionRow, choose_media_type(accept))
+
+    @transaction.get(
+        "/export",
+        response_model=List[TransactionOut],
+        summary="Export every Transaction for the authenticated User.",
+        responses={200: {"content": {MSGPACK: {}, ARROW: {}}}})
+    async def get_export(
+        user_id: UUID = Depends(auth_user),
+        account_id: Optional[UUID] = default_account_id,
+        after: Optional[datetime] = default_after,
+        before: Optional[datetime] = default_before,
+        accept: Optional[str] = default_accept,
+    ) -> StreamingResponse:
+        """Stream all Transactions, oldest first, as they're read."""
+        timestamp = a_b_both_or_none(after,
+                                     before,
+                                     greater_than_or_equal_to,
+                                     less_than_or_equal_to,
+                                     logical_and)
+
+        return rows_stream(
+            model.read.batches_by_user(user_id,
+                                       batch_size=export_batch_size,
+                                       account_id=equals(account_id),
+                                       timestamp=timestamp),
+            TransactionRow,
+            choose_media_type(accept))
+
     @transaction.put(
         "/{transaction_id}",
         response_model=TransactionOut,
@@ -143,7 +189,9 @@ def create_transaction(config: Config, database: Client) -> APIRouter:
         except AssertionError as exc:
             raise UnauthorizedException from exc
 
-        return await model.update.changes(transaction_id, changes)
+        return await model.update.changes(transaction_id,
+                                          changes,
+                                          timestamp=tran.timestamp)
 
     @transaction.delete(
         "/{transaction_id}",
@@ -162,7 +210,8 @@ def create_transaction(config: Config, database: Client) -> APIRouter:
         except AssertionError as exc:
             raise UnauthorizedException from exc
 
-        return await model.delete.one_by_id(str(transaction_id))
+        return await model.delete.one_by_id(str(transaction_id),
+                                            timestamp=tran.timestamp)
 
     @transaction.put(
         "/{transaction_id}/spent_from/{spent_from_id}",
@@ -184,6 +233,7 @@ def create_transaction(config: Config, database: Client) -> APIRouter:
 
         return await model.update.changes(transaction_id,
                                           TransactionChanges(
-                                              spent_from=spent_from_id))
+                                              spent_from=spent_from_id),
+                                          timestamp=tran.timestamp)
 
     return transaction
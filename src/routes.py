@@ -0,0 +1,57 @@
+"""Look up the route handling a request."""
+
+from typing import Any, Callable, Dict, Optional
+import weakref
+
+from starlette.requests import HTTPConnection
+from starlette.routing import Match
+from starlette.types import ASGIApp, Scope
+
+Templates = Dict[Callable[..., Any], str]
+
+# each app's route endpoints mapped to their path templates
+_templates: "weakref.WeakKeyDictionary[ASGIApp, Templates]" = \
+    weakref.WeakKeyDictionary()
+
+
+def route_template(request: HTTPConnection) -> Optional[str]:
+    """
+    Get the path template of the route matching the given request.
+
+    Templates keep their parameters unfilled, e.g. `/account/{account_id}`,
+    so every request to a route gets the same template. Returns None if no
+    route matches the request.
+    """
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+
+        if match == Match.FULL:
+            path: Optional[str] = getattr(route, "path", None)
+            return path
+
+    return None
+
+
+def endpoint_template(scope: Scope) -> Optional[str]:
+    """
+    Get the path template of the route a request was dispatched to.
+
+    Much cheaper than route_template, but only once the request has
+    reached the router, which leaves the endpoint it matched in the scope.
+    Returns None if no route matched.
+    """
+    endpoint = scope.get("endpoint")
+
+    if endpoint is None:
+        return None
+
+    app = scope["app"]
+    templates = _templates.get(app)
+
+    if templates is None:
+        templates = {route.endpoint: route.path
+                     for route in app.router.routes
+                     if hasattr(route, "endpoint") and hasattr(route, "path")}
+        _templates[app] = templates
+
+    return templates.get(endpoint)
@@ -1,23 +1,30 @@
 """Security constants & methods."""
 
 from datetime import datetime, timedelta
-from typing import Any, Awaitable, Callable, Protocol
+import hmac
+from typing import Any, Awaitable, Callable, Optional
 from uuid import UUID
 
 from db_wrapper.model.base import NoResultFound
-from fastapi import status as status_code, Depends
+from fastapi import status as status_code, Depends, Request
 from fastapi.exceptions import HTTPException
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import JWTError, jwt
+from starlette.requests import HTTPConnection
 
 from src.database import Client
 from src.models import UserModel
+from src.tracing import set_user, traced
 
 
 ALGORITHM = "HS256"
 TOKEN_EXPIRE_MINUTES = 30
+# ASGI scope key holding the User already authenticated for a request that
+# is dispatched internally (e.g. an operation in a `/batch` request)
+AUTHENTICATED_USER = "hoops.authenticated_user"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+admin_key_scheme = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 
 
 class CredentialsException(HTTPException):
@@ -54,24 +61,55 @@ def encode_token(
     return jwt.encode(data, key, algorithm=ALGORITHM)  # type: ignore
 
 
+def decode_token(token: str, key: str) -> UUID:
+    """Get the User ID from the given JWT."""
+    try:
+        payload = jwt.decode(token, key, algorithms=[ALGORITHM])
+        id_str = payload.get("sub")
+
+        if id_str is None:
+            raise CredentialsException()
+
+        return UUID(str(id_str))
+    except (JWTError, ValueError) as err:
+        raise CredentialsException() from err
+
+
+def user_id_from_request(request: HTTPConnection, key: str) -> Optional[UUID]:
+    """
+    Get the User ID from a request's token, if it has a valid one.
+
+    Doesn't check the User exists, so this is only suitable for deciding how
+    to handle a request before it reaches a route's authentication.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+
+    if scheme.lower() != "bearer":
+        return None
+
+    try:
+        return decode_token(token, key)
+    except CredentialsException:
+        return None
+
+
 def create_auth_dep(
     database: Client,
     key: str,
-) -> Callable[[str], Awaitable[UUID]]:
+) -> Callable[..., Awaitable[UUID]]:
+    @traced("auth_user")
     async def auth_user(
+        request: Request,
         token: str = Depends(oauth2_scheme)
     ) -> UUID:
         """Get current user ID from token."""
-        try:
-            payload = jwt.decode(token, key, algorithms=[ALGORITHM])
-            id_str = payload.get("sub")
+        authenticated: Optional[UUID] = request.scope.get(AUTHENTICATED_USER)
 
-            if id_str is None:
-                raise CredentialsException()
-        except JWTError as err:
-            raise CredentialsException() from err
+        if authenticated is not None:
+            set_user(authenticated)
+            return authenticated
 
-        user_id = UUID(id_str)
+        user_id = decode_token(token, key)
         user_model = UserModel(database)
 
         try:
@@ -79,6 +117,26 @@ def create_auth_dep(
         except NoResultFound:
             raise CredentialsException()
 
+        set_user(user_id)
         return user_id
 
     return auth_user
+
+
+def create_admin_dep(key: Optional[str]) -> Callable[..., Awaitable[None]]:
+    """
+    Create a dependency only allowing requests with the admin key.
+
+    Admin routes don't exist as far as clients can tell if no key is set.
+    """
+    async def auth_admin(
+        given: Optional[str] = Depends(admin_key_scheme),
+    ) -> None:
+        """Check the request gives the admin key."""
+        if key is None:
+            raise HTTPException(status_code=status_code.HTTP_404_NOT_FOUND)
+
+        if given is None or not hmac.compare_digest(given, key):
+            raise UnauthorizedException()
+
+    return auth_admin
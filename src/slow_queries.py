@@ -0,0 +1,190 @@
+"""Log slow statements, with the plan Postgres chose for some of them."""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import random
+import re
+from typing import Deque, Dict, List, Optional, Set, Tuple, Union
+
+from db_wrapper import AsyncClient, ConnectionParameters
+from db_wrapper.model import sql
+
+from src.database import Client, Params, Query
+
+logger = logging.getLogger(__name__)
+
+# literals in statements given as plain strings
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+# only statements that can't change anything are explained, since
+# EXPLAIN ANALYZE executes the statement it explains
+_READ_STATEMENT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+Shape = Union[List[str], Dict[str, str]]
+
+
+@dataclass
+class SlowQuery:
+    """A statement that took longer than the threshold."""
+
+    label: str
+    # statement with every value replaced by `?`, whitespace collapsed
+    fingerprint: str
+    # short hash of the fingerprint, for grouping statements
+    fingerprint_id: str
+    # type of each value bound to the statement, in order or by name
+    parameters: Shape
+    milliseconds: float
+    executed_at: datetime
+    # output of EXPLAIN (ANALYZE, BUFFERS), if the statement was sampled
+    plan: Optional[str] = None
+
+
+def _walk(
+    query: sql.Composable,
+    parts: List[str],
+    shape: List[str],
+) -> None:
+    if isinstance(query, sql.Composed):
+        for part in query.seq:
+            _walk(part, parts, shape)
+    elif isinstance(query, sql.SQL):
+        parts.append(query.string)
+    elif isinstance(query, sql.Identifier):
+        parts.append(".".join(f'"{name}"' for name in query.strings))
+    elif isinstance(query, sql.Literal):
+        parts.append("?")
+        shape.append(type(query.wrapped).__name__)
+    elif isinstance(query, sql.Placeholder):
+        parts.append("?")
+
+
+def fingerprint(query: Query, params: Params = None) -> Tuple[str, Shape]:
+    """
+    Get a statement's fingerprint & the shape of the values bound to it.
+
+    Statements differing only in their values get the same fingerprint, so
+    every call of a reader method with the same filters is grouped, while
+    different filter & sort combinations are told apart.
+    """
+    values: List[str] = []
+
+    if isinstance(query, str):
+        text = _NUMBER_LITERAL.sub("?", _STRING_LITERAL.sub("?", query))
+    else:
+        parts: List[str] = []
+        _walk(query, parts, values)
+        text = "".join(parts)
+
+    shape: Shape = values
+
+    if params:
+        shape = {str(key): type(value).__name__
+                 for key, value in params.items()}
+
+    return " ".join(text.split()), shape
+
+
+def fingerprint_id(text: str) -> str:
+    """Get a short hash of a fingerprint, for grouping statements."""
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    """
+    Keep the most recent statements slower than a threshold.
+
+    Every slow statement is logged & kept, up to `size` of them, oldest
+    dropped first. Given an explain rate, a sample of slow reads is
+    explained again with EXPLAIN (ANALYZE, BUFFERS) on a connection of its
+    own, in a read only transaction that's rolled back, one at a time so a
+    burst of slow statements can't pile more load onto the database.
+    """
+
+    def __init__(
+        self,
+        database: Client,
+        connection_params: ConnectionParameters,
+        threshold: timedelta,
+        explain_rate: float = 0,
+        size: int = 100,
+    ) -> None:
+        self._connection_params = connection_params
+        self.threshold = threshold.total_seconds()
+        self.explain_rate = explain_rate
+        self.entries: Deque[SlowQuery] = deque(maxlen=size)
+        self._explaining: Set["asyncio.Task[None]"] = set()
+
+        database.add_query_observer(self.observe_query)
+
+    def observe_query(
+        self,
+        label: str,
+        query: Query,
+        params: Params,
+        seconds: float,
+    ) -> None:
+        """Keep the statement if it was slow."""
+        if seconds < self.threshold:
+            return
+
+        text, shape = fingerprint(query, params)
+        entry = SlowQuery(
+            label=label,
+            fingerprint=text,
+            fingerprint_id=fingerprint_id(text),
+            parameters=shape,
+            milliseconds=round(seconds * 1000, 3),
+            executed_at=datetime.now(timezone.utc))
+        self.entries.append(entry)
+
+        logger.warning("Slow query (%.1fms) %s [%s]: %s %s",
+                       entry.milliseconds, label, entry.fingerprint_id,
+                       text, shape)
+
+        if not self._explaining \
+                and _READ_STATEMENT.match(text) \
+                and random.random() < self.explain_rate:
+            task = asyncio.get_running_loop().create_task(
+                self._explain(entry, query, params))
+            self._explaining.add(task)
+            task.add_done_callback(self._explaining.discard)
+
+    async def _explain(
+        self,
+        entry: SlowQuery,
+        query: Query,
+        params: Params,
+    ) -> None:
+        statement = sql.SQL(query) if isinstance(query, str) else query
+        connection = AsyncClient(self._connection_params)
+
+        try:
+            await connection.connect()
+            await connection.execute("BEGIN READ ONLY;")
+            try:
+                rows = await connection.execute_and_return(
+                    sql.SQL("EXPLAIN (ANALYZE, BUFFERS) {statement}").format(
+                        statement=statement),
+                    params)
+            finally:
+                await connection.execute("ROLLBACK;")
+            entry.plan = "\n".join(row["QUERY PLAN"] for row in rows)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Unable to explain slow query %s: %s",
+                           entry.fingerprint_id, exc)
+        finally:
+            await connection.disconnect()
+
+    def recent(self) -> List[SlowQuery]:
+        """Get the statements kept, most recent first."""
+        return list(reversed(self.entries))
+
+    async def stop(self) -> None:
+        """Wait for any statement being explained."""
+        if self._explaining:
+            await asyncio.gather(*self._explaining, return_exceptions=True)
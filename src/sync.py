@@ -0,0 +1,30 @@
+"""Prune records kept only so clients can sync changes."""
+
+import asyncio
+from datetime import timedelta
+import logging
+
+from psycopg2 import Error as DatabaseError
+
+from src.database import Client
+from src.models import SyncModel
+
+logger = logging.getLogger(__name__)
+
+
+async def remove_old_deleted_records(
+    database: Client,
+    retention: timedelta,
+    interval: timedelta = timedelta(hours=1),
+) -> None:
+    """Remove deleted records older than retention every interval, forever."""
+    model = SyncModel(database)
+
+    while True:
+        try:
+            await model.delete.older_than(retention)
+        except DatabaseError as exc:
+            # the database may be back by the next interval
+            logger.warning("Old deleted records not removed: %s", exc)
+
+        await asyncio.sleep(interval.total_seconds())
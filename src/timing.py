@@ -0,0 +1,102 @@
+"""Report time spent on database queries in `Server-Timing` headers."""
+
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database import Params, Query
+
+
+class QueryTimings:
+    """Statements executed while handling a single request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_label: Optional[str] = None
+        self.slowest_seconds = 0.0
+
+    def record(self, label: str, seconds: float) -> None:
+        """Record a statement & how long it took."""
+        self.count += 1
+        self.seconds += seconds
+
+        if seconds >= self.slowest_seconds:
+            self.slowest_label = label
+            self.slowest_seconds = seconds
+
+    def header(self) -> str:
+        """Describe the statements as a `Server-Timing` header value."""
+        plural = "query" if self.count == 1 else "queries"
+        metrics = [
+            f'db;dur={self.seconds * 1000:.2f};desc="{self.count} {plural}"']
+
+        if self.slowest_label is not None:
+            metrics.append(f"db-slowest;dur={self.slowest_seconds * 1000:.2f}"
+                           f';desc="{self.slowest_label}"')
+
+        return ", ".join(metrics)
+
+
+# timings for the request being handled in the current context, if any
+_timings: ContextVar[Optional[QueryTimings]] = \
+    ContextVar("query_timings", default=None)
+
+
+class ServerTimingMiddleware:
+    """
+    Time every statement executed for a request & report it to the client.
+
+    Responses get a `Server-Timing` header giving the number of statements
+    executed & their total duration as `db`, & the label & duration of the
+    slowest as `db-slowest`. Streamed responses only report statements
+    executed before their first part is sent.
+
+    Statements are only timed once `observe_query` is added to the client's
+    query observers, which is done apart from the middleware as it's
+    created again each time the app's middleware stack is built.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    @staticmethod
+    def observe_query(
+        label: str,
+        _: Query,
+        __: Params,
+        seconds: float,
+    ) -> None:
+        """Record a statement for the request handled in context, if any."""
+        timings = _timings.get()
+
+        if timings is not None:
+            timings.record(label, seconds)
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Collect timings for an HTTP request & add them to its response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # tasks started while handling the request get the same timings
+        timings = QueryTimings()
+        token = _timings.set(timings)
+
+        async def send_timings(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timings)
+        finally:
+            _timings.reset(token)
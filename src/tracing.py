@@ -0,0 +1,227 @@
+"""Trace requests through middleware, routes, models, & the database."""
+
+from contextlib import contextmanager
+import functools
+import hashlib
+import inspect
+import os
+from time import time_ns
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+from uuid import UUID
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database import Params, Query
+from src.routes import endpoint_template
+from src.slow_queries import fingerprint, fingerprint_id
+
+SERVICE_NAME = "hoops"
+
+Function = TypeVar("Function", bound=Callable[..., Awaitable[Any]])
+Class = TypeVar("Class", bound=type)
+
+_tracer = trace.get_tracer(__name__)
+# holds the provider once tracing is configured; until then, nothing is
+# traced & traced functions are called directly
+_configured: List[TracerProvider] = []
+
+
+def create_span_exporter(destination: str) -> SpanExporter:
+    """
+    Create a span exporter writing to the given destination.
+
+    Destinations are either `console`, writing spans to stdout, or
+    `file:<path>`, appending spans to a file, one JSON object per line.
+    """
+    if destination == "console":
+        return ConsoleSpanExporter(service_name=SERVICE_NAME)
+
+    if destination.startswith("file:"):
+        # pylint: disable=consider-using-with
+        out = open(destination[len("file:"):], "a", buffering=1,
+                   encoding="UTF-8")
+
+        return ConsoleSpanExporter(
+            service_name=SERVICE_NAME,
+            out=out,
+            formatter=lambda span: span.to_json(indent=None) + os.linesep)
+
+    raise ValueError(f"Unknown trace exporter: {destination}")
+
+
+def configure_tracing(
+    exporter: SpanExporter,
+    sample_rate: float = 1.0,
+) -> TracerProvider:
+    """
+    Start tracing, exporting spans with the given exporter.
+
+    Only the given share of traces is sampled, unless a request continues
+    a trace already sampled or not by the client. Tracing is configured
+    once per process; later calls return the provider already in use.
+    """
+    if not _configured:
+        provider = TracerProvider(
+            sampler=ParentBased(TraceIdRatioBased(sample_rate)),
+            resource=Resource.create({"service.name": SERVICE_NAME}))
+        # spans are exported from a separate thread, in batches
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        _configured.append(provider)
+
+    return _configured[0]
+
+
+def user_id_hash(user_id: UUID) -> str:
+    """Hash a User ID, so traces can be grouped by User without it."""
+    return hashlib.sha256(str(user_id).encode()).hexdigest()[:16]
+
+
+def set_user(user_id: UUID) -> None:
+    """Identify the User a request is for on the current span."""
+    if _configured:
+        trace.get_current_span().set_attribute(
+            "enduser.id_hash", user_id_hash(user_id))
+
+
+@contextmanager
+def traced_block(name: str) -> Iterator[Optional[Span]]:
+    """Trace the block in context as a span, if tracing."""
+    if not _configured:
+        yield None
+        return
+
+    with _tracer.start_as_current_span(name) as span:
+        yield span
+
+
+def traced(name: str) -> Callable[[Function], Function]:
+    """
+    Trace every call of an async function as a span with the given name.
+
+    Calls returning a list are given the number of rows returned.
+    """
+    def decorator(function: Function) -> Function:
+        @functools.wraps(function)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _configured:
+                return await function(*args, **kwargs)
+
+            with _tracer.start_as_current_span(name) as span:
+                result = await function(*args, **kwargs)
+
+                if isinstance(result, list) and span.is_recording():
+                    span.set_attribute("db.rows", len(result))
+
+                return result
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def traced_methods(cls: Class) -> Class:
+    """
+    Trace every public async method of a class, including inherited ones.
+
+    Spans are named for the class & method, e.g.
+    `TransactionReader.one_by_id`.
+    """
+    for name, method in inspect.getmembers(cls, inspect.iscoroutinefunction):
+        if not name.startswith("_"):
+            setattr(cls, name, traced(f"{cls.__name__}.{name}")(method))
+
+    return cls
+
+
+class TracingMiddleware:
+    """
+    Trace every HTTP request, continuing the client's trace if given one.
+
+    Each request gets a server span named for its method & route template,
+    under which every traced middleware, dependency, model method, &
+    statement executed for it is nested. Statements only get spans once
+    `observe_query` is added to the client's query observers, see
+    ServerTimingMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    @staticmethod
+    def observe_query(
+        label: str,
+        query: Query,
+        params: Params,
+        seconds: float,
+    ) -> None:
+        """Record a statement as a span of the trace in context, if any."""
+        # statements outside a sampled trace aren't worth fingerprinting
+        if not trace.get_current_span().is_recording():
+            return
+
+        text, _ = fingerprint(query, params)
+        end = time_ns()
+        span = _tracer.start_span(f"SQL {label}",
+                                  kind=SpanKind.CLIENT,
+                                  start_time=end - int(seconds * 1e9))
+        span.set_attribute("db.system", "postgresql")
+        span.set_attribute("db.statement", text)
+        span.set_attribute("db.fingerprint", fingerprint_id(text))
+        span.end(end_time=end)
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Trace an HTTP request."""
+        if scope["type"] != "http" or not _configured:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {name.decode("latin-1"): value.decode("latin-1")
+                   for name, value in scope["headers"]}
+
+        with _tracer.start_as_current_span(
+            scope["method"],
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+        ) as span:
+            span.set_attribute("http.method", scope["method"])
+            span.set_attribute("http.target", scope["path"])
+
+            async def send_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_status)
+            finally:
+                template = endpoint_template(scope)
+
+                if template is not None:
+                    span.set_attribute("http.route", template)
+                    span.update_name(f"{scope['method']} {template}")
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Any, Dict
 from uuid import uuid1
 
@@ -15,5 +16,7 @@ class EnvelopeOut:
             "user_id": uuid1(),
             "name": "envelope",
             "total_funds": 0,
+            "version": 1,
+            "updated_at": datetime.now(timezone.utc),
             **kwargs,
         })
@@ -46,14 +46,16 @@ def get_token_header(user_id: UUID) -> Dict[str, str]:
 
 
 def get_test_app(
-    routes: List[Tuple[str, str, Callable[..., Any]]]
+    routes: List[Tuple[str, str, Callable[..., Any]]],
+    **config_options: Any,
 ) -> Callable[[], Awaitable[AppGetter]]:
     async def getter() -> Tuple[FastAPI, Client]:
         db_config, db_client = await get_test_db()
 
         test_config = AppConfig(
             database=db_config,
-            jwt_key=FAKE_KEY)
+            jwt_key=FAKE_KEY,
+            **config_options)
         test_app = create_app(test_config)
         test_app_with_routes = _add_test_routes(test_app, routes)
 
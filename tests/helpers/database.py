@@ -1,8 +1,10 @@
 """Test helper methods."""
 
 from decimal import Decimal
+from functools import lru_cache
+import os
 from typing import Any, Dict, List, Optional, Tuple, TypeVar
-from uuid import UUID
+from uuid import UUID, uuid4
 from unittest.mock import Mock
 
 from db_wrapper.model import (
@@ -11,7 +13,13 @@ from db_wrapper.model import (
     AsyncModel,
 )
 
-from manage import sync, Config as ManageConfig
+from manage import (
+    _replace_db,
+    _server_cursor,
+    _template_name,
+    template,
+    Config as ManageConfig,
+)
 
 from src.database import ConnectionParameters, Client
 
@@ -46,50 +54,67 @@ def mock_model(model: AnyAsyncModel) -> AnyAsyncModel:
 
     return model
 
+
 #
 # TEST DB MANAGEMENT
 #
 
+# test database connection data, as run by test.docker-compose.yml
+TEST_DB = ManageConfig('test', 'pass', 'localhost', 9432, 'test')
+# app schema is built into this once per run, & copied for every test
+TEMPLATE_NAME = _template_name(TEST_DB)
+# tests run in parallel are each given a worker, with a database of its own
+WORKER = os.getenv('PYTEST_XDIST_WORKER') or os.getenv('TEST_WORKER')
+WORKER_DB = ManageConfig(**{  # type: ignore
+    **TEST_DB.__dict__,
+    'name': f'{TEST_DB.name}_{WORKER}' if WORKER else TEST_DB.name,
+})
+# identifies the run the template was built for, shared by its workers
+RUN_ID = os.getenv('PYTEST_XDIST_TESTRUNUID') \
+    or os.getenv('TEST_RUN_ID') \
+    or uuid4().hex
+
+
+@lru_cache(maxsize=None)
+def build_test_template() -> None:
+    """
+    Build the app schema into the template database, once per run.
+
+    The first worker of a run to get here builds it, while the others wait
+    on a lock; then every test gets a copy, which takes a fraction of the
+    time of diffing & applying the schema to each test's database.
+    """
+    with _server_cursor(TEST_DB) as cursor:
+        cursor.execute('SELECT pg_advisory_lock(hashtext(%s));',
+                       (TEMPLATE_NAME,))
+        cursor.execute("""
+            SELECT shobj_description(oid, 'pg_database')
+            FROM pg_database
+            WHERE datname = %s;
+        """, (TEMPLATE_NAME,))
+        built_for = cursor.fetchone()
+
+        if built_for is None or built_for[0] != RUN_ID:
+            template(['silent'], TEST_DB)
+            cursor.execute(sql.SQL('COMMENT ON DATABASE {name} IS {run};')
+                           .format(name=sql.Identifier(TEMPLATE_NAME),
+                                   run=sql.Literal(RUN_ID)))
+        # lock is released as the connection closes
 
-async def clear_test_db(
-    db_client: Client,
-    config: ConnectionParameters
-) -> None:
-    """Drop all public in given database client."""
-    query = sql.SQL("""
-        DROP SCHEMA public CASCADE;
-        CREATE SCHEMA public;
-        GRANT ALL ON SCHEMA public TO {user};
-        GRANT ALL ON SCHEMA public TO public;
-        COMMENT ON SCHEMA public IS 'standard public schema';
-    """).format(user=sql.Identifier(config.user))
 
-    await db_client.connect()
-    await db_client.execute(query)
-    await db_client.disconnect()
+async def get_test_db() -> Tuple[ConnectionParameters, Client]:
+    """Copy a fresh test database from the template & return a client."""
+    build_test_template()
 
+    # replace whatever an earlier test left in this worker's database
+    with _server_cursor(TEST_DB) as cursor:
+        _replace_db(cursor, WORKER_DB.name, TEMPLATE_NAME)
 
-async def get_test_db() -> Tuple[ConnectionParameters, Client]:
-    """Create database client & return it."""
-    # test database connection data
-    user = 'test'
-    password = 'pass'
-    host = 'localhost'
-    port = 9432
-    database = 'test'
-
-    # create app database client
-    test_db_params = ConnectionParameters(host, port, user, password, database)
-    test_client = Client(test_db_params)
-
-    # drop any existing test tables
-    await clear_test_db(test_client, test_db_params)
-
-    # rebuild database from app model schema
-    config = ManageConfig(user, password, host, port, database)
-    sync(['silent', 'noprompt'], config)
-
-    return test_db_params, test_client
+    test_db_params = ConnectionParameters(
+        WORKER_DB.host, WORKER_DB.port, WORKER_DB.user, WORKER_DB.password,
+        WORKER_DB.name)
+
+    return test_db_params, Client(test_db_params)
 
 
 #
@@ -0,0 +1,82 @@
+"""Apps built by `create_app` on a client answering without a database."""
+
+import asyncio
+from typing import Any, List, Tuple
+from unittest import TestCase
+from unittest.mock import patch
+
+from db_wrapper import AsyncClient
+from db_wrapper.model import sql
+from fastapi import FastAPI
+
+from src import create_app
+from src.config import Config as AppConfig
+from src.database import create_client, create_conn_config, Client, Query
+from src.tracing import traced_methods
+
+FAKE_KEY = "fake_key"
+# every statement is answered with these rows
+ROWS = [{"id": 1}, {"id": 2}]
+
+
+def one_query(item_id: int) -> sql.Composed:
+    """Build a query for a single item."""
+    return sql.SQL("SELECT * FROM item WHERE id = {id};").format(
+        id=sql.Literal(item_id))
+
+
+@traced_methods
+class ItemReader:
+    """Reader executing its queries through a client."""
+
+    def __init__(self, client: Client) -> None:
+        self.client = client
+
+    async def many(self, limit: int = 2) -> List[Any]:
+        """Execute a query for many items."""
+        rows: List[Any] = await self.client.execute_and_return(
+            sql.SQL("SELECT * FROM item LIMIT {limit};").format(
+                limit=sql.Literal(limit)))
+        return rows
+
+    async def one(self, item_id: int) -> None:
+        """Execute a query for a single item."""
+        await self.client.execute_and_return(one_query(item_id))
+
+    async def slow(self) -> None:
+        """Execute a slow query."""
+        await self.client.execute_and_return("SELECT pg_sleep(1);")
+
+
+async def answer(query: Query, _: Any = None) -> List[Any]:
+    """Answer a statement with ROWS, taking a while if it's slow."""
+    if "pg_sleep" in str(query):
+        await asyncio.sleep(0.02)
+    return ROWS
+
+
+def get_offline_app(
+    test: TestCase,
+    **config_options: Any,
+) -> Tuple[FastAPI, Client]:
+    """
+    Create an app with `create_app` & the client it executes statements on.
+
+    Statements are answered by `answer` until the test is done. Lifespan
+    events aren't run, so nothing connects; routes added to the app can
+    read through an ItemReader on the client.
+    """
+    patcher = patch.object(AsyncClient, "execute_and_return",
+                           side_effect=answer)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+    database = create_client(create_conn_config())
+    config = AppConfig(database=create_conn_config(),
+                       jwt_key=FAKE_KEY,
+                       **config_options)
+
+    with patch("src.app.create_client", return_value=database):
+        app = create_app(config)
+
+    return app, database
@@ -0,0 +1,111 @@
+"""A fake Redis server, speaking just enough RESP for the response cache."""
+
+import asyncio
+from contextlib import asynccontextmanager
+import time
+from typing import AsyncGenerator, Dict, List, Optional, Set, Tuple
+
+
+class FakeRedis:
+    """
+    In-process server answering GET, SET (with PX), INCR, SELECT & PING.
+
+    Every command received is kept in `commands` for tests to inspect.
+    """
+
+    def __init__(self) -> None:
+        self.values: Dict[bytes, Tuple[Optional[float], bytes]] = {}
+        self.commands: List[List[bytes]] = []
+        self.port = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        """Listen on a free local port."""
+        self._server = await asyncio.start_server(
+            self._serve, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening & close every client's connection."""
+        for writer in list(self._clients):
+            writer.close()
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        expires, value = self.values.get(key, (None, None))
+
+        if expires is not None and expires <= time.monotonic():
+            del self.values[key]
+            return None
+
+        return value
+
+    def _reply(self, command: List[bytes]) -> bytes:
+        name = command[0].upper()
+
+        if name in (b"PING", b"SELECT", b"AUTH"):
+            return b"+OK\r\n"
+
+        if name == b"GET":
+            value = self._get(command[1])
+            return b"$-1\r\n" if value is None \
+                else b"$%d\r\n%s\r\n" % (len(value), value)
+
+        if name == b"SET":
+            expires = None
+            if len(command) == 5 and command[3].upper() == b"PX":
+                expires = time.monotonic() + int(command[4]) / 1000
+            self.values[command[1]] = (expires, command[2])
+            return b"+OK\r\n"
+
+        if name == b"INCR":
+            count = int(self._get(command[1]) or 0) + 1
+            self.values[command[1]] = (None, str(count).encode())
+            return b":%d\r\n" % count
+
+        return b"-ERR unknown command\r\n"
+
+    async def _serve(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self._clients.add(writer)
+
+        try:
+            while True:
+                header = await reader.readline()
+
+                if not header:
+                    break
+
+                command = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    argument = await reader.readexactly(length + 2)
+                    command.append(argument[:-2])
+
+                self.commands.append(command)
+                writer.write(self._reply(command))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+
+@asynccontextmanager
+async def fake_redis() -> AsyncGenerator[FakeRedis, None]:
+    """Run a fake Redis server for the duration of the context."""
+    server = FakeRedis()
+    await server.start()
+
+    try:
+        yield server
+    finally:
+        await server.stop()
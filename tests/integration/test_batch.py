@@ -0,0 +1,143 @@
+"""Tests for /batch routes."""
+
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+
+from db_wrapper.model import sql
+
+# internal test dependencies
+from tests.helpers.application import (
+    get_test_client,
+    get_token_header,
+)
+from tests.helpers.database import setup_user, setup_account
+
+BASE_URL = "/batch"
+
+
+class TestRoutePostRoot(TestCase):
+    """Tests for `POST /batch`."""
+
+    async def test_valid_request(self) -> None:
+        """Testing a valid request's response."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            await setup_account(database, user_id)
+
+            response = await client.post(
+                BASE_URL,
+                headers={
+                    **get_token_header(user_id),
+                    "accept": "application/json"},
+                json=[
+                    {"method": "GET", "path": "/account"},
+                    {"method": "GET", "path": "/balance/available"},
+                    {"method": "POST",
+                     "path": "/account",
+                     "body": {"name": "a new account"}},
+                    {"method": "GET", "path": "/account"},
+                ])
+
+            with self.subTest(
+                    msg="Responds with a status code of 200."):
+                self.assertEqual(200, response.status_code)
+
+            body = response.json()
+
+            with self.subTest(
+                    msg="Responds with a result for each operation."):
+                self.assertEqual(len(body), 4)
+
+            with self.subTest(
+                    msg="Each result has the operation's status code."):
+                self.assertEqual([result["status"] for result in body],
+                                 [200, 200, 201, 200])
+
+            with self.subTest(
+                    msg="Operations see changes made by earlier writes."):
+                self.assertEqual(len(body[0]["body"]), 1)
+                self.assertEqual(len(body[3]["body"]), 2)
+
+    async def test_failed_operation_doesnt_fail_batch(self) -> None:
+        """A failed operation only changes that operation's result."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+
+            response = await client.post(
+                BASE_URL,
+                headers={
+                    **get_token_header(user_id),
+                    "accept": "application/json"},
+                json=[
+                    {"method": "GET", "path": "/not_a_route"},
+                    {"method": "GET", "path": "/user"},
+                ])
+
+            with self.subTest(
+                    msg="Responds with a status code of 200."):
+                self.assertEqual(200, response.status_code)
+
+            with self.subTest(
+                    msg="Each result has the operation's status code."):
+                self.assertEqual(
+                    [result["status"] for result in response.json()],
+                    [404, 200])
+
+    async def test_atomic_batch_rolls_back_on_failure(self) -> None:
+        """Responds 409 & saves nothing if an atomic operation fails."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+
+            response = await client.post(
+                f"{BASE_URL}?atomic=true",
+                headers={
+                    **get_token_header(user_id),
+                    "accept": "application/json"},
+                json=[
+                    {"method": "POST",
+                     "path": "/account",
+                     "body": {"name": "a new account"}},
+                    {"method": "POST",
+                     "path": "/account",
+                     "body": {"not_a_field": "value"}},
+                ])
+
+            with self.subTest(
+                    msg="Responds with a status code of 409."):
+                self.assertEqual(409, response.status_code)
+
+            with self.subTest(
+                    msg="No Accounts were saved to the database."):
+                await database.connect()
+                query_result = await database.execute_and_return(sql.SQL("""
+                    SELECT * FROM account
+                    WHERE user_id = {user_id};
+                """).format(user_id=sql.Literal(user_id)))
+                await database.disconnect()
+
+                self.assertEqual(len(query_result), 0)
+
+    async def test_cant_nest_batches(self) -> None:
+        """Responds 422 when an operation is another batch."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+
+            response = await client.post(
+                BASE_URL,
+                headers={
+                    **get_token_header(user_id),
+                    "accept": "application/json"},
+                json=[{"method": "POST", "path": "/batch", "body": []}])
+
+        self.assertEqual(422, response.status_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Tests for cached responses."""
+
+from datetime import timedelta
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+
+# internal test dependencies
+from tests.helpers.application import (
+    get_test_app,
+    get_test_client,
+    get_token_header,
+)
+from tests.helpers.database import setup_user
+from tests.helpers.redis import fake_redis
+
+CACHED_ROUTES = {"/balance/total": timedelta(minutes=1)}
+
+
+class TestResponseCache(TestCase):
+    """Tests for caching responses to GET requests."""
+
+    async def test_repeated_request_is_cached(self) -> None:
+        """Testing a repeated request, then a write by the same User."""
+        getter = get_test_app([],
+                              cache_url="memory",
+                              cache_ttls=CACHED_ROUTES)
+
+        async with get_test_client(getter) as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json"}
+
+            first = await client.get("/balance/total", headers=headers)
+            second = await client.get("/balance/total", headers=headers)
+
+            with self.subTest(
+                    msg="Repeated request is sent the cached response."):
+                self.assertEqual(first.headers["x-cache"], "miss")
+                self.assertEqual(second.headers["x-cache"], "hit")
+                self.assertEqual(second.json(), first.json())
+
+            await client.post("/account",
+                              headers=headers,
+                              json={"name": "an account"})
+            third = await client.get("/balance/total", headers=headers)
+
+            with self.subTest(
+                    msg="User's writes expire their cached responses."):
+                self.assertEqual(third.headers["x-cache"], "miss")
+
+            other = await client.get("/account", headers=headers)
+
+            with self.subTest(
+                    msg="Routes without a TTL aren't cached."):
+                self.assertNotIn("x-cache", other.headers)
+
+    async def test_redis_backend(self) -> None:
+        """Testing responses cached in a Redis server."""
+        async with fake_redis() as server:
+            getter = get_test_app(
+                [],
+                cache_url=f"redis://localhost:{server.port}",
+                cache_ttls=CACHED_ROUTES)
+
+            async with get_test_client(getter) as clients:
+                client, database = clients
+
+                user_id = await setup_user(database)
+                headers = {
+                    **get_token_header(user_id),
+                    "accept": "application/json"}
+
+                await client.get("/balance/total", headers=headers)
+                response = await client.get("/balance/total", headers=headers)
+
+            with self.subTest(
+                    msg="Repeated request is sent the cached response."):
+                self.assertEqual(response.headers["x-cache"], "hit")
+
+            with self.subTest(
+                    msg="Response is stored in the server."):
+                self.assertIn(b"SET", [command[0]
+                                       for command in server.commands])
+
+
+if __name__ == "__main__":
+    main()
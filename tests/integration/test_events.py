@@ -0,0 +1,169 @@
+"""Tests for change notices sent to /events."""
+
+import asyncio
+from decimal import Decimal
+import json
+from typing import Any, Dict, List
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from uuid import uuid4
+
+from asgi_lifespan import LifespanManager
+from db_wrapper.model import sql
+
+# internal test dependencies
+from tests.helpers.application import get_test_app, get_token_header
+from tests.helpers.database import (
+    get_test_db,
+    setup_user,
+    setup_account,
+    setup_transactions,
+)
+
+from src.events import ChangeBroker
+
+
+class TestChangeBroker(TestCase):
+    """Tests for passing change notices from the database to subscribers."""
+
+    async def test_write_sends_notice_to_owner(self) -> None:
+        """A subscriber is sent a notice when their data is changed."""
+        db_config, database = await get_test_db()
+        broker = ChangeBroker(db_config)
+        await broker.start()
+
+        try:
+            user_id = await setup_user(database)
+
+            async with broker.subscribe(user_id) as queue:
+                await setup_account(database, user_id)
+                change = await asyncio.wait_for(queue.get(), 5)
+
+            with self.subTest(msg="Notice names the type of data changed."):
+                self.assertEqual(change.collection, "account")
+            with self.subTest(msg="Notice names the change made."):
+                self.assertEqual(change.operation, "insert")
+        finally:
+            await broker.stop()
+
+    async def test_account_delete_sends_transaction_notice(self) -> None:
+        """Transactions deleted along with their Account are noticed."""
+        db_config, database = await get_test_db()
+        broker = ChangeBroker(db_config)
+        await broker.start()
+
+        try:
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(database, [Decimal(1)], account_id)
+
+            async with broker.subscribe(user_id) as queue:
+                await database.connect()
+                await database.execute(
+                    sql.SQL("DELETE FROM account WHERE id = {id};").format(
+                        id=sql.Literal(account_id)))
+                await database.disconnect()
+                changes = [await asyncio.wait_for(queue.get(), 5)
+                           for _ in range(2)]
+
+            self.assertEqual(
+                {(change.collection, change.operation) for change in changes},
+                {("account", "delete"), ("transaction", "delete")})
+        finally:
+            await broker.stop()
+
+    async def test_notices_only_sent_to_owner(self) -> None:
+        """Subscribers only get notices for their own User."""
+        db_config, _ = await get_test_db()
+        broker = ChangeBroker(db_config)
+        user_id = uuid4()
+        other_id = uuid4()
+
+        async with broker.subscribe(user_id) as first, \
+                broker.subscribe(user_id) as second, \
+                broker.subscribe(other_id) as other:
+            broker.publish(json.dumps({
+                "user_id": str(user_id),
+                "collection": "transaction",
+                "operation": "update",
+            }))
+
+            with self.subTest(msg="Every subscriber for User gets notice."):
+                self.assertEqual(first.qsize(), 1)
+                self.assertEqual(second.qsize(), 1)
+            with self.subTest(msg="Other Users' subscribers don't."):
+                self.assertEqual(other.qsize(), 0)
+
+
+class TestRouteGetRoot(TestCase):
+    """Tests for `GET /events`."""
+
+    async def test_change_streamed(self) -> None:
+        """A change to the User's data is sent down the stream."""
+        app, database = await get_test_app([])()
+        user_id = await setup_user(database)
+        # the whole response is read before httpx returns it, so the stream
+        # is read from the app directly, until the client disconnects
+        received: "asyncio.Queue[bytes]" = asyncio.Queue()
+        requested = False
+        done = asyncio.Event()
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b""}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.body":
+                received.put_nowait(message.get("body", b""))
+
+        headers = [(key.lower().encode(), value.encode())
+                   for key, value in get_token_header(user_id).items()]
+
+        async with LifespanManager(app):
+            request = asyncio.create_task(app({
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/events",
+                "raw_path": b"/events",
+                "query_string": b"",
+                "root_path": "",
+                "headers": headers,
+                "client": ("127.0.0.1", 1234),
+                "server": ("localhost", 8000),
+            }, receive, send))
+
+            try:
+                # subscribed once the first event is sent
+                chunks: List[bytes] = [
+                    await asyncio.wait_for(received.get(), 5)]
+                await setup_account(database, user_id)
+
+                while b"event: account" not in b"".join(chunks):
+                    chunks.append(await asyncio.wait_for(received.get(), 5))
+            finally:
+                done.set()
+                await asyncio.wait_for(request, 5)
+
+        events = b"".join(chunks).decode()
+
+        with self.subTest(msg="Clients are told how long to wait to retry."):
+            self.assertTrue(events.startswith("retry: "))
+        with self.subTest(msg="Event is named for the type of data changed."):
+            self.assertIn("event: account\n", events)
+        with self.subTest(msg="Event data describes the change."):
+            data = events.split("event: account\ndata: ")[1].split("\n")[0]
+            self.assertEqual(json.loads(data), {
+                "user_id": str(user_id),
+                "collection": "account",
+                "operation": "insert",
+            })
+
+
+if __name__ == "__main__":
+    main()
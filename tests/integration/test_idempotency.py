@@ -0,0 +1,203 @@
+"""Tests for requests sent with an Idempotency-Key."""
+
+from datetime import datetime, timedelta
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+
+from db_wrapper.model import sql
+from jose import jwt
+
+# internal test dependencies
+from tests.helpers.application import (
+    get_test_client,
+    get_token_header,
+    FAKE_KEY,
+)
+from tests.helpers.database import setup_user
+
+
+class TestIdempotencyKey(TestCase):
+    """Tests for the Idempotency-Key header on mutating requests."""
+
+    async def test_retried_request_is_replayed(self) -> None:
+        """Testing a request retried with the same key."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json",
+                "idempotency-key": "a key"}
+
+            first = await client.post("/account",
+                                      headers=headers,
+                                      json={"name": "an account"})
+            second = await client.post("/account",
+                                       headers=headers,
+                                       json={"name": "an account"})
+
+            with self.subTest(
+                    msg="Retry is sent the first response again."):
+                self.assertEqual(second.status_code, first.status_code)
+                self.assertEqual(second.json(), first.json())
+
+            with self.subTest(
+                    msg="Retry is marked as a replayed response."):
+                self.assertNotIn("idempotent-replayed", first.headers)
+                self.assertEqual(second.headers["idempotent-replayed"],
+                                 "true")
+
+            with self.subTest(
+                    msg="Retry doesn't create another Account."):
+                await database.connect()
+                result = await database.execute_and_return(sql.SQL("""
+                    SELECT count(*) AS count
+                    FROM account
+                    WHERE user_id = {user_id};
+                """).format(user_id=sql.Literal(user_id)))
+                await database.disconnect()
+
+                self.assertEqual(result[0]["count"], 1)
+
+    async def test_key_reused_for_another_request(self) -> None:
+        """Testing a key reused for a request to a different route."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json",
+                "idempotency-key": "a key"}
+
+            await client.post("/account",
+                              headers=headers,
+                              json={"name": "an account"})
+            response = await client.post("/envelope",
+                                         headers=headers,
+                                         json={"name": "an envelope"})
+
+            with self.subTest(
+                    msg="Responds with a status code of 422."):
+                self.assertEqual(422, response.status_code)
+
+    async def test_abandoned_key_is_taken_over(self) -> None:
+        """Testing a key left reserved by a request that never finished."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json",
+                "idempotency-key": "a key"}
+
+            async def reserve(age: timedelta) -> None:
+                await database.connect()
+                await database.execute(sql.SQL("""
+                    INSERT INTO idempotency_key
+                        (user_id, key, method, path, reserved_at)
+                    VALUES
+                        ({user_id}, 'a key', 'POST', '/account',
+                         now() - {age})
+                    ON CONFLICT (user_id, key) DO UPDATE
+                    SET reserved_at = EXCLUDED.reserved_at;
+                """).format(user_id=sql.Literal(user_id),
+                            age=sql.Literal(age)))
+                await database.disconnect()
+
+            await reserve(timedelta(seconds=1))
+            running = await client.post("/account",
+                                        headers=headers,
+                                        json={"name": "an account"})
+
+            await reserve(timedelta(hours=1))
+            retried = await client.post("/account",
+                                        headers=headers,
+                                        json={"name": "an account"})
+            replayed = await client.post("/account",
+                                         headers=headers,
+                                         json={"name": "an account"})
+
+            with self.subTest(
+                    msg="Retries are refused while the request may run."):
+                self.assertEqual(409, running.status_code)
+
+            with self.subTest(
+                    msg="Retries are handled once the lease is up."):
+                self.assertEqual(201, retried.status_code)
+
+            with self.subTest(
+                    msg="Its response is saved for later retries."):
+                self.assertEqual(replayed.json(), retried.json())
+                self.assertEqual(replayed.headers["idempotent-replayed"],
+                                 "true")
+
+    async def test_requests_without_key(self) -> None:
+        """Testing requests sent without a key are handled every time."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json"}
+
+            first = await client.post("/account",
+                                      headers=headers,
+                                      json={"name": "an account"})
+            second = await client.post("/account",
+                                       headers=headers,
+                                       json={"name": "an account"})
+
+            with self.subTest(
+                    msg="Each request creates a new Account."):
+                self.assertNotEqual(first.json()["id"], second.json()["id"])
+
+    async def test_key_from_deleted_user(self) -> None:
+        """Testing a key sent with a valid token for a deleted User."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            await database.connect()
+            await database.execute(sql.SQL("""
+                DELETE FROM hoops_user WHERE id = {user_id};
+            """).format(user_id=sql.Literal(user_id)))
+            await database.disconnect()
+
+            response = await client.post("/account",
+                                         headers={
+                                             **get_token_header(user_id),
+                                             "accept": "application/json",
+                                             "idempotency-key": "a key"},
+                                         json={"name": "an account"})
+
+            with self.subTest(
+                    msg="Responds with a status code of 401."):
+                self.assertEqual(401, response.status_code)
+
+    async def test_key_with_malformed_user_id(self) -> None:
+        """Testing a key sent with a token for an ID that isn't a UUID."""
+        async with get_test_client() as clients:
+            client, _ = clients
+
+            token = jwt.encode(
+                {"sub": "not a uuid",
+                 "exp": datetime.utcnow() + timedelta(minutes=5)},
+                FAKE_KEY, algorithm="HS256")
+            response = await client.post("/account",
+                                         headers={
+                                             "authorization":
+                                                 f"Bearer {token}",
+                                             "accept": "application/json",
+                                             "idempotency-key": "a key"},
+                                         json={"name": "an account"})
+
+            with self.subTest(
+                    msg="Responds with a status code of 401."):
+                self.assertEqual(401, response.status_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Tests for the number of statements each route executes."""
+
+from decimal import Decimal
+from typing import Dict, List, Tuple
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+
+# internal test dependencies
+from tests.helpers.application import (
+    get_test_app,
+    get_test_client,
+    get_token_header,
+)
+from tests.helpers.database import (
+    setup_user,
+    setup_account,
+    setup_envelope,
+)
+
+# most statements each route may execute, including authentication; a
+# route executing a statement per row fails once it's given a few rows
+BUDGETS: List[Tuple[str, str, int]] = [
+    ("get", "/user", 2),
+    ("get", "/account", 2),
+    ("get", "/account/closed", 2),
+    ("get", "/transaction", 2),
+    ("get", "/transaction?limit=2&page=2", 2),
+    ("get", "/envelope", 2),
+    ("get", "/envelope/{envelope_id}", 2),
+    ("get", "/balance/total", 2),
+    ("get", "/balance/available", 2),
+    ("get", "/balance/account/{account_id}", 2),
+    ("get", "/balance/envelope/{envelope_id}", 2),
+    # the sync horizon is read before the records
+    ("get", "/sync", 6),
+    ("put", "/envelope/{envelope_id}/funds/1", 4),
+    ("put", "/transaction/{transaction_id}/spent_from/{envelope_id}", 4),
+]
+
+
+class TestQueryBudgets(TestCase):
+    """Tests for statements executed per route."""
+
+    async def test_budgets(self) -> None:
+        """Routes stay within their budget, whatever the number of rows."""
+        async with get_test_client(get_test_app([], query_debug=True)) \
+                as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            envelope_id = await setup_envelope(
+                database,
+                user_id,
+                account_id,
+                [Decimal(10), Decimal(20), Decimal(30), Decimal(40)])
+            headers = get_token_header(user_id)
+            transactions = await client.get("/transaction", headers=headers)
+            ids: Dict[str, str] = {
+                "account_id": str(account_id),
+                "envelope_id": str(envelope_id),
+                "transaction_id": transactions.json()[0]["id"],
+            }
+
+            for method, path, budget in BUDGETS:
+                url = path.format(**ids)
+                response = await getattr(client, method)(url,
+                                                         headers=headers)
+
+                with self.subTest(
+                        msg=f"{method.upper()} {path} responds with a "
+                            "status code of 200."):
+                    self.assertEqual(200, response.status_code)
+
+                with self.subTest(
+                        msg=f"{method.upper()} {path} executes at most "
+                            f"{budget} statements."):
+                    self.assertLessEqual(
+                        int(response.headers["x-query-count"]), budget)
+
+                with self.subTest(
+                        msg=f"{method.upper()} {path} repeats no "
+                            "statements."):
+                    self.assertNotIn("x-query-repeated", response.headers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Tests for /sync routes."""
+
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from uuid import UUID
+
+from db_wrapper.model import sql
+
+# internal test dependencies
+from tests.helpers.application import (
+    get_test_client,
+    get_token_header,
+)
+from tests.helpers.database import (
+    setup_user,
+    setup_account,
+    setup_transactions,
+)
+
+from src.models import SyncModel
+
+BASE_URL = "/sync"
+
+
+def insert_envelope(user_id: UUID, name: str) -> sql.Composed:
+    """Build a statement adding an Envelope for a User."""
+    return sql.SQL("""
+        INSERT INTO envelope(name, user_id, total_funds)
+        VALUES ({name}, {user_id}, 0);
+    """).format(name=sql.Literal(name), user_id=sql.Literal(user_id))
+
+
+class TestRouteGetRoot(TestCase):
+    """Tests for `GET /sync`."""
+
+    async def test_valid_request(self) -> None:
+        """Testing a valid request's response."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(database,
+                                     [Decimal(1), Decimal(2)],
+                                     account_id)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json"}
+
+            first = await client.get(BASE_URL, headers=headers)
+
+            with self.subTest(
+                    msg="Responds with a status code of 200."):
+                self.assertEqual(200, first.status_code)
+
+            with self.subTest(
+                    msg="First sync responds with all of the User's data."):
+                body = first.json()
+
+                self.assertEqual(len(body["accounts"]), 1)
+                self.assertEqual(len(body["transactions"]), 2)
+                self.assertFalse(body["more"])
+
+            await client.put(f"/account/{account_id}",
+                             headers=headers,
+                             json={"name": "new name"})
+            second = await client.get(
+                f"{BASE_URL}?since={first.json()['token']}",
+                headers=headers)
+
+            with self.subTest(
+                    msg="Later syncs only respond with changed records."):
+                body = second.json()
+
+                self.assertEqual(len(body["accounts"]), 1)
+                self.assertEqual(body["accounts"][0]["name"], "new name")
+                self.assertEqual(len(body["transactions"]), 0)
+
+            transaction_id = first.json()["transactions"][0]["id"]
+            await client.delete(f"/transaction/{transaction_id}",
+                                headers=headers)
+            third = await client.get(
+                f"{BASE_URL}?since={second.json()['token']}",
+                headers=headers)
+
+            with self.subTest(
+                    msg="Later syncs respond with deleted records."):
+                body = third.json()
+
+                self.assertEqual(len(body["deleted"]), 1)
+                self.assertEqual(body["deleted"][0]["id"], transaction_id)
+                self.assertEqual(body["deleted"][0]["collection"],
+                                 "transaction")
+
+    async def test_limit_splits_changes_without_gaps(self) -> None:
+        """Syncing repeatedly with a limit gets every change exactly once."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(database,
+                                     [Decimal(n) for n in range(5)],
+                                     account_id)
+            await database.connect()
+            await database.execute(insert_envelope(user_id, "envelope"))
+            await database.disconnect()
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json"}
+
+            token = 0
+            seen = []
+            more = True
+
+            while more:
+                response = await client.get(
+                    f"{BASE_URL}?since={token}&limit=2",
+                    headers=headers)
+                body = response.json()
+                seen += [item["id"]
+                         for key in ("accounts", "envelopes", "transactions")
+                         for item in body[key]]
+                token = body["token"]
+                more = body["more"]
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    async def test_change_in_flight_is_not_skipped(self) -> None:
+        """A change committed after a later one is still synced."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json"}
+            inserted = asyncio.Event()
+            commit = asyncio.Event()
+
+            async def insert_in_flight() -> None:
+                # run in a task of its own, so only it uses the transaction
+                async with database.transaction():
+                    await database.execute(
+                        insert_envelope(user_id, "in flight"))
+                    inserted.set()
+                    await commit.wait()
+
+            await database.connect()
+            writer = asyncio.create_task(insert_in_flight())
+            await inserted.wait()
+            await database.execute(insert_envelope(user_id, "committed"))
+
+            first = (await client.get(BASE_URL, headers=headers)).json()
+            commit.set()
+            await writer
+            second = (await client.get(
+                f"{BASE_URL}?since={first['token']}",
+                headers=headers)).json()
+            await database.disconnect()
+
+        with self.subTest(
+                msg="Changes after one in flight aren't synced yet."):
+            self.assertEqual(first["envelopes"], [])
+        with self.subTest(msg="Both are synced once it's committed."):
+            self.assertEqual(
+                sorted(envelope["name"] for envelope in second["envelopes"]),
+                ["committed", "in flight"])
+
+    async def test_token_before_pruned_deletes(self) -> None:
+        """Syncs that may have missed a pruned delete start again."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            headers = {
+                **get_token_header(user_id),
+                "accept": "application/json"}
+
+            first = (await client.get(BASE_URL, headers=headers)).json()
+            await client.delete(f"/account/{account_id}", headers=headers)
+            await database.connect()
+            await SyncModel(database).delete.older_than(timedelta(0))
+            await database.disconnect()
+
+            expired = await client.get(
+                f"{BASE_URL}?since={first['token']}", headers=headers)
+            restarted = await client.get(BASE_URL, headers=headers)
+
+        with self.subTest(msg="Token from before the delete is refused."):
+            self.assertEqual(expired.status_code, 410)
+        with self.subTest(msg="Syncing from the start still works."):
+            self.assertEqual(restarted.status_code, 200)
+            self.assertEqual(restarted.json()["accounts"], [])
+
+
+if __name__ == "__main__":
+    main()
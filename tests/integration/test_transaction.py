@@ -1,5 +1,6 @@
 """Tests for /transaction routes."""
 
+from dataclasses import fields
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
@@ -7,14 +8,24 @@ from uuid import UUID
 from unittest import main, IsolatedAsyncioTestCase as TestCase
 
 from db_wrapper.model import sql
+import msgpack
+from psycopg2 import IntegrityError
+import pyarrow
 
 # internal test dependencies
 from tests.helpers.application import (
     get_test_client,
     get_token_header,
 )
-from tests.helpers.database import setup_user, setup_account, setup_envelope
+from tests.helpers.database import (
+    setup_user,
+    setup_account,
+    setup_envelope,
+    setup_transactions,
+)
 from src.database import Client
+from src.formats import ARROW, MSGPACK
+from src.models import TransactionRow
 
 BASE_URL = "/transaction"
 
@@ -641,6 +652,128 @@ class TestRouteGetRoot(TestCase):
                     with self.subTest():
                         self.assertNotIn(tran["id"], first_page)
 
+    async def test_sort_by_shared_column(self) -> None:
+        """Transactions sort by columns their Account has too."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(
+                database, [Decimal(1), Decimal(2)], account_id)
+
+            for sort in ("version", "updated_at"):
+                response = await client.get(
+                    f"{BASE_URL}?sort={sort}",
+                    headers={
+                        **get_token_header(user_id),
+                        "accept": "application/json"})
+
+                with self.subTest(sort=sort,
+                                  msg="Responds with a status code of 200."):
+                    self.assertEqual(200, response.status_code)
+                with self.subTest(sort=sort,
+                                  msg="Responds with every Transaction."):
+                    self.assertEqual(len(response.json()), 2)
+
+    async def test_msgpack(self) -> None:
+        """Transactions are sent as MessagePack if the client asks."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(
+                database, [Decimal("1.23"), Decimal("4.56")], account_id)
+
+            response = await client.get(
+                BASE_URL,
+                headers={
+                    **get_token_header(user_id),
+                    "accept": MSGPACK})
+
+            with self.subTest(msg="Responds with MessagePack."):
+                self.assertEqual(response.headers["content-type"], MSGPACK)
+
+            with self.subTest(msg="Body decodes to the Transactions."):
+                body = msgpack.unpackb(response.content, timestamp=3)
+
+                # rows are arrays of TransactionRow's fields
+                amount = [field.name for field
+                          in fields(TransactionRow)].index("amount")
+
+                self.assertEqual(sorted(tran[amount] for tran in body),
+                                 [1.23, 4.56])
+
+
+class TestRouteGetExport(TestCase):
+    """Tests for `GET /transaction/export`."""
+
+    async def test_valid_request(self) -> None:
+        """Every Transaction is exported, oldest first."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(
+                database, [Decimal(n) for n in range(60)], account_id)
+
+            response = await client.get(
+                f"{BASE_URL}/export",
+                headers={
+                    **get_token_header(user_id),
+                    "accept": "application/json"})
+
+            with self.subTest(
+                    msg="Responds with a status code of 200."):
+                self.assertEqual(200, response.status_code)
+
+            with self.subTest(msg="Responds with every Transaction."):
+                body = response.json()
+
+                self.assertEqual(len(body), 60)
+                self.assertEqual(len({tran["id"] for tran in body}), 60)
+
+    async def test_arrow(self) -> None:
+        """Transactions are exported as an Arrow stream if asked."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(
+                database, [Decimal("1.23"), Decimal("4.56")], account_id)
+
+            response = await client.get(
+                f"{BASE_URL}/export",
+                headers={
+                    **get_token_header(user_id),
+                    "accept": ARROW})
+            table = pyarrow.ipc.open_stream(response.content).read_all()
+
+            self.assertEqual(sorted(table.column("amount").to_pylist()),
+                             [Decimal("1.23"), Decimal("4.56")])
+
+    async def test_only_own_transactions(self) -> None:
+        """Other Users' Transactions aren't exported."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database, "user")
+            other_user = await setup_user(database, "other")
+            other_account = await setup_account(database, other_user)
+            await setup_transactions(
+                database, [Decimal("1.23")], other_account)
+
+            response = await client.get(
+                f"{BASE_URL}/export",
+                headers={
+                    **get_token_header(user_id),
+                    "accept": "application/json"})
+
+            self.assertEqual(response.json(), [])
+
 
 class TestRoutePutId(TestCase):
     """Tests for `PUT /transaction/{id}`."""
@@ -881,5 +1014,74 @@ class TestRoutePutSpentFrom(TestCase):
             self.assertEqual(403, response.status_code)
 
 
+class TestTransactionIds(TestCase):
+    """Tests for Transaction ids, unique across every partition."""
+
+    async def test_id_taken_in_another_month(self) -> None:
+        """Transactions can't share an id, even in different partitions."""
+        async with get_test_client() as clients:
+            _, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            insert = sql.SQL("""
+                INSERT INTO
+                    transaction(id, amount, payee, timestamp, account_id)
+                VALUES
+                    ({id}, 1.23, 'a payee', {timestamp}, {account_id});
+            """)
+            tran_id = UUID("00000000-0000-4000-8000-000000000001")
+
+            await database.connect()
+            await database.execute(insert.format(
+                id=sql.Literal(tran_id),
+                timestamp=sql.Literal("2019-12-10T08:12Z"),
+                account_id=sql.Literal(account_id)))
+
+            with self.assertRaises(IntegrityError):
+                await database.execute(insert.format(
+                    id=sql.Literal(tran_id),
+                    timestamp=sql.Literal("2020-06-10T08:12Z"),
+                    account_id=sql.Literal(account_id)))
+            await database.disconnect()
+
+    async def test_found_after_moving(self) -> None:
+        """Transactions are found by id after their timestamp changes."""
+        async with get_test_client() as clients:
+            client, database = clients
+
+            user_id = await setup_user(database)
+            account_id = await setup_account(database, user_id)
+            await setup_transactions(database, [Decimal("1.23")], account_id)
+            await database.connect()
+            tran_id = (await database.execute_and_return(sql.SQL("""
+                SELECT id FROM transaction WHERE account_id = {account_id};
+            """).format(account_id=sql.Literal(account_id))))[0]["id"]
+            await database.disconnect()
+            headers = {**get_token_header(user_id),
+                       "accept": "application/json"}
+
+            moved = await client.put(
+                f"{BASE_URL}/{tran_id}",
+                headers=headers,
+                json={"timestamp": "2019-12-10T08:12:00+00:00"})
+            deleted = await client.delete(f"{BASE_URL}/{tran_id}",
+                                          headers=headers)
+
+            with self.subTest(msg="Its timestamp is changed."):
+                self.assertEqual(200, moved.status_code)
+            with self.subTest(msg="It's found again to be deleted."):
+                self.assertEqual(200, deleted.status_code)
+            with self.subTest(msg="Its id is free to be taken again."):
+                await database.connect()
+                result = await database.execute_and_return(sql.SQL("""
+                    SELECT count(*) AS count FROM transaction_id
+                    WHERE id = {tran_id};
+                """).format(tran_id=sql.Literal(tran_id)))
+                await database.disconnect()
+
+                self.assertEqual(result[0]["count"], 0)
+
+
 if __name__ == "__main__":
     main()
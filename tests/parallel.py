@@ -0,0 +1,91 @@
+"""
+Run integration tests in parallel, each worker on a database of its own.
+
+Every TestCase in `tests/integration` is run by `python -m unittest` in a
+process of its own, as many at once as there are workers. Each process is
+given its worker's number as `TEST_WORKER`, naming the database its tests
+copy from the template, & the run's id as `TEST_RUN_ID`, so the template is
+only built once for the whole run.
+"""
+
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+import subprocess
+import sys
+from typing import Iterator, List, Tuple
+from unittest import defaultTestLoader, TestSuite
+from uuid import uuid4
+
+INTEGRATION_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), 'integration')
+
+
+def _cases(suite: TestSuite) -> Iterator[str]:
+    for test in suite:
+        if isinstance(test, TestSuite):
+            yield from _cases(test)
+        else:
+            yield f'{type(test).__module__}.{type(test).__name__}'
+
+
+def find_cases() -> List[str]:
+    """Find every integration TestCase, as `module.TestCase`, in order."""
+    return list(dict.fromkeys(_cases(defaultTestLoader.discover(
+        INTEGRATION_DIR, top_level_dir=INTEGRATION_DIR))))
+
+
+def main() -> None:
+    """Run every TestCase given, or found, & exit non-zero on failure."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('cases', nargs='*',
+                        help='TestCases or modules to run, default all.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='TestCases run at once.')
+    args = parser.parse_args()
+
+    cases = args.cases or find_cases()
+    run_id = uuid4().hex
+    workers: 'Queue[int]' = Queue()
+
+    for worker in range(args.workers):
+        workers.put(worker)
+
+    def run(case: str) -> Tuple[str, int, str]:
+        worker = workers.get()
+
+        try:
+            completed = subprocess.run(
+                [sys.executable, '-m', 'unittest', '-b', case],
+                cwd=INTEGRATION_DIR,
+                env={**os.environ,
+                     'TEST_WORKER': str(worker),
+                     'TEST_RUN_ID': run_id},
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                check=False)
+        finally:
+            workers.put(worker)
+
+        return case, completed.returncode, completed.stdout
+
+    failed = []
+
+    with ThreadPoolExecutor(args.workers) as executor:
+        for case, returncode, output in executor.map(run, cases):
+            print(f'{case}\n{output}')
+
+            if returncode != 0:
+                failed.append(case)
+
+    if failed:
+        print(f'Failed: {", ".join(failed)}')
+        sys.exit(1)
+
+    print(f'All {len(cases)} TestCases passed.')
+
+
+if __name__ == '__main__':
+    main()
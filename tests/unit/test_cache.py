@@ -0,0 +1,177 @@
+"""Tests for response cache backends."""
+
+import asyncio
+from datetime import timedelta
+from typing import List, Tuple
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from uuid import uuid4
+
+from fastapi import Response
+from httpx import AsyncClient as HTTPClient, Response as HTTPResponse
+
+# internal test dependencies
+from tests.helpers.offline import get_offline_app, FAKE_KEY
+from tests.helpers.redis import fake_redis
+
+from src.cache import (
+    CacheBackend,
+    create_cache_backend,
+    MemoryCache,
+    RedisCache,
+    ResponseCache,
+)
+from src.security import encode_token
+
+
+class BackendTests(TestCase):
+    """Tests shared by every cache backend."""
+
+    backend: CacheBackend
+
+    async def asyncSetUp(self) -> None:
+        """Only run these tests for a subclass with a backend."""
+        self.skipTest("No backend to test.")
+
+    async def test_get_and_set(self) -> None:
+        """Values can be read back until they expire."""
+        await self.backend.set("key", b"value", timedelta(milliseconds=50))
+
+        self.assertEqual(await self.backend.get("key"), b"value")
+
+        await asyncio.sleep(0.1)
+
+        self.assertIsNone(await self.backend.get("key"))
+
+    async def test_counter(self) -> None:
+        """Counters start at 0 & go up by one."""
+        self.assertEqual(await self.backend.counter("count"), 0)
+        self.assertEqual(await self.backend.increment("count"), 1)
+        self.assertEqual(await self.backend.counter("count"), 1)
+
+
+class TestMemoryCache(BackendTests):
+    """Tests for MemoryCache."""
+
+    async def asyncSetUp(self) -> None:
+        """Create an empty cache."""
+        self.backend = MemoryCache(max_entries=2)
+
+    async def test_evicts_least_recently_used(self) -> None:
+        """Oldest unread value is dropped when the cache is full."""
+        ttl = timedelta(minutes=1)
+        await self.backend.set("a", b"a", ttl)
+        await self.backend.set("b", b"b", ttl)
+        await self.backend.get("a")
+        await self.backend.set("c", b"c", ttl)
+
+        self.assertIsNone(await self.backend.get("b"))
+        self.assertEqual(await self.backend.get("a"), b"a")
+
+
+class TestRedisCache(BackendTests):
+    """Tests for RedisCache, against a fake server."""
+
+    async def asyncSetUp(self) -> None:
+        """Start a fake server & connect to it."""
+        self._server = fake_redis()
+        self.server = await self._server.__aenter__()
+        self.backend = create_cache_backend(
+            f"redis://localhost:{self.server.port}/2")
+        await self.backend.connect()
+
+    async def asyncTearDown(self) -> None:
+        """Disconnect & stop the fake server."""
+        await self.backend.disconnect()
+        await self._server.__aexit__(None, None, None)
+
+    async def test_selects_database(self) -> None:
+        """Database given in url is selected on connect."""
+        self.assertEqual(self.server.commands[0], [b"SELECT", b"2"])
+
+    async def test_reconnects(self) -> None:
+        """Connection is opened again after it's closed."""
+        await self.backend.disconnect()
+
+        self.assertEqual(await self.backend.counter("count"), 0)
+
+
+class TestResponseCache(TestCase):
+    """Tests for ResponseCache."""
+
+    async def test_query_order_is_ignored(self) -> None:
+        """Same query parameters in any order get the same key."""
+        cache = ResponseCache(MemoryCache(), {})
+        user_id = uuid4()
+
+        self.assertEqual(
+            await cache.key(user_id, "/transaction", b"page=2&limit=10"),
+            await cache.key(user_id, "/transaction", b"limit=10&page=2"))
+
+    async def test_invalidate(self) -> None:
+        """Invalidating a User's cache only changes their keys."""
+        cache = ResponseCache(MemoryCache(), {})
+        user_id, other_id = uuid4(), uuid4()
+        before = await cache.key(user_id, "/transaction", b"")
+        other_before = await cache.key(other_id, "/transaction", b"")
+
+        await cache.invalidate(user_id)
+
+        self.assertNotEqual(
+            await cache.key(user_id, "/transaction", b""), before)
+        self.assertEqual(
+            await cache.key(other_id, "/transaction", b""), other_before)
+
+    def test_unsupported_url(self) -> None:
+        """Unknown backends are refused."""
+        with self.assertRaises(ValueError):
+            create_cache_backend("memcached://localhost")
+
+    def test_redis_url(self) -> None:
+        """Redis urls create a RedisCache."""
+        self.assertIsInstance(create_cache_backend("redis://localhost"),
+                              RedisCache)
+
+
+class TestCacheMiddleware(TestCase):
+    """Tests for responses sent by the cache middleware."""
+
+    async def test_hit_sends_same_headers(self) -> None:
+        """A cached response is sent with the headers it was cached with."""
+        app, _ = get_offline_app(self,
+                                 cache_url="memory",
+                                 cache_ttls={"/item": timedelta(minutes=1)})
+
+        @app.get("/item")
+        async def item() -> Response:
+            response = Response(b"item", media_type="text/csv")
+            response.headers["cache-control"] = "private, max-age=60"
+            response.headers.append("vary", "Accept")
+            response.headers.append("vary", "Authorization")
+            return response
+
+        headers = {
+            "authorization": f"Bearer {encode_token(uuid4(), FAKE_KEY)}"}
+
+        async with HTTPClient(app=app, base_url="http://test") as client:
+            miss = await client.get("/item", headers=headers)
+            hit = await client.get("/item", headers=headers)
+
+        def sent(response: HTTPResponse) -> List[Tuple[str, str]]:
+            return sorted((name, value)
+                          for name, value in response.headers.multi_items()
+                          if name not in ("x-cache", "server-timing"))
+
+        with self.subTest(msg="Second request is a hit."):
+            self.assertEqual((miss.headers["x-cache"], hit.headers["x-cache"]),
+                             ("miss", "hit"))
+        with self.subTest(msg="Hit is sent the miss's headers."):
+            self.assertEqual(sent(hit), sent(miss))
+        with self.subTest(msg="Repeated headers are kept."):
+            self.assertEqual(hit.headers.get_list("vary"),
+                             ["Accept", "Authorization"])
+        with self.subTest(msg="Hit is sent the miss's body."):
+            self.assertEqual(hit.content, miss.content)
+
+
+if __name__ == "__main__":
+    main()
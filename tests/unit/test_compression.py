@@ -0,0 +1,149 @@
+"""Tests for negotiated response compression."""
+
+import gzip
+from typing import AsyncIterator
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import AsyncClient
+
+from src.compression import (
+    brotli,
+    CompressionMiddleware,
+    parse_quality_header,
+)
+
+BODY = "a repetitive response body " * 100
+
+
+def create_app() -> FastAPI:
+    """Create an app with a few routes behind the middleware."""
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large() -> PlainTextResponse:
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    async def small() -> PlainTextResponse:
+        return PlainTextResponse("small")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def parts() -> AsyncIterator[str]:
+            for _ in range(10):
+                yield BODY
+
+        return StreamingResponse(parts(), media_type="text/plain")
+
+    @app.get("/events")
+    async def events() -> StreamingResponse:
+        async def parts() -> AsyncIterator[str]:
+            yield "data: " + BODY + "\n\n"
+
+        return StreamingResponse(parts(), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    return app
+
+
+class TestParseQualityHeader(TestCase):
+    """Tests for parse_quality_header."""
+
+    def test_weights(self) -> None:
+        """Weights default to 1 & are read from q parameters."""
+        self.assertEqual(parse_quality_header("gzip, br;q=0.5, *;q=0"),
+                         {"gzip": 1.0, "br": 0.5, "*": 0.0})
+
+    def test_media_types(self) -> None:
+        """Media types are lowercased, & unreadable weights are 0."""
+        self.assertEqual(
+            parse_quality_header(
+                "Application/JSON;charset=utf-8;q=0.5, text/*;q=high"),
+            {"application/json": 0.5, "text/*": 0.0})
+
+
+class TestCompressionMiddleware(TestCase):
+    """Tests for CompressionMiddleware."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a test client."""
+        self.client = AsyncClient(app=create_app(), base_url="http://test")
+
+    async def asyncTearDown(self) -> None:
+        """Close the test client."""
+        await self.client.aclose()
+
+    async def get(self, path: str, accept_encoding: str) -> bytes:
+        """Get raw response body for path, without decoding it."""
+        async with self.client.stream(
+                "GET",
+                path,
+                headers={"accept-encoding": accept_encoding}) as response:
+            self.response = response
+            return b"".join([part async for part in response.aiter_raw()])
+
+    async def test_gzip(self) -> None:
+        """Large responses are gzipped for clients accepting only gzip."""
+        body = await self.get("/large", "gzip")
+
+        with self.subTest(msg="Response is gzip encoded."):
+            self.assertEqual(self.response.headers["content-encoding"],
+                             "gzip")
+            self.assertEqual(gzip.decompress(body).decode(), BODY)
+        with self.subTest(msg="Content-Length is the compressed size."):
+            self.assertEqual(int(self.response.headers["content-length"]),
+                             len(body))
+        with self.subTest(msg="Response varies by Accept-Encoding."):
+            self.assertIn("Accept-Encoding", self.response.headers["vary"])
+
+    async def test_brotli_preferred(self) -> None:
+        """Brotli is used when a client accepts both equally."""
+        if brotli is None:
+            self.skipTest("No brotli module installed.")
+
+        body = await self.get("/large", "gzip, deflate, br")
+
+        self.assertEqual(self.response.headers["content-encoding"], "br")
+        self.assertEqual(brotli.decompress(body).decode(), BODY)
+
+    async def test_client_weights(self) -> None:
+        """A client's weights beat the default preference."""
+        await self.get("/large", "br;q=0.1, gzip")
+
+        self.assertEqual(self.response.headers["content-encoding"], "gzip")
+
+    async def test_small_response(self) -> None:
+        """Responses under the threshold aren't compressed."""
+        body = await self.get("/small", "gzip")
+
+        self.assertNotIn("content-encoding", self.response.headers)
+        self.assertEqual(body, b"small")
+
+    async def test_no_accepted_encoding(self) -> None:
+        """Responses aren't compressed if the client accepts no encoding."""
+        body = await self.get("/large", "identity")
+
+        self.assertNotIn("content-encoding", self.response.headers)
+        self.assertEqual(body.decode(), BODY)
+
+    async def test_streamed_response(self) -> None:
+        """Streamed responses are compressed as they're sent."""
+        body = await self.get("/stream", "gzip")
+
+        with self.subTest(msg="Response is gzip encoded."):
+            self.assertEqual(gzip.decompress(body).decode(), BODY * 10)
+        with self.subTest(msg="Response has no Content-Length."):
+            self.assertNotIn("content-length", self.response.headers)
+
+    async def test_event_stream(self) -> None:
+        """Event streams are never compressed."""
+        await self.get("/events", "gzip")
+
+        self.assertNotIn("content-encoding", self.response.headers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Tests for connections held by transactions."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, List
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from unittest.mock import patch
+
+from src.database import create_client, create_conn_config
+
+
+class FakeConnection:
+    """Connection recording the statements executed on it."""
+
+    opened: List["FakeConnection"] = []
+
+    def __init__(self, _: Any) -> None:
+        self.statements: List[str] = []
+        # as db_wrapper keeps the connection it executes statements on
+        self.raw = SimpleNamespace(closed=True)
+        self._connection = self.raw
+        FakeConnection.opened.append(self)
+
+    async def connect(self) -> None:
+        """Open the connection."""
+        self.raw.closed = False
+
+    async def disconnect(self) -> None:
+        """Close the connection."""
+        self.raw.closed = True
+
+    async def execute(self, query: Any, _: Any = None) -> None:
+        """Record the statement, failing if the connection is closed."""
+        if self.raw.closed:
+            raise ConnectionError("connection closed")
+        self.statements.append(str(query))
+
+
+@patch("src.database.AsyncClient", new=FakeConnection)
+class TestTransactionConnections(TestCase):
+    """Tests for the connections Client.transaction uses."""
+
+    def setUp(self) -> None:
+        FakeConnection.opened = []
+        self.database = create_client(create_conn_config(), pool_size=2)
+
+    async def test_reused(self) -> None:
+        """A connection is kept open for the next transaction."""
+        for _ in range(3):
+            async with self.database.transaction():
+                await self.database.execute("SELECT 1;")
+
+        with self.subTest(msg="One connection is opened."):
+            self.assertEqual(len(FakeConnection.opened), 1)
+        with self.subTest(msg="Every transaction runs on it."):
+            self.assertEqual(FakeConnection.opened[0].statements,
+                             ["BEGIN;", "SELECT 1;", "COMMIT;"] * 3)
+        with self.subTest(msg="It's still open."):
+            self.assertFalse(FakeConnection.opened[0].raw.closed)
+
+    async def test_bounded(self) -> None:
+        """Transactions wait for a connection once pool_size are held."""
+        held = 0
+        most_held = 0
+
+        async def hold() -> None:
+            nonlocal held, most_held
+            async with self.database.transaction():
+                held += 1
+                most_held = max(most_held, held)
+                await asyncio.sleep(0.01)
+                held -= 1
+
+        await asyncio.gather(*(hold() for _ in range(5)))
+
+        with self.subTest(msg="At most pool_size are held at once."):
+            self.assertEqual(most_held, 2)
+        with self.subTest(msg="No more than pool_size are opened."):
+            self.assertEqual(len(FakeConnection.opened), 2)
+
+    async def test_broken_connection_closed(self) -> None:
+        """A connection is closed if its transaction may not have ended."""
+        with self.assertRaises(ConnectionError):
+            async with self.database.transaction():
+                await FakeConnection.opened[0].disconnect()
+
+        async with self.database.transaction():
+            pass
+
+        self.assertEqual(len(FakeConnection.opened), 2)
+
+    async def test_disconnect(self) -> None:
+        """Idle connections are closed along with the client."""
+        async with self.database.transaction():
+            pass
+
+        await self.database.disconnect()
+
+        self.assertTrue(FakeConnection.opened[0].raw.closed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Tests for encoding rows in negotiated formats."""
+
+from dataclasses import astuple, fields
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import json
+from typing import Any, AsyncIterator, List, Tuple
+from unittest import main, IsolatedAsyncioTestCase, TestCase
+from uuid import uuid4
+
+import msgpack
+import pyarrow
+
+from src.formats import (
+    arrow_schema,
+    choose_media_type,
+    rows_response,
+    rows_stream,
+    AMOUNT_TYPE,
+    ARROW,
+    JSON,
+    MSGPACK,
+)
+from src.models import TransactionRow
+from src.responses import FastJSONResponse
+
+
+def make_rows(count: int) -> List[TransactionRow]:
+    """Make Transactions, every other one spent from an Envelope."""
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    account_id = uuid4()
+
+    return [TransactionRow(
+        version=n,
+        updated_at=start,
+        id=uuid4(),
+        amount=Decimal(n * 37) / 100,
+        description=f"description {n}",
+        payee="payee",
+        timestamp=start + timedelta(hours=n),
+        account_id=account_id,
+        spent_from=uuid4() if n % 2 else None,
+    ) for n in range(count)]
+
+
+def as_read(rows: List[TransactionRow]) -> List[Tuple[Any, ...]]:
+    """Get rows as they're read from the database."""
+    return [astuple(row) for row in rows]
+
+
+async def in_batches(
+    rows: List[Any],
+    size: int,
+) -> AsyncIterator[List[Any]]:
+    """Give rows in batches of the given size."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def read_stream(response: Any) -> bytes:
+    """Read a streaming response's whole body."""
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+class TestChooseMediaType(TestCase):
+    """Tests for choose_media_type."""
+
+    def test_negotiation(self) -> None:
+        """Highest weighted format is chosen, JSON by default."""
+        cases = [
+            (None, JSON),
+            ("", JSON),
+            ("text/html", JSON),
+            ("*/*", JSON),
+            (MSGPACK, MSGPACK),
+            (f"{ARROW}, {JSON};q=0.5", ARROW),
+            (f"{MSGPACK};q=0.2, {ARROW};q=0.9", ARROW),
+            (f"application/*, {JSON};q=0", MSGPACK),
+            (f"{MSGPACK};q=bad", JSON),
+        ]
+
+        for accept, expected in cases:
+            with self.subTest(msg=f"Accept: {accept}"):
+                self.assertEqual(choose_media_type(accept), expected)
+
+
+class TestRowsResponse(TestCase):
+    """Tests for rows_response."""
+
+    def setUp(self) -> None:
+        """Make rows to encode."""
+        self.rows = make_rows(5)
+        self.read = as_read(self.rows)
+
+    def test_json(self) -> None:
+        """JSON is rendered as by FastJSONResponse."""
+        response = rows_response(self.read, TransactionRow, JSON)
+
+        self.assertEqual(response.body, FastJSONResponse(self.rows).body)
+
+    def test_msgpack(self) -> None:
+        """MessagePack decodes to the same values as the rows."""
+        response = rows_response(self.read, TransactionRow, MSGPACK)
+        # timestamps decode as timezone-aware datetimes
+        decoded = msgpack.unpackb(response.body, timestamp=3)
+
+        with self.subTest(msg="Media type is MessagePack."):
+            self.assertEqual(response.media_type, MSGPACK)
+        with self.subTest(msg="Rows are decoded as arrays of fields."):
+            self.assertEqual(decoded, [[
+                row.version,
+                row.updated_at,
+                row.id.bytes,
+                float(row.amount),
+                row.description,
+                row.payee,
+                row.timestamp,
+                row.account_id.bytes,
+                None if row.spent_from is None else row.spent_from.bytes,
+            ] for row in self.rows])
+
+    def test_arrow(self) -> None:
+        """Arrow stream reads back as a table of the rows."""
+        response = rows_response(self.read, TransactionRow, ARROW)
+        table = pyarrow.ipc.open_stream(response.body).read_all()
+
+        with self.subTest(msg="Columns have the expected types."):
+            self.assertEqual(table.schema, arrow_schema(TransactionRow))
+            self.assertEqual(table.schema.field("amount").type, AMOUNT_TYPE)
+            self.assertEqual(table.schema.field("id").type,
+                             pyarrow.binary(16))
+            self.assertFalse(table.schema.field("id").nullable)
+            self.assertTrue(table.schema.field("spent_from").nullable)
+        with self.subTest(msg="Values are the same as the rows."):
+            self.assertEqual(table.column("amount").to_pylist(),
+                             [row.amount for row in self.rows])
+            self.assertEqual(table.column("id").to_pylist(),
+                             [row.id.bytes for row in self.rows])
+            self.assertEqual(table.column("timestamp").to_pylist(),
+                             [row.timestamp for row in self.rows])
+            self.assertEqual(table.column("spent_from").null_count, 3)
+
+    def test_empty(self) -> None:
+        """No rows are encoded as an empty list or table."""
+        with self.subTest(msg="JSON"):
+            self.assertEqual(
+                rows_response([], TransactionRow, JSON).body, b"[]")
+        with self.subTest(msg="MessagePack"):
+            self.assertEqual(msgpack.unpackb(
+                rows_response([], TransactionRow, MSGPACK).body), [])
+        with self.subTest(msg="Arrow"):
+            body = rows_response([], TransactionRow, ARROW).body
+            self.assertEqual(
+                pyarrow.ipc.open_stream(body).read_all().num_rows, 0)
+
+
+class TestRowsStream(IsolatedAsyncioTestCase):
+    """Tests for rows_stream."""
+
+    async def asyncSetUp(self) -> None:
+        """Make rows to stream."""
+        self.rows = make_rows(10)
+        self.read = as_read(self.rows)
+
+    async def test_json(self) -> None:
+        """Batches are joined into one JSON array."""
+        response = rows_stream(
+            in_batches(self.read, 3), TransactionRow, JSON)
+
+        self.assertEqual(json.loads(await read_stream(response)),
+                         json.loads(FastJSONResponse(self.rows).body))
+
+    async def test_msgpack(self) -> None:
+        """Each row is sent as one MessagePack array."""
+        response = rows_stream(
+            in_batches(self.read, 3), TransactionRow, MSGPACK)
+        unpacker = msgpack.Unpacker(timestamp=3)
+        unpacker.feed(await read_stream(response))
+        names = [field.name for field in fields(TransactionRow)]
+
+        self.assertEqual([dict(zip(names, row))["id"] for row in unpacker],
+                         [row.id.bytes for row in self.rows])
+
+    async def test_arrow(self) -> None:
+        """Each batch is sent as one record batch."""
+        response = rows_stream(
+            in_batches(self.read, 3), TransactionRow, ARROW)
+        reader = pyarrow.ipc.open_stream(await read_stream(response))
+        batches = list(reader)
+
+        with self.subTest(msg="One record batch per batch read."):
+            self.assertEqual([batch.num_rows for batch in batches],
+                             [3, 3, 3, 1])
+        with self.subTest(msg="Rows are in order."):
+            self.assertEqual(
+                pyarrow.Table.from_batches(batches).column("id").to_pylist(),
+                [row.id.bytes for row in self.rows])
+
+    async def test_empty(self) -> None:
+        """Nothing read still gives a valid, empty body."""
+        for media_type in (JSON, MSGPACK, ARROW):
+            body = await read_stream(
+                rows_stream(in_batches([], 3), TransactionRow, media_type))
+
+            with self.subTest(msg=media_type):
+                if media_type == JSON:
+                    self.assertEqual(body, b"[]")
+                elif media_type == MSGPACK:
+                    self.assertEqual(body, b"")
+                else:
+                    self.assertEqual(
+                        pyarrow.ipc.open_stream(body).read_all().num_rows, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Tests for removing expired Idempotency-Keys."""
+
+import asyncio
+from datetime import timedelta
+from typing import Any
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from unittest.mock import patch
+
+from psycopg2 import OperationalError
+
+from src.database import create_client, create_conn_config
+from src.idempotency import remove_expired_keys
+from src.models.idempotency import IdempotencyDeleter
+
+
+class TestRemoveExpiredKeys(TestCase):
+    """Tests for remove_expired_keys."""
+
+    async def test_carries_on_after_errors(self) -> None:
+        """Keys are removed again after the database fails once."""
+        calls = []
+        removed = asyncio.Event()
+
+        async def older_than(_: Any, age: timedelta) -> None:
+            calls.append(age)
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection")
+            removed.set()
+
+        with patch.object(IdempotencyDeleter, "older_than", new=older_than), \
+                self.assertLogs("src.idempotency", "WARNING") as logs:
+            task = asyncio.create_task(remove_expired_keys(
+                create_client(create_conn_config()),
+                timedelta(days=1),
+                interval=timedelta(0)))
+            await asyncio.wait_for(removed.wait(), 1)
+            task.cancel()
+
+        with self.subTest(msg="Keys are removed again."):
+            self.assertEqual(calls, [timedelta(days=1)] * 2)
+        with self.subTest(msg="The failure is logged."):
+            self.assertIn("server closed the connection", logs.output[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Tests for applying schema changes online."""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from unittest import main, TestCase
+from unittest.mock import patch
+
+from psycopg2.errors import LockNotAvailable  # pylint: disable=E0611
+
+from manage import _online_statements, _run_with_retries, OnlineOptions
+
+CREATE_INDEX = 'CREATE INDEX CONCURRENTLY "Item Index" ON "public"."item" ' \
+    'USING btree (id);'
+DROP_INDEX = 'DROP INDEX CONCURRENTLY IF EXISTS "public"."Item Index";'
+
+
+class FakeCursor:
+    """Cursor recording statements, failing some to take locks in time."""
+
+    def __init__(
+        self,
+        partitioned: Iterable[str] = (),
+        failures: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.partitioned = set(partitioned)
+        # times each statement fails before it runs
+        self.failures = failures or {}
+        self.statements: List[str] = []
+        self._row: Optional[Tuple[Any, ...]] = None
+
+    def execute(self, statement: str, params: Any = None) -> None:
+        """Record statement, or answer if a relation is partitioned."""
+        if "to_regclass" in statement:
+            self._row = (params[0] in self.partitioned,)
+            return
+
+        if statement.startswith("SET "):
+            return
+
+        self.statements.append(statement)
+
+        if self.failures.get(statement):
+            self.failures[statement] -= 1
+            raise LockNotAvailable("lock timeout")
+
+    def fetchone(self) -> Optional[Tuple[Any, ...]]:
+        """Get the answer to the last question."""
+        return self._row
+
+
+class TestOnlineStatements(TestCase):
+    """Tests for _online_statements, on statements as migra writes them."""
+
+    def test_create_index(self) -> None:
+        """Indexes are built concurrently, whatever their names."""
+        for statement, expected in (
+            ("CREATE INDEX item_name ON public.item USING btree (name);",
+             "CREATE INDEX CONCURRENTLY item_name ON public.item "
+             "USING btree (name);"),
+            ('CREATE UNIQUE INDEX "Item Index" ON "public"."item" '
+             'USING btree (id);',
+             'CREATE UNIQUE INDEX CONCURRENTLY "Item Index" ON '
+             '"public"."item" USING btree (id);'),
+        ):
+            with self.subTest(statement=statement):
+                self.assertEqual(
+                    _online_statements(FakeCursor(), statement), [expected])
+
+    def test_drop_index(self) -> None:
+        """Indexes are dropped concurrently, whatever their names."""
+        for statement, expected in (
+            ("drop index if exists public.item_name;",
+             "DROP INDEX CONCURRENTLY IF EXISTS public.item_name;"),
+            ('drop index if exists "public"."Item Index";', DROP_INDEX),
+        ):
+            with self.subTest(statement=statement):
+                self.assertEqual(
+                    _online_statements(FakeCursor(), statement), [expected])
+
+    def test_add_constraint(self) -> None:
+        """Constraints are added without checking rows, then validated."""
+        statement = 'alter table "public"."item" add constraint "fk user" ' \
+            'FOREIGN KEY (user_id) REFERENCES hoops_user(id) ' \
+            'ON DELETE CASCADE;'
+
+        self.assertEqual(
+            _online_statements(FakeCursor(), statement),
+            ['ALTER TABLE "public"."item" ADD CONSTRAINT "fk user" '
+             'FOREIGN KEY (user_id) REFERENCES hoops_user(id) '
+             'ON DELETE CASCADE NOT VALID;',
+             'ALTER TABLE "public"."item" VALIDATE CONSTRAINT "fk user";'])
+
+    def test_kept_as_is(self) -> None:
+        """Statements that can't be, or needn't be, rewritten are kept."""
+        for statement in (
+            # the index on a partitioned table itself
+            "CREATE INDEX item_name ON ONLY public.item USING btree (name);",
+            # already left unchecked
+            'alter table "public"."item" add constraint "fk_user" '
+            'FOREIGN KEY (user_id) REFERENCES hoops_user(id) NOT VALID;',
+            # built from an index already built
+            'alter table "public"."item" add constraint "item_pkey" '
+            'PRIMARY KEY using index "item_pkey";',
+            "CREATE INDEX CONCURRENTLY item_name ON public.item (name);",
+        ):
+            with self.subTest(statement=statement):
+                self.assertEqual(
+                    _online_statements(FakeCursor(), statement), [statement])
+
+    def test_partitioned(self) -> None:
+        """Changes to partitioned tables are kept as is."""
+        cursor = FakeCursor(partitioned=["public.item"])
+
+        for statement in (
+            "CREATE INDEX item_name ON public.item USING btree (name);",
+            "alter table public.item add constraint item_positive "
+            "CHECK (amount > 0);",
+        ):
+            with self.subTest(statement=statement):
+                self.assertEqual(
+                    _online_statements(cursor, statement), [statement])
+
+
+@patch("manage.time.sleep")
+class TestRunWithRetries(TestCase):
+    """Tests for _run_with_retries."""
+
+    def test_failed_build_is_dropped(self, _: Any) -> None:
+        """A failed concurrent build is dropped, with retries, & rebuilt."""
+        cursor = FakeCursor(failures={CREATE_INDEX: 1, DROP_INDEX: 2})
+
+        attempts = _run_with_retries(
+            cursor, CREATE_INDEX, OnlineOptions(retries=3), False)
+
+        with self.subTest(msg="Index is dropped until it's gone."):
+            self.assertEqual(cursor.statements,
+                             [CREATE_INDEX, *[DROP_INDEX] * 3, CREATE_INDEX])
+        with self.subTest(msg="Attempts at the statement are counted."):
+            self.assertEqual(attempts, 2)
+
+    def test_gives_up(self, _: Any) -> None:
+        """Lock errors are raised once retries run out."""
+        cursor = FakeCursor(failures={CREATE_INDEX: 3})
+
+        with self.assertRaises(LockNotAvailable):
+            _run_with_retries(
+                cursor, CREATE_INDEX, OnlineOptions(retries=1), False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Tests for request & query metrics."""
+
+from typing import Any, Dict, List
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from unittest.mock import patch
+
+from db_wrapper import AsyncClient
+from fastapi.responses import PlainTextResponse
+from httpx import AsyncClient as HTTPClient
+from prometheus_client.parser import text_string_to_metric_families
+
+# internal test dependencies
+from tests.helpers.offline import get_offline_app
+
+from src.database import create_client, create_conn_config, query_label
+from src.metrics import Metrics
+
+ADMIN_KEY = "admin key"
+
+
+class FakeReader:
+    """Reader executing its queries through a client."""
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    async def many(self) -> List[Any]:
+        """Execute a query."""
+        rows: List[Any] = await self.client.execute_and_return("SELECT 1;")
+        return rows
+
+
+def sample(metrics: Metrics, name: str, **labels: str) -> float:
+    """Get a sample's value from the metrics registry."""
+    value = metrics.registry.get_sample_value(name, labels)
+    return 0 if value is None else value
+
+
+class TestQueryMetrics(TestCase):
+    """Tests for timing statements executed by the client."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a client that doesn't need a database."""
+        self.database = create_client(create_conn_config())
+        self.metrics = Metrics(self.database)
+        patcher = patch.object(AsyncClient, "execute_and_return",
+                               return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_labelled_by_method(self) -> None:
+        """Statements are labelled with the method executing them."""
+        await FakeReader(self.database).many()
+        await FakeReader(self.database).many()
+
+        self.assertEqual(
+            sample(self.metrics, "db_query_duration_seconds_count",
+                   query="FakeReader.many"),
+            2)
+
+    async def test_given_label(self) -> None:
+        """A label given in context is used instead."""
+        with query_label("Reader.shared"):
+            await FakeReader(self.database).many()
+
+        self.assertEqual(
+            sample(self.metrics, "db_query_duration_seconds_count",
+                   query="Reader.shared"),
+            1)
+
+    async def test_no_observers(self) -> None:
+        """Nothing is recorded once observers are removed."""
+        self.database.query_observers.clear()
+        await FakeReader(self.database).many()
+
+        self.assertEqual(
+            sample(self.metrics, "db_query_duration_seconds_count",
+                   query="FakeReader.many"),
+            0)
+
+
+class TestRequestMetrics(TestCase):
+    """Tests for timing requests & exposing metrics."""
+
+    async def asyncSetUp(self) -> None:
+        """Create an app with a few more routes, able to be scraped."""
+        app, _ = get_offline_app(self, admin_key=ADMIN_KEY)
+
+        @app.get("/item/{item_id}")
+        async def item(item_id: int) -> PlainTextResponse:
+            return PlainTextResponse(str(item_id))
+
+        @app.get("/error")
+        async def error() -> PlainTextResponse:
+            raise ValueError("error")
+
+        self.app = app
+
+    async def scrape(
+        self,
+        client: HTTPClient,
+        name: str,
+        **labels: str,
+    ) -> float:
+        """Get a sample's value from the app's metrics."""
+        response = await client.get("/metrics",
+                                    headers={"X-Admin-Key": ADMIN_KEY})
+
+        families = text_string_to_metric_families(  # type: ignore
+            response.text)
+
+        for family in families:
+            for found in family.samples:
+                if found.name == name and found.labels == labels:
+                    return float(found.value)
+
+        return 0
+
+    async def test_by_route_template(self) -> None:
+        """Requests are counted by route template, not path."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            await client.get("/item/1")
+            await client.get("/item/2")
+            await client.get("/item/three")
+            await client.get("/missing")
+
+            with self.subTest(msg="Successes are counted by template."):
+                self.assertEqual(
+                    await self.scrape(
+                        client, "http_request_duration_seconds_count",
+                        method="GET", route="/item/{item_id}", status="200"),
+                    2)
+            with self.subTest(msg="Failures are counted by status."):
+                self.assertEqual(
+                    await self.scrape(
+                        client, "http_request_duration_seconds_count",
+                        method="GET", route="/item/{item_id}", status="422"),
+                    1)
+            with self.subTest(msg="Unmatched paths are grouped together."):
+                self.assertEqual(
+                    await self.scrape(
+                        client, "http_request_duration_seconds_count",
+                        method="GET", route="unmatched", status="404"),
+                    1)
+
+    async def test_errors(self) -> None:
+        """Requests raising an error are counted as 500s."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            with self.assertRaises(ValueError):
+                await client.get("/error")
+
+            self.assertEqual(
+                await self.scrape(
+                    client, "http_request_duration_seconds_count",
+                    method="GET", route="/error", status="500"),
+                1)
+
+    async def test_scrape(self) -> None:
+        """Metrics are exposed in the Prometheus text format."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            await client.get("/item/1")
+            response = await client.get("/metrics",
+                                        headers={"X-Admin-Key": ADMIN_KEY})
+
+        with self.subTest(msg="Responds with the text format."):
+            self.assertTrue(
+                response.headers["content-type"].startswith("text/plain"))
+        with self.subTest(msg="Request & transaction metrics are included."):
+            self.assertIn('route="/item/{item_id}"', response.text)
+            self.assertIn("db_open_transactions 0.0", response.text)
+
+    async def test_admin_key_required(self) -> None:
+        """Metrics are only exposed to requests with the admin key."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            cases: List[Dict[str, str]] = [{}, {"X-Admin-Key": "wrong key"}]
+
+            for headers in cases:
+                with self.subTest(headers=headers):
+                    response = await client.get("/metrics", headers=headers)
+
+                    self.assertEqual(response.status_code, 403)
+
+    async def test_disabled_without_admin_key(self) -> None:
+        """Metrics aren't exposed at all without an admin key set."""
+        app, _ = get_offline_app(self)
+
+        async with HTTPClient(app=app, base_url="http://test") as client:
+            response = await client.get("/metrics",
+                                        headers={"X-Admin-Key": ADMIN_KEY})
+
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    main()
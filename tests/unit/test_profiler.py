@@ -0,0 +1,160 @@
+"""Tests for profiling the worker on demand."""
+
+import threading
+import time
+from typing import Any
+from unittest import main, IsolatedAsyncioTestCase, TestCase
+
+from fastapi import FastAPI
+from httpx import AsyncClient as HTTPClient
+
+from src.config import Config
+from src.database import create_conn_config
+from src.profiler import Profile, SamplingProfiler
+from src.routers import create_admin
+
+
+def spin(stop: threading.Event) -> None:
+    """Use CPU until stopped."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def wait(stop: threading.Event) -> None:
+    """Wait without using CPU until stopped."""
+    stop.wait()
+
+
+class TestProfile(TestCase):
+    """Tests for Profile."""
+
+    def setUp(self) -> None:
+        """Create a profile of two stacks in one thread."""
+        root = ("MainThread", "", 0)
+        main_frame = ("main", "/src/app.py", 10)
+        self.profile = Profile(mode="wall", seconds=1)
+        self.profile.stacks[(root, main_frame)] = 0.25
+        self.profile.stacks[
+            (root, main_frame, ("read", "/src/models/user.py", 20))] = 0.5
+
+    def test_collapsed(self) -> None:
+        """Stacks are given from the root, with microseconds spent."""
+        self.assertEqual(
+            self.profile.collapsed(),
+            "MainThread;main (app.py:10);read (user.py:20) 500000\n"
+            "MainThread;main (app.py:10) 250000\n")
+
+    def test_speedscope(self) -> None:
+        """Frames are shared between samples."""
+        profile = self.profile.speedscope()
+        frames = profile["shared"]["frames"]
+        samples = profile["profiles"][0]["samples"]
+
+        with self.subTest(msg="Every frame is given once."):
+            self.assertEqual([frame["name"] for frame in frames],
+                             ["MainThread", "main", "read"])
+        with self.subTest(msg="Samples refer to frames."):
+            self.assertEqual(samples, [[0, 1], [0, 1, 2]])
+        with self.subTest(msg="Samples are weighted by seconds."):
+            self.assertEqual(profile["profiles"][0]["weights"], [0.25, 0.5])
+
+
+class TestSamplingProfiler(TestCase):
+    """Tests for SamplingProfiler."""
+
+    def setUp(self) -> None:
+        """Start a thread using CPU & one waiting."""
+        stop = threading.Event()
+        threads = [threading.Thread(target=target, args=(stop,), name=name)
+                   for target, name in ((spin, "spinning"),
+                                        (wait, "waiting"))]
+
+        for thread in threads:
+            thread.start()
+
+        def stop_threads() -> None:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.addCleanup(stop_threads)
+
+    @staticmethod
+    def threads(profile: Profile) -> Any:
+        """Get the threads sampled in a profile."""
+        return {stack[0][0] for stack in profile.stacks}
+
+    def test_wall(self) -> None:
+        """Every thread is sampled, except the profiler's own."""
+        profile = SamplingProfiler("wall", 0.005).run(0.2)
+        threads = self.threads(profile)
+
+        with self.subTest(msg="Running & waiting threads are sampled."):
+            self.assertIn("spinning", threads)
+            self.assertIn("waiting", threads)
+        with self.subTest(msg="Stacks end in the function running."):
+            # spin checks its event between sums, so may be sampled there
+            self.assertLessEqual({stack[-1][0] for stack in profile.stacks
+                                  if stack[0][0] == "spinning"},
+                                 {"spin", "is_set"})
+
+    def test_cpu(self) -> None:
+        """Threads are only sampled while using CPU."""
+        profile = SamplingProfiler("cpu", 0.005).run(0.2)
+        threads = self.threads(profile)
+
+        self.assertIn("spinning", threads)
+        self.assertNotIn("waiting", threads)
+
+
+class TestAdminRoute(IsolatedAsyncioTestCase):
+    """Tests for `GET /admin/profile`."""
+
+    async def asyncSetUp(self) -> None:
+        """Create an app with admin routes."""
+        app = FastAPI()
+        app.include_router(
+            create_admin(Config(database=create_conn_config(),
+                                jwt_key="key",
+                                admin_key="secret"),
+                         None))
+        self.app = app
+
+    async def get(self, path: str, **headers: str) -> Any:
+        """Request path from the app."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    async def test_collapsed(self) -> None:
+        """Responds with collapsed stacks by default."""
+        response = await self.get("/admin/profile?seconds=1",
+                                  **{"X-Admin-Key": "secret"})
+
+        with self.subTest(msg="Responds with a status code of 200."):
+            self.assertEqual(response.status_code, 200)
+        with self.subTest(msg="Responds with stacks of this worker."):
+            self.assertTrue(response.headers["content-type"].startswith(
+                "text/plain"))
+            self.assertIn("MainThread;", response.text)
+
+    async def test_speedscope(self) -> None:
+        """Responds with speedscope's format if asked."""
+        response = await self.get(
+            "/admin/profile?seconds=1&mode=cpu&format=speedscope",
+            **{"X-Admin-Key": "secret"})
+
+        self.assertEqual(response.json()["profiles"][0]["type"], "sampled")
+
+    async def test_admin_key(self) -> None:
+        """Profiles are only taken for requests with the admin key."""
+        start = time.perf_counter()
+        response = await self.get("/admin/profile?seconds=1")
+
+        with self.subTest(msg="Responds with 403."):
+            self.assertEqual(response.status_code, 403)
+        with self.subTest(msg="Nothing is profiled."):
+            self.assertLess(time.perf_counter() - start, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tests for counting statements per request & flagging repeated ones."""
+
+import asyncio
+from unittest import main, IsolatedAsyncioTestCase, TestCase
+
+from fastapi.responses import PlainTextResponse
+from httpx import AsyncClient as HTTPClient
+
+from tests.helpers.offline import get_offline_app, one_query, ItemReader
+
+from src.query_debug import QueryDebugMiddleware, QueryLog
+
+
+class TestQueryLog(TestCase):
+    """Tests for QueryLog."""
+
+    def test_repeated(self) -> None:
+        """Statements of the same shape are grouped."""
+        queries = QueryLog()
+        queries.record("Reader.many", "SELECT * FROM item;", None)
+
+        for item_id in range(3):
+            queries.record("Reader.one", one_query(item_id), None)
+
+        with self.subTest(msg="Every statement is counted."):
+            self.assertEqual(queries.count, 4)
+        with self.subTest(msg="Repeated statements are given."):
+            self.assertEqual(
+                queries.repeated(3),
+                [("Reader.one", "SELECT * FROM item WHERE id = ?;", 3)])
+        with self.subTest(msg="Statements under the threshold aren't."):
+            self.assertEqual(queries.repeated(4), [])
+
+
+class TestQueryDebugMiddleware(IsolatedAsyncioTestCase):
+    """Tests for QueryDebugMiddleware."""
+
+    async def asyncSetUp(self) -> None:
+        """Create the app, reading through a client without a database."""
+        app, self.database = get_offline_app(self, query_debug=True)
+        reader = ItemReader(self.database)
+
+        @app.get("/joined")
+        async def joined() -> PlainTextResponse:
+            await reader.many()
+            return PlainTextResponse("joined")
+
+        @app.get("/per-row")
+        async def per_row() -> PlainTextResponse:
+            for row in await reader.many():
+                await reader.one(row["id"])
+            await reader.one(3)
+            return PlainTextResponse("per-row")
+
+        self.app = app
+
+    async def test_count(self) -> None:
+        """Responses report the number of statements executed for them."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            joined, per_row = await asyncio.gather(client.get("/joined"),
+                                                   client.get("/per-row"))
+
+        with self.subTest(msg="/joined"):
+            self.assertEqual(joined.headers["x-query-count"], "1")
+            self.assertNotIn("x-query-repeated", joined.headers)
+        with self.subTest(msg="/per-row"):
+            self.assertEqual(per_row.headers["x-query-count"], "4")
+        with self.subTest(msg="Observer is added once."):
+            self.assertEqual(self.database.query_observers.count(
+                QueryDebugMiddleware.observe_query), 1)
+
+    async def test_repeated(self) -> None:
+        """Statements repeated per row are flagged & logged."""
+        with self.assertLogs("src.query_debug", "WARNING") as logs:
+            async with HTTPClient(app=self.app,
+                                  base_url="http://test") as client:
+                response = await client.get("/per-row")
+
+        with self.subTest(msg="Repeated statement is named."):
+            self.assertEqual(response.headers["x-query-repeated"],
+                             "ItemReader.one=3")
+        with self.subTest(msg="Repeated statement is logged."):
+            self.assertIn("SELECT * FROM item WHERE id = ?;",
+                          logs.output[0])
+
+
+if __name__ == "__main__":
+    main()
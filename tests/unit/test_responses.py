@@ -0,0 +1,75 @@
+"""Tests for response classes."""
+
+from dataclasses import asdict, fields
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import main, TestCase
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.models import (
+    AccountOut,
+    AccountRow,
+    EnvelopeOut,
+    EnvelopeRow,
+    TransactionOut,
+    TransactionRow,
+)
+from src.responses import FastJSONResponse
+
+
+class TestFastJSONResponse(TestCase):
+    """Tests for FastJSONResponse."""
+
+    def test_matches_default_encoding(self) -> None:
+        """Constructed Models render the same as validated ones."""
+        row = {
+            "id": uuid4(),
+            "amount": Decimal("12.30"),
+            "payee": "a payee",
+            "description": "a description",
+            "timestamp": datetime(2021, 1, 1, tzinfo=timezone.utc),
+            "account_id": uuid4(),
+            "version": 1,
+            "updated_at": datetime.now(timezone.utc),
+        }
+
+        self.assertEqual(
+            FastJSONResponse([TransactionOut.construct(**row)]).body,
+            JSONResponse(jsonable_encoder([TransactionOut(**row)])).body)
+
+    def test_rows_match_models(self) -> None:
+        """Row objects render the same as the Models they stand in for."""
+        for row_type, model in ((AccountRow, AccountOut),
+                                (EnvelopeRow, EnvelopeOut),
+                                (TransactionRow, TransactionOut)):
+            with self.subTest(msg=f"{row_type.__name__} fields match."):
+                self.assertEqual([field.name for field in fields(row_type)],
+                                 list(model.__fields__))
+
+        row = TransactionRow(1,
+                             datetime.now(timezone.utc),
+                             uuid4(),
+                             Decimal("12.30"),
+                             "a description",
+                             "a payee",
+                             datetime(2021, 1, 1, tzinfo=timezone.utc),
+                             uuid4(),
+                             None)
+
+        with self.subTest(msg="TransactionRow renders like TransactionOut."):
+            self.assertEqual(
+                FastJSONResponse([row]).body,
+                JSONResponse(jsonable_encoder(
+                    [TransactionOut(**asdict(row))])).body)
+
+    def test_unsupported_type(self) -> None:
+        """Values that can't be serialized raise an error."""
+        with self.assertRaises(TypeError):
+            FastJSONResponse({"value": object()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Tests for sharing in-flight read queries."""
+
+import asyncio
+from typing import Any, Dict, List
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from uuid import uuid4
+
+from db_wrapper.model import sql
+
+from src.models.single_flight import (
+    forget_flights,
+    single_flight_counts,
+    SingleFlight,
+)
+
+USER_ID = uuid4()
+
+
+class FakeClient:
+    """Client answering every query with one row, after a short wait."""
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.in_transaction = False
+
+    async def execute_and_return(self, query: Any) -> List[Dict[str, Any]]:
+        """Count query & return a row."""
+        self.queries += 1
+        await asyncio.sleep(0.01)
+
+        return [{"amount": 1}]
+
+
+class TestSingleFlight(TestCase):
+    """Tests for SingleFlight."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a SingleFlight on a fake client."""
+        self.client = FakeClient()
+        self.single_flight = SingleFlight(self.client)  # type: ignore
+
+    async def test_identical_queries_are_shared(self) -> None:
+        """Concurrent identical queries are executed once."""
+        query = sql.SQL("SELECT {x};").format(x=sql.Literal(1))
+
+        results = await asyncio.gather(*[
+            self.single_flight.execute_and_return("label", USER_ID, query)
+            for _ in range(5)])
+
+        with self.subTest(msg="Query is only executed once."):
+            self.assertEqual(self.client.queries, 1)
+        with self.subTest(msg="Every caller gets the rows."):
+            self.assertEqual(results, [[{"amount": 1}]] * 5)
+        with self.subTest(msg="Shared callers are counted."):
+            self.assertEqual(self.single_flight.executed["label"], 1)
+            self.assertEqual(self.single_flight.shared["label"], 4)
+            self.assertEqual(single_flight_counts()["label"],
+                             {"executed": 1, "shared": 4})
+
+    async def test_different_queries_are_not_shared(self) -> None:
+        """Queries with different parameters are executed separately."""
+        await asyncio.gather(*[
+            self.single_flight.execute_and_return(
+                "label", USER_ID,
+                sql.SQL("SELECT {x};").format(x=sql.Literal(x)))
+            for x in range(3)])
+
+        self.assertEqual(self.client.queries, 3)
+
+    async def test_finished_queries_are_not_kept(self) -> None:
+        """Queries run one after another are each executed."""
+        query = sql.SQL("SELECT 1;")
+
+        await self.single_flight.execute_and_return("label", USER_ID, query)
+        await self.single_flight.execute_and_return("label", USER_ID, query)
+
+        self.assertEqual(self.client.queries, 2)
+
+    async def test_cancelled_caller(self) -> None:
+        """Other callers still get rows when the first caller gives up."""
+        query = sql.SQL("SELECT 1;")
+        first = asyncio.ensure_future(
+            self.single_flight.execute_and_return("label", USER_ID, query))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(
+            self.single_flight.execute_and_return("label", USER_ID, query))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, [{"amount": 1}])
+
+    async def test_transactions_are_not_shared(self) -> None:
+        """Queries in a transaction are always executed."""
+        self.client.in_transaction = True
+        query = sql.SQL("SELECT 1;")
+
+        await asyncio.gather(*[
+            self.single_flight.execute_and_return("label", USER_ID, query)
+            for _ in range(2)])
+
+        self.assertEqual(self.client.queries, 2)
+
+    async def test_queries_for_other_users_are_not_shared(self) -> None:
+        """The same query for different Users is executed for each."""
+        query = sql.SQL("SELECT 1;")
+
+        await asyncio.gather(
+            self.single_flight.execute_and_return("label", USER_ID, query),
+            self.single_flight.execute_and_return("label", uuid4(), query))
+
+        self.assertEqual(self.client.queries, 2)
+
+    async def test_writes_end_sharing(self) -> None:
+        """Callers after a User's write don't join a query from before it."""
+        query = sql.SQL("SELECT 1;")
+        before = asyncio.ensure_future(
+            self.single_flight.execute_and_return("label", USER_ID, query))
+        await asyncio.sleep(0)
+
+        forget_flights(USER_ID)
+        after = [asyncio.ensure_future(self.single_flight.execute_and_return(
+            "label", USER_ID, query)) for _ in range(2)]
+        await asyncio.gather(before, *after)
+
+        with self.subTest(msg="Query is executed again after the write."):
+            self.assertEqual(self.client.queries, 2)
+        with self.subTest(msg="Callers after the write share one query."):
+            self.assertEqual(self.single_flight.shared["label"], 1)
+
+
+if __name__ == "__main__":
+    main()
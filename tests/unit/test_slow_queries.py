@@ -0,0 +1,199 @@
+"""Tests for the slow query log."""
+
+from datetime import timedelta
+from typing import Any, List
+from unittest import main, IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+from uuid import uuid4
+
+from db_wrapper import AsyncClient
+from db_wrapper.model import sql
+from fastapi import FastAPI
+from httpx import AsyncClient as HTTPClient
+
+from src.config import Config
+from src.database import create_client, create_conn_config
+from src.routers import create_admin
+from src.slow_queries import fingerprint, SlowQueryLog
+
+
+def reader_query(user_id: Any, limit: int) -> sql.Composed:
+    """Build a query like a reader's."""
+    return sql.SQL("""
+        SELECT *
+        FROM {table}
+        WHERE user_id = {user_id}
+        LIMIT {limit};
+    """).format(table=sql.Identifier("transaction"),
+                user_id=sql.Literal(user_id),
+                limit=sql.Literal(limit))
+
+
+class TestFingerprint(TestCase):
+    """Tests for fingerprint."""
+
+    def test_composed(self) -> None:
+        """Values are replaced & their types kept, in order."""
+        text, shape = fingerprint(reader_query(uuid4(), 50))
+
+        with self.subTest(msg="Values are replaced."):
+            self.assertEqual(
+                text,
+                'SELECT * FROM "transaction" WHERE user_id = ? LIMIT ?;')
+        with self.subTest(msg="Value types are kept."):
+            self.assertEqual(shape, ["UUID", "int"])
+
+    def test_same_for_different_values(self) -> None:
+        """Statements differing only in values match."""
+        self.assertEqual(fingerprint(reader_query(uuid4(), 50)),
+                         fingerprint(reader_query(uuid4(), 10)))
+
+    def test_string(self) -> None:
+        """Literals in plain strings are replaced."""
+        text, shape = fingerprint(
+            "SELECT * FROM user WHERE name = 'it''s' AND age > 30;")
+
+        self.assertEqual(text,
+                         "SELECT * FROM user WHERE name = ? AND age > ?;")
+        self.assertEqual(shape, [])
+
+    def test_params(self) -> None:
+        """Bound parameters are given by name."""
+        _, shape = fingerprint("SELECT %(id)s;", {"id": uuid4()})
+
+        self.assertEqual(shape, {"id": "UUID"})
+
+
+class TestSlowQueryLog(IsolatedAsyncioTestCase):
+    """Tests for SlowQueryLog."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a log that explains every slow read."""
+        self.database = create_client(create_conn_config())
+        self.log = SlowQueryLog(self.database,
+                                create_conn_config(),
+                                timedelta(milliseconds=100),
+                                explain_rate=1,
+                                size=3)
+        self.executed: List[str] = []
+
+        async def connect() -> None:
+            pass
+
+        async def execute(query: Any, params: Any = None) -> None:
+            self.executed.append(str(query))
+
+        async def execute_and_return(
+            query: Any,
+            params: Any = None,
+        ) -> List[Any]:
+            self.executed.append(repr(query))
+            return [{"QUERY PLAN": "Seq Scan on transaction"}]
+
+        for name, method in (("connect", connect),
+                             ("disconnect", connect),
+                             ("execute", execute),
+                             ("execute_and_return", execute_and_return)):
+            patcher = patch.object(AsyncClient, name, side_effect=method)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_threshold(self) -> None:
+        """Only statements slower than the threshold are kept."""
+        self.log.observe_query("Reader.fast", "SELECT 1;", None, 0.05)
+        self.log.observe_query("Reader.slow", "SELECT 2;", None, 0.15)
+
+        self.assertEqual([entry.label for entry in self.log.recent()],
+                         ["Reader.slow"])
+
+    async def test_bounded(self) -> None:
+        """Only the most recent statements are kept."""
+        for number in range(5):
+            self.log.observe_query(f"Reader.{number}", "UPDATE x;", None, 1)
+
+        self.assertEqual([entry.label for entry in self.log.recent()],
+                         ["Reader.4", "Reader.3", "Reader.2"])
+
+    async def test_explain(self) -> None:
+        """Slow reads are explained in a read only transaction."""
+        self.log.observe_query(
+            "Reader.slow", reader_query(uuid4(), 50), None, 0.2)
+        await self.log.stop()
+
+        with self.subTest(msg="Plan is kept with the statement."):
+            self.assertEqual(self.log.recent()[0].plan,
+                             "Seq Scan on transaction")
+        with self.subTest(msg="Statement is explained & rolled back."):
+            self.assertEqual(self.executed[0], "BEGIN READ ONLY;")
+            self.assertIn("EXPLAIN (ANALYZE, BUFFERS) ", self.executed[1])
+            self.assertEqual(self.executed[2], "ROLLBACK;")
+
+    async def test_writes_not_explained(self) -> None:
+        """Statements that could change data are never explained."""
+        self.log.observe_query(
+            "Updater.slow", "UPDATE transaction SET amount = 1;", None, 0.2)
+        await self.log.stop()
+
+        with self.subTest(msg="Statement is kept."):
+            self.assertEqual(len(self.log.recent()), 1)
+        with self.subTest(msg="Statement isn't explained."):
+            self.assertEqual(self.executed, [])
+            self.assertIsNone(self.log.recent()[0].plan)
+
+    async def test_observes_client(self) -> None:
+        """Slow statements executed by the client are kept."""
+        self.assertIn(self.log.observe_query, self.database.query_observers)
+
+
+class TestAdminRoute(IsolatedAsyncioTestCase):
+    """Tests for `GET /admin/slow-queries`."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a log with one slow statement."""
+        self.log = SlowQueryLog(create_client(create_conn_config()),
+                                create_conn_config(),
+                                timedelta(milliseconds=100),
+                                explain_rate=0)
+        self.log.observe_query("Reader.slow", "SELECT 1;", None, 0.2)
+
+    def create_app(self, **config_options: Any) -> FastAPI:
+        """Create an app with admin routes."""
+        app = FastAPI()
+        app.include_router(
+            create_admin(Config(database=create_conn_config(),
+                                jwt_key="key",
+                                **config_options),
+                         self.log))
+
+        return app
+
+    async def test_admin_key(self) -> None:
+        """Slow statements are given to requests with the admin key."""
+        app = self.create_app(admin_key="secret")
+
+        async with HTTPClient(app=app, base_url="http://test") as client:
+            allowed = await client.get("/admin/slow-queries",
+                                       headers={"X-Admin-Key": "secret"})
+            wrong = await client.get("/admin/slow-queries",
+                                     headers={"X-Admin-Key": "guess"})
+            missing = await client.get("/admin/slow-queries")
+
+        with self.subTest(msg="Responds with statements for the key."):
+            self.assertEqual(allowed.status_code, 200)
+            self.assertEqual(allowed.json()[0]["fingerprint"], "SELECT ?;")
+        with self.subTest(msg="Responds with 403 for any other key."):
+            self.assertEqual(wrong.status_code, 403)
+            self.assertEqual(missing.status_code, 403)
+
+    async def test_disabled(self) -> None:
+        """Admin routes aren't found if no admin key is set."""
+        async with HTTPClient(app=self.create_app(),
+                              base_url="http://test") as client:
+            response = await client.get("/admin/slow-queries",
+                                        headers={"X-Admin-Key": ""})
+
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    main()
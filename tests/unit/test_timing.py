@@ -0,0 +1,96 @@
+"""Tests for reporting query timings in Server-Timing headers."""
+
+import asyncio
+from unittest import main, IsolatedAsyncioTestCase, TestCase
+
+from fastapi.responses import PlainTextResponse
+from httpx import AsyncClient as HTTPClient
+
+from tests.helpers.offline import get_offline_app, ItemReader
+
+from src.timing import QueryTimings, ServerTimingMiddleware
+
+
+class TestQueryTimings(TestCase):
+    """Tests for QueryTimings."""
+
+    def test_header(self) -> None:
+        """Header gives count, total, & slowest statement."""
+        timings = QueryTimings()
+        timings.record("Reader.one", 0.001)
+        timings.record("Reader.slow", 0.0105)
+        timings.record("Reader.one", 0.002)
+
+        self.assertEqual(
+            timings.header(),
+            'db;dur=13.50;desc="3 queries", '
+            'db-slowest;dur=10.50;desc="Reader.slow"')
+
+    def test_no_queries(self) -> None:
+        """Header only gives a count when nothing was executed."""
+        self.assertEqual(QueryTimings().header(),
+                         'db;dur=0.00;desc="0 queries"')
+
+
+class TestServerTimingMiddleware(IsolatedAsyncioTestCase):
+    """Tests for ServerTimingMiddleware."""
+
+    async def asyncSetUp(self) -> None:
+        """Create the app, reading through a client without a database."""
+        app, self.database = get_offline_app(self, query_debug=True)
+        reader = ItemReader(self.database)
+
+        @app.get("/one")
+        async def one() -> PlainTextResponse:
+            await reader.one(1)
+            return PlainTextResponse("one")
+
+        @app.get("/many")
+        async def many() -> PlainTextResponse:
+            await reader.one(1)
+            await reader.slow()
+            await reader.one(2)
+            return PlainTextResponse("many")
+
+        self.app = app
+
+    async def test_header(self) -> None:
+        """Responses report the statements executed for them."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            response = await client.get("/many")
+
+        header = response.headers["server-timing"]
+
+        with self.subTest(msg="Every statement is counted."):
+            self.assertIn('desc="3 queries"', header)
+        with self.subTest(msg="Slowest statement is named."):
+            self.assertIn('db-slowest;', header)
+            self.assertIn('desc="ItemReader.slow"', header)
+
+    async def test_concurrent_requests(self) -> None:
+        """Requests handled at once only count their own statements."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            many, one = await asyncio.gather(client.get("/many"),
+                                             client.get("/one"))
+
+        with self.subTest(msg="/many"):
+            self.assertIn('desc="3 queries"',
+                          many.headers["server-timing"])
+        with self.subTest(msg="/one"):
+            self.assertIn('desc="1 query"', one.headers["server-timing"])
+
+    async def test_observed_once(self) -> None:
+        """Statements are timed once, however often the stack is built."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            response = await client.get("/one")
+
+        with self.subTest(msg="Observer is added once."):
+            self.assertEqual(self.database.query_observers.count(
+                ServerTimingMiddleware.observe_query), 1)
+        with self.subTest(msg="Statement is counted once."):
+            self.assertIn('desc="1 query"',
+                          response.headers["server-timing"])
+
+
+if __name__ == "__main__":
+    main()
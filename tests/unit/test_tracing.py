@@ -0,0 +1,135 @@
+"""Tests for tracing requests through models & the database."""
+
+from typing import Any, Dict, List
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from uuid import uuid4
+
+from httpx import AsyncClient as HTTPClient
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from tests.helpers.offline import get_offline_app, ItemReader
+
+from src.tracing import (
+    configure_tracing,
+    set_user,
+    traced,
+    user_id_hash,
+    TracingMiddleware,
+)
+
+EXPORTER = InMemorySpanExporter()
+USER_ID = uuid4()
+
+
+def setUpModule() -> None:  # pylint: disable=invalid-name
+    """Trace every request, into memory."""
+    configure_tracing(EXPORTER, sample_rate=1)
+
+
+class TestTracing(TestCase):
+    """Tests for TracingMiddleware & traced functions."""
+
+    async def asyncSetUp(self) -> None:
+        """Create the app, reading through a client without a database."""
+        EXPORTER.clear()
+        # tracing is already configured with EXPORTER, so this isn't used
+        app, self.database = get_offline_app(self, trace_exporter="console")
+        reader = ItemReader(self.database)
+
+        @traced("auth_user")
+        async def auth_user() -> None:
+            set_user(USER_ID)
+
+        @app.get("/item/{item_id}")
+        async def item(item_id: int) -> List[Any]:
+            await auth_user()
+            rows: List[Any] = await reader.many(item_id)
+            return rows
+
+        self.app = app
+
+    async def get(self, path: str, **headers: str) -> None:
+        """Request path & wait for its spans."""
+        async with HTTPClient(app=self.app, base_url="http://test") as client:
+            await client.get(path, headers=headers)
+
+        configure_tracing(EXPORTER).force_flush()
+
+    @staticmethod
+    def spans() -> Dict[str, ReadableSpan]:
+        """Get spans exported, by name."""
+        return {span.name: span for span in EXPORTER.get_finished_spans()}
+
+    def ancestors(self, span: ReadableSpan) -> List[str]:
+        """Get names of the spans a span is nested under, innermost first."""
+        by_id = {other.context.span_id: other
+                 for other in EXPORTER.get_finished_spans()}
+        names = []
+
+        while span.parent is not None:
+            span = by_id[span.parent.span_id]
+            names.append(span.name)
+
+        return names
+
+    async def test_spans(self) -> None:
+        """Request, middleware, auth, model method, & statement are nested."""
+        await self.get("/item/10")
+        spans = self.spans()
+        request = spans["GET /item/{item_id}"]
+        auth = spans["auth_user"]
+        method = spans["ItemReader.many"]
+        statement = spans["SQL ItemReader.many"]
+
+        with self.subTest(msg="Spans are nested under the request."):
+            self.assertIsNone(request.parent)
+            self.assertIn("middleware idempotency", self.ancestors(auth))
+            self.assertEqual(self.ancestors(auth)[-1], request.name)
+            self.assertEqual(self.ancestors(method)[-1], request.name)
+            self.assertEqual(self.ancestors(statement)[0], method.name)
+        with self.subTest(msg="Statement gets one span."):
+            self.assertEqual(
+                [span.name for span in EXPORTER.get_finished_spans()
+                 ].count(statement.name), 1)
+            self.assertEqual(self.database.query_observers.count(
+                TracingMiddleware.observe_query), 1)
+        with self.subTest(msg="Request has its route & status."):
+            self.assertEqual(request.attributes["http.route"],
+                             "/item/{item_id}")
+            self.assertEqual(request.attributes["http.status_code"], 200)
+        with self.subTest(msg="User is identified by a hash."):
+            self.assertEqual(auth.attributes["enduser.id_hash"],
+                             user_id_hash(USER_ID))
+        with self.subTest(msg="Model method has its row count."):
+            self.assertEqual(method.attributes["db.rows"], 2)
+        with self.subTest(msg="Statement has its fingerprint."):
+            self.assertEqual(statement.attributes["db.statement"],
+                             "SELECT * FROM item LIMIT ?;")
+            self.assertIn("db.fingerprint", statement.attributes)
+
+    async def test_continues_trace(self) -> None:
+        """Requests continue a trace given by the client."""
+        trace_id = "0af7651916cd43dd8448eb211c80319c"
+        await self.get(
+            "/item/1",
+            traceparent=f"00-{trace_id}-b7ad6b7169203331-01")
+
+        self.assertEqual(
+            f"{self.spans()['GET /item/{item_id}'].context.trace_id:032x}",
+            trace_id)
+
+    async def test_unsampled_trace(self) -> None:
+        """Nothing is recorded for a trace the client didn't sample."""
+        await self.get(
+            "/item/1",
+            traceparent="00-0af7651916cd43dd8448eb211c80319c"
+                        "-b7ad6b7169203331-00")
+
+        self.assertEqual(self.spans(), {})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Tests for reading Transactions from only the partitions holding them."""
+
+from dataclasses import fields
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+from unittest import main, IsolatedAsyncioTestCase as TestCase
+from unittest.mock import patch
+from uuid import uuid4
+
+from src.database import create_client, create_conn_config, Client
+from src.models import TransactionModel
+from src.models.filters import equals
+from src.models.transaction import (
+    _months_ago,
+    RECENT_MONTHS,
+    TransactionRow,
+)
+
+# a row as selected, with every column empty
+ROW = (None,) * len(fields(TransactionRow))
+
+
+class TestMonthsAgo(TestCase):
+    """Tests for _months_ago."""
+
+    def test_start_of_month(self) -> None:
+        """Bound is the start of a UTC month, before now."""
+        bound = _months_ago(3)
+
+        with self.subTest(msg="Bound is the first of a month at midnight."):
+            self.assertEqual((bound.day, bound.hour, bound.minute),
+                             (1, 0, 0))
+            self.assertEqual(bound.tzinfo, timezone.utc)
+        with self.subTest(msg="Bound is three months before this one."):
+            now = datetime.now(timezone.utc)
+            self.assertEqual((now.year * 12 + now.month)
+                             - (bound.year * 12 + bound.month), 3)
+
+    def test_across_years(self) -> None:
+        """Bounds further back than this year fall in earlier years."""
+        now = datetime.now(timezone.utc)
+
+        self.assertEqual(_months_ago(12 + now.month).year, now.year - 2)
+
+
+class TestManyByUser(TestCase):
+    """Tests for TransactionReader.many_by_user."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a reader on a client recording queries."""
+        self.queries: List[str] = []
+        self.pages: List[List[Tuple[Any, ...]]] = []
+        reader = TransactionModel(
+            create_client(create_conn_config())).read
+
+        async def execute_and_return_tuples(
+            _: Any,
+            query: Any,
+        ) -> List[Tuple[Any, ...]]:
+            self.queries.append(repr(query))
+            return self.pages.pop(0)
+
+        patcher = patch.object(Client, "execute_and_return_tuples",
+                               new=execute_and_return_tuples)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reader = reader
+
+    async def test_bounded_by_recent_page(self) -> None:
+        """Timestamp sorted pages are bounded by recent months' rows."""
+        self.pages = [[ROW] * 2]
+
+        rows = await self.reader.many_by_user(
+            uuid4(), limit=2, page=3, sort="timestamp")
+
+        with self.subTest(msg="Only one query is made."):
+            self.assertEqual(len(self.queries), 1)
+        with self.subTest(msg="Page is bounded by the 8 newest rows."):
+            self.assertIn("count(*) = ", self.queries[0])
+            self.assertIn("Literal(8)", self.queries[0])
+        with self.subTest(msg="Newest rows are looked for in recent months."):
+            self.assertIn(repr(_months_ago(RECENT_MONTHS)), self.queries[0])
+        with self.subTest(msg="Rows are returned."):
+            self.assertEqual(len(rows), 2)
+
+    async def test_not_windowed(self) -> None:
+        """Other sorts & timestamp filters are read in one query."""
+        cases: List[Dict[str, Any]] = [
+            {"sort": "amount"},
+            {"sort": "timestamp",
+             "timestamp": equals(datetime.now(timezone.utc))}]
+
+        for kwargs in cases:
+            with self.subTest(kwargs=kwargs):
+                self.queries.clear()
+                self.pages = [[ROW]]
+
+                await self.reader.many_by_user(
+                    uuid4(), limit=2, page=0, **kwargs)
+
+                with self.subTest(msg="Only one query is made."):
+                    self.assertEqual(len(self.queries), 1)
+                with self.subTest(msg="Page isn't bounded."):
+                    self.assertNotIn("count(*) = ", self.queries[0])
+
+    async def test_sort_qualified(self) -> None:
+        """Sort columns Accounts share are read from Transactions."""
+        for sort in ("version", "updated_at"):
+            with self.subTest(sort=sort):
+                self.queries.clear()
+                self.pages = [[ROW]]
+
+                await self.reader.many_by_user(
+                    uuid4(), limit=2, page=0, sort=sort)
+
+                self.assertIn(f"Identifier('t', '{sort}')", self.queries[0])
+
+
+class TestById(TestCase):
+    """Tests for reading, updating & deleting a Transaction by id."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a model on a client recording queries."""
+        self.queries: List[str] = []
+        self.model = TransactionModel(create_client(create_conn_config()))
+
+        async def execute_and_return(
+            _: Any,
+            query: Any,
+        ) -> List[Dict[str, Any]]:
+            self.queries.append(repr(query))
+            return [{}]
+
+        patcher = patch.object(Client, "execute_and_return",
+                               new=execute_and_return)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # rows are made into Models, which aren't the point here
+        patcher = patch("src.models.transaction.TransactionOut")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_timestamp_looked_up(self) -> None:
+        """Without a timestamp, it's looked up by id."""
+        transaction_id = uuid4()
+
+        await self.model.read.one_by_id(transaction_id)
+        await self.model.delete.one_by_id(str(transaction_id))
+
+        for query in self.queries:
+            with self.subTest(query=query):
+                self.assertIn("FROM transaction_id WHERE id", query)
+                self.assertIn("Identifier('timestamp')", query)
+
+    async def test_timestamp_given(self) -> None:
+        """Given a timestamp, it bounds the query directly."""
+        transaction_id = uuid4()
+        timestamp = datetime.now(timezone.utc)
+
+        await self.model.delete.one_by_id(str(transaction_id),
+                                          timestamp=timestamp)
+
+        with self.subTest(msg="Timestamp isn't looked up."):
+            self.assertNotIn("transaction_id", self.queries[0])
+        with self.subTest(msg="Timestamp bounds the query."):
+            self.assertIn(repr(timestamp), self.queries[0])
+
+
+if __name__ == "__main__":
+    main()